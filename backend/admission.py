@@ -0,0 +1,274 @@
+"""
+Admission control and load shedding per priority class.
+
+Every route belongs to a class (ADMISSION_ROUTES, default
+ADMISSION_DEFAULT_CLASS). Each class has its own concurrency limit, a
+bounded queue and a maximum queue wait (ADMISSION_LIMITS), so a burst of
+heavy analytics or marketplace requests cannot take every worker thread
+away from /api/predict:
+
+    critical   single predictions and crop recommendations (no limit)
+    standard   everything not listed
+    heavy      analytics, marketplace listings and bulk endpoints
+    stream     long-lived /api/stream/prices connections
+
+A request that finds its class full waits in the queue. It is rejected
+right away when the queue is full (429) or when the expected wait (queue
+position x the class's recent service time) exceeds its maximum wait, and
+after waiting that long without a slot (503). Both carry ``Retry-After``.
+
+While critical requests run slower than ADMISSION_CRITICAL_SLO_MS, the
+other classes run at half their limit and do not queue, so prediction
+latency recovers first and heavy traffic degrades to fast rejections.
+Limits are per worker process.
+
+Under ASGI the marketplace routes are answered by marketplace_async without
+going through Flask; MarketplaceApp admits them through ``admit_async``
+against the same classes, so /api/products stays heavy there too.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+
+from flask import g, jsonify, request
+
+import metrics
+
+DEFAULT_LIMITS = {
+    # class: (max concurrent, max queued, max queue wait seconds); 0 concurrent = unlimited
+    'critical': (0, 0, 0.0),
+    'standard': (8, 16, 2.0),
+    'heavy': (2, 4, 5.0),
+    # Each SSE client holds a worker thread under WSGI (ASGI serves them on the event loop)
+    'stream': (2, 0, 0.0)
+}
+
+
+def parse_limits(text):
+    """'heavy=2:4:5,standard=8:16:2' -> {'heavy': (2, 4, 5.0), 'standard': (8, 16, 2.0)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, spec = item.partition('=')
+        concurrency, queue, wait = spec.split(':')
+        limits[name.strip()] = (int(concurrency), int(queue), float(wait))
+    return limits
+
+
+DEFAULT_CONFIG = {
+    'ADMISSION_ENABLED': os.environ.get('ADMISSION_ENABLED', '1') == '1',
+    'ADMISSION_LIMITS': {**DEFAULT_LIMITS, **parse_limits(os.environ.get('ADMISSION_LIMITS', ''))},
+    'ADMISSION_CRITICAL_SLO_MS': float(os.environ.get('ADMISSION_CRITICAL_SLO_MS', '250')),
+    'ADMISSION_DEFAULT_CLASS': 'standard',
+    'ADMISSION_ROUTES': {
+        '/api/predict': 'critical',
+        '/api/predict-multilingual': 'critical',
+        '/api/crop/recommend': 'critical',
+        '/api/analytics/historical': 'heavy',
+        '/api/analytics/market-comparison': 'heavy',
+        '/api/analytics/trending-commodities': 'heavy',
+        '/api/analytics/price-forecast': 'heavy',
+        '/api/actual-prices': 'heavy',
+        '/api/price-comparison': 'heavy',
+        '/api/market-overview': 'heavy',
+        '/api/products': 'heavy',
+        '/api/farmers/<int:farmer_id>/products': 'heavy',
+        '/api/crop/recommend/batch': 'heavy',
+        '/api/stream/prices': 'stream'
+    }
+}
+
+# Weight of the newest sample in the per-class service time average
+SERVICE_TIME_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def payload(self):
+        return {'error': f'Server busy ({self.reason}), retry later', 'retry_after': self.retry_after}
+
+
+class PriorityClass:
+    """Concurrency limit plus bounded FIFO-ish queue for one class"""
+
+    def __init__(self, name, concurrency, queue, max_wait):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.service_time = 0.0
+        self._cond = threading.Condition()
+
+    def retry_after(self, position, concurrency):
+        """Seconds until roughly ``position`` queued requests have drained"""
+        return max(1, math.ceil(self.service_time * position / max(1, concurrency)))
+
+    def limits(self, degraded=False):
+        """(concurrency, queue) in effect"""
+        if degraded and self.concurrency:
+            # 0 stays unlimited
+            return max(1, self.concurrency // 2), 0
+        return self.concurrency, self.queue
+
+    def try_acquire(self, degraded=False):
+        """Take a free slot without waiting; False when the class is full"""
+        concurrency, _ = self.limits(degraded)
+        with self._cond:
+            if not concurrency or self.active < concurrency:
+                self.active += 1
+                return True
+        return False
+
+    def acquire(self, degraded=False):
+        """Take a slot (possibly after queueing) or raise Rejected; returns the queue wait"""
+        concurrency, queue = self.limits(degraded)
+
+        with self._cond:
+            if not concurrency or self.active < concurrency:
+                self.active += 1
+                return 0.0
+
+            position = self.waiting + 1
+            if self.waiting >= queue:
+                raise Rejected(429 if not degraded else 503, 'queue full' if not degraded else 'shedding load',
+                               self.retry_after(position, concurrency))
+            expected = self.service_time * position / concurrency
+            if expected > self.max_wait:
+                raise Rejected(503, 'expected wait exceeds deadline', self.retry_after(position, concurrency))
+
+            start = time.monotonic()
+            deadline = start + self.max_wait
+            self.waiting += 1
+            metrics.ADMISSION_QUEUED.set(self.waiting, priority=self.name)
+            try:
+                while self.active >= concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected(503, 'queue wait deadline exceeded', self.retry_after(position, concurrency))
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+                metrics.ADMISSION_QUEUED.set(self.waiting, priority=self.name)
+            return time.monotonic() - start
+
+    async def acquire_async(self, degraded=False):
+        """acquire() for the event loop: only a request that has to queue waits, in a worker thread"""
+        if self.try_acquire(degraded):
+            return 0.0
+        waiter = asyncio.ensure_future(asyncio.to_thread(self.acquire, degraded))
+        try:
+            return await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The client went away while queued: hand back the slot the thread still takes
+            waiter.add_done_callback(lambda f: not f.cancelled() and f.exception() is None and self.release())
+            raise
+
+    def release(self, service_time=None):
+        """Free a slot; ``service_time`` None (never served) leaves the average alone"""
+        with self._cond:
+            self.active -= 1
+            if service_time is not None:
+                self.service_time += SERVICE_TIME_ALPHA * (service_time - self.service_time)
+            self._cond.notify()
+
+
+class AdmissionController:
+    """Classifies requests and admits, queues or rejects them"""
+
+    def __init__(self):
+        self.enabled = False
+        self.classes = {}
+        self.routes = {}
+        self.default_class = 'standard'
+        self.critical_slo = 0.25
+
+    def configure(self, config):
+        self.enabled = config['ADMISSION_ENABLED']
+        self.classes = {
+            name: PriorityClass(name, *limits) for name, limits in config['ADMISSION_LIMITS'].items()
+        }
+        self.routes = dict(config['ADMISSION_ROUTES'])
+        self.default_class = config['ADMISSION_DEFAULT_CLASS']
+        self.critical_slo = config['ADMISSION_CRITICAL_SLO_MS'] / 1000
+
+    def classify(self):
+        rule = request.url_rule
+        name = self.routes.get(rule.rule, self.default_class) if rule is not None else self.default_class
+        # Batched predictions are bulk work even though the route is critical
+        if name == 'critical' and request.method == 'POST' and request.is_json:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict) and 'rows' in data:
+                name = 'heavy'
+        return self.classes.get(name) or self.classes[self.default_class]
+
+    def route_class(self, rule):
+        """Class for a URL rule string, for handlers that do not run through Flask"""
+        name = self.routes.get(rule, self.default_class)
+        return self.classes.get(name) or self.classes[self.default_class]
+
+    def degraded(self):
+        """Critical traffic is over its SLO: lower classes stop queueing"""
+        critical = self.classes.get('critical')
+        return critical is not None and critical.active > 0 and critical.service_time > self.critical_slo
+
+    def _before_request(self):
+        if not self.enabled or request.url_rule is None:
+            return None
+        priority = self.classify()
+        degraded = priority.name != 'critical' and self.degraded()
+        try:
+            waited = priority.acquire(degraded)
+        except Rejected as e:
+            metrics.ADMISSION_DECISIONS.inc(priority=priority.name, decision=f'rejected_{e.status}')
+            response = jsonify(e.payload())
+            response.status_code = e.status
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        self._admitted(priority, waited)
+        g.admission = (priority, time.perf_counter())
+        return None
+
+    def _admitted(self, priority, waited):
+        metrics.ADMISSION_DECISIONS.inc(priority=priority.name, decision='queued' if waited else 'admitted')
+        if waited:
+            metrics.observe('admission_wait', waited)
+
+    async def admit_async(self, rule):
+        """
+        Admit an ASGI request for the URL rule string ``rule`` on the event loop.
+        Returns the PriorityClass to release() afterwards, None when admission
+        is disabled; raises Rejected like the Flask path would answer.
+        """
+        if not self.enabled:
+            return None
+        priority = self.route_class(rule)
+        degraded = priority.name != 'critical' and self.degraded()
+        try:
+            waited = await priority.acquire_async(degraded)
+        except Rejected as e:
+            metrics.ADMISSION_DECISIONS.inc(priority=priority.name, decision=f'rejected_{e.status}')
+            raise
+        self._admitted(priority, waited)
+        return priority
+
+    def _teardown_request(self, exc):
+        admitted = g.pop('admission', None)
+        if admitted is not None:
+            priority, start = admitted
+            priority.release(time.perf_counter() - start)
+
+    def init_app(self, app):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.configure(app.config)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
@@ -0,0 +1,139 @@
+"""
+ASGI entry point for ASGI servers.
+
+    uvicorn asgi:app --workers 4
+
+Wraps the WSGI application with asgiref's adapter; Flask views still run in
+a thread pool.
+
+In front of it sits an asyncio read tier: GET/HEAD requests for
+reference-cached endpoints (commodities, districts, markets, crop details,
+health, price trends, market overview) whose body is already rendered are
+answered from REFERENCE_CACHE on the event loop, with the same ETag,
+Last-Modified, compression and 304 handling as the Flask path. They never
+take a worker thread, so one process can hold thousands of slow client
+connections. Everything else, and cache misses (which render and fill the
+cache), goes to Flask. Set ASGI_READ_TIER=0 to send everything to Flask.
+CORS headers come from the app's policy (cors.py); preflight OPTIONS
+requests are answered by Flask.
+
+Farmers/products requests are handled by marketplace_async on an async DB
+pool instead of Flask's sync session (ASGI_ASYNC_DB=0 keeps them on Flask),
+under the same ADMISSION classes as the Flask views.
+/api/stream/prices is served by price_stream.StreamApp, one asyncio task
+per client instead of a thread.
+"""
+import os
+import time
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Accept
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, quote_etag
+from werkzeug.routing import RequestRedirect
+from werkzeug.utils import get_content_type
+
+import compression
+import cors
+import metrics
+from app import ADMISSION, PRICE_STREAM, REFERENCE_CACHE
+from marketplace_async import MarketplaceApp
+from price_stream import StreamApp
+from wsgi import application as wsgi_application
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReadTier:
+    """Serves cached reference bodies on the event loop, falls back to ``fallback``"""
+
+    def __init__(self, flask_app, cache, fallback):
+        self.flask_app = flask_app
+        self.cache = cache
+        self.fallback = fallback
+        self.url_map = flask_app.url_map
+
+    def lookup(self, scope):
+        """(url rule, cached entry) for a request, or None"""
+        path = scope['path']
+        root = scope.get('root_path', '')
+        if root and path.startswith(root):
+            path = path[len(root):] or '/'
+        try:
+            rule, view_args = self.url_map.bind('localhost').match(path, method='GET', return_rule=True)
+        except (HTTPException, RequestRedirect):
+            return None
+
+        view = self.flask_app.view_functions.get(rule.endpoint)
+        args = {}
+        for name, value in parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True):
+            # request.args.get returns the first value
+            args.setdefault(name, value)
+        entry = self.cache.entry_for(view, rule.endpoint, view_args, args)
+        return (rule, entry) if entry is not None else None
+
+    def respond(self, scope, entry):
+        """(status, headers, body) for a cached entry, mirroring ReferenceCache.cached and the CORS policy"""
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        config = self.flask_app.config
+        accept_encodings = parse_accept_header(headers.get('accept-encoding'), Accept)
+        encoding, body = compression.negotiate(entry.body, entry.mimetype, entry.variants, accept_encodings, config)
+        etag = f'{entry.etag}-{encoding}' if encoding else entry.etag
+
+        if 'if-none-match' in headers:
+            if_none_match = parse_etags(headers['if-none-match'])
+            not_modified = if_none_match.contains(entry.etag) or if_none_match.contains(etag)
+        elif 'if-modified-since' in headers:
+            since = parse_date(headers['if-modified-since'])
+            not_modified = since is not None and since >= entry.last_modified
+        else:
+            not_modified = False
+
+        response_headers = [
+            ('content-type', get_content_type(entry.mimetype, 'utf-8')),
+            ('etag', quote_etag(etag)),
+            ('last-modified', http_date(entry.last_modified)),
+            ('cache-control', f"public, max-age={config['REFERENCE_MAX_AGE']}, must-revalidate"),
+            ('vary', 'Accept-Encoding')
+        ]
+        response_headers = cors.apply(self.flask_app, headers, scope['method'], response_headers)
+        if not_modified:
+            return 304, response_headers, b''
+        if encoding:
+            response_headers.append(('content-encoding', encoding))
+        response_headers.append(('content-length', str(len(body))))
+        return 200, response_headers, body
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in READ_METHODS:
+            return await self.fallback(scope, receive, send)
+
+        start = time.perf_counter()
+        found = self.lookup(scope)
+        if found is None:
+            metrics.ASYNC_READS.inc(result='fallback')
+            return await self.fallback(scope, receive, send)
+
+        rule, entry = found
+        status, headers, body = self.respond(scope, entry)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+        metrics.ASYNC_READS.inc(result='cache')
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, method=scope['method'], route=rule.rule)
+        metrics.REQUESTS_TOTAL.inc(method=scope['method'], route=rule.rule, status=status)
+
+
+flask_application = WsgiToAsgi(wsgi_application)
+
+app = StreamApp(PRICE_STREAM, flask_application, wsgi_application)
+if os.environ.get('ASGI_ASYNC_DB', '1') == '1':
+    app = MarketplaceApp(wsgi_application, app, admission=ADMISSION)
+if os.environ.get('ASGI_READ_TIER', '1') == '1':
+    app = ReadTier(wsgi_application, REFERENCE_CACHE, app)
+application = app
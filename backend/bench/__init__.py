@@ -0,0 +1,12 @@
+"""
+Benchmarks for the prediction and analytics hot paths.
+
+Run from the backend directory:
+
+    python -m bench.micro                      # microbenchmarks
+    python -m bench.load                       # load test against an in-process server
+    python -m bench.compare results.json bench/baseline.json
+
+Results are written as JSON under bench/results/ and can be compared against
+a baseline file to catch regressions.
+"""
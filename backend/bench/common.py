@@ -0,0 +1,103 @@
+"""Shared timing, result and environment helpers for the benchmarks"""
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'bench', 'results')
+
+
+def quiet():
+    """Silence request logging and sklearn version warnings while benchmarking"""
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings('ignore')
+
+
+def enter_backend_dir():
+    """Model paths are relative to the backend directory"""
+    os.chdir(BACKEND_DIR)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def summarize_timings(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ms = np.asarray(samples, dtype=float) * 1000
+    if ms.size == 0:
+        return {'count': 0}
+    return {
+        'count': int(ms.size),
+        'mean_ms': round(float(ms.mean()), 4),
+        'median_ms': round(float(np.median(ms)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'min_ms': round(float(ms.min()), 4),
+        'max_ms': round(float(ms.max()), 4)
+    }
+
+
+def time_call(fn, repeat=50, warmup=3, min_time=0.0):
+    """
+    Time ``fn()`` ``repeat`` times after ``warmup`` calls (and keep going until
+    ``min_time`` seconds have elapsed). Returns the latency summary.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < repeat or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize_timings(samples)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'git_revision': git_revision()
+    }
+
+
+def write_results(kind, results, path=None):
+    """Write benchmark results as JSON; returns the path written"""
+    payload = {
+        'kind': kind,
+        'created_at': datetime.now().isoformat(),
+        'environment': environment(),
+        'results': results
+    }
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def print_table(results, key='median_ms'):
+    width = max((len(name) for name in results), default=10)
+    for name, stats in results.items():
+        value = stats.get(key)
+        shown = f'{value:10.4f} ms' if isinstance(value, (int, float)) else '         n/a'
+        print(f'  {name:<{width}}  {key[:-3]} {shown}  (p99 {stats.get("p99_ms", "n/a")})')
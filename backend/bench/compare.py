@@ -0,0 +1,74 @@
+"""
+Compare benchmark results against a baseline.
+
+    python -m bench.compare bench/results/micro-....json bench/baseline.json [--threshold 10]
+    python -m bench.compare bench/results/micro-....json --save-baseline bench/baseline.json
+
+Exits non-zero when any case's median latency (or load-test p95) regressed
+by more than the threshold percentage.
+"""
+import argparse
+import json
+import shutil
+import sys
+
+# Metrics compared per case, in order of preference
+COMPARED_METRICS = ('median_ms', 'p95_ms')
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current, baseline, threshold=10.0):
+    """
+    Returns a list of (case, metric, baseline, current, change_percent, regressed)
+    for every case present in both result sets.
+    """
+    rows = []
+    for name, stats in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric in stats and metric in base and base[metric]:
+                change = (stats[metric] - base[metric]) / base[metric] * 100
+                rows.append((name, metric, base[metric], stats[metric], change, change > threshold))
+                break
+    return rows
+
+
+def compare_files(current_path, baseline_path, threshold=10.0):
+    """Print a comparison table; returns True if anything regressed"""
+    rows = compare_results(_load(current_path), _load(baseline_path), threshold)
+    regressed = False
+    width = max((len(row[0]) for row in rows), default=10)
+    print(f'\nComparison against {baseline_path} (threshold {threshold}%):')
+    for name, metric, base, current, change, is_regression in rows:
+        marker = 'REGRESSION' if is_regression else ('faster' if change < -threshold else '')
+        print(f'  {name:<{width}}  {metric:<9} {base:10.4f} -> {current:10.4f}  {change:+7.1f}%  {marker}')
+        regressed = regressed or is_regression
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('current', help='results JSON to check')
+    parser.add_argument('baseline', nargs='?', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed regression in percent')
+    parser.add_argument('--save-baseline', default=None, help='copy the current results to this path')
+    args = parser.parse_args(argv)
+
+    if args.save_baseline:
+        shutil.copyfile(args.current, args.save_baseline)
+        print(f'Baseline saved to {args.save_baseline}')
+        return 0
+    if not args.baseline:
+        parser.error('baseline is required unless --save-baseline is given')
+
+    return 1 if compare_files(args.current, args.baseline, args.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
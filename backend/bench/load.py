@@ -0,0 +1,209 @@
+"""
+Macro load generator for the API.
+
+    python -m bench.load                                  # in-process server, SQLite stand-in
+    python -m bench.load --database mysql+pymysql://root:pw@127.0.0.1:3307/bench
+    python -m bench.load --url http://127.0.0.1:5000      # an already running server (e.g. gunicorn)
+
+Scenarios (select with --scenarios):
+
+    predict            POST /api/predict over every valid commodity/district/market
+    comparison_batch   POST /api/price-comparison with 20 rows per call
+    analytics          POST /api/analytics/historical and GET /api/price-trend (365 days)
+    products           GET /api/products (marketplace listing)
+
+Each scenario runs for --duration seconds with --concurrency client threads;
+latency percentiles, throughput and status codes are written as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.common import enter_backend_dir, print_table, quiet, summarize_timings, write_results
+
+SCENARIOS = ('predict', 'comparison_batch', 'analytics', 'products')
+
+
+def _request(base_url, method, path, body=None, timeout=30):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    if data is not None:
+        req.add_header('Content-Type', 'application/json')
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def discover_combos(base_url):
+    """Valid (commodity, district, market) combinations, discovered through the API"""
+    combos = []
+    _, body = _request(base_url, 'GET', '/api/commodities')
+    for commodity in json.loads(body)['commodities']:
+        status, body = _request(base_url, 'GET', f"/api/districts/{commodity['id']}")
+        if status != 200:
+            continue
+        for district in json.loads(body)['districts']:
+            status, body = _request(base_url, 'GET', f"/api/markets/{district['id']}")
+            if status != 200:
+                continue
+            for market in json.loads(body)['markets']:
+                combos.append((commodity['id'], district['id'], market['id']))
+    return combos
+
+
+def build_generators(combos):
+    """Scenario name -> function(rng) returning (method, path, body)"""
+    if not combos:
+        combos = [('wheat', 'pune', 'pune')]
+
+    def predict(rng):
+        commodity, district, market = rng.choice(combos)
+        return 'POST', '/api/predict', {'commodity': commodity, 'district': district, 'market': market}
+
+    def comparison_batch(rng):
+        rows = [{
+            'commodity': commodity,
+            'district': district,
+            'predicted_price': rng.uniform(1500, 6000)
+        } for commodity, district, _ in (rng.choice(combos) for _ in range(20))]
+        return 'POST', '/api/price-comparison', {'rows': rows}
+
+    def analytics(rng):
+        commodity, district, market = rng.choice(combos)
+        if rng.random() < 0.5:
+            return 'POST', '/api/analytics/historical', {
+                'commodity': commodity,
+                'district': district,
+                'market': market,
+                'time_range': rng.choice(['1month', '3months', '6months', '1year'])
+            }
+        return 'GET', f'/api/price-trend/{commodity}?district={district}&days=365', None
+
+    def products(rng):
+        return 'GET', '/api/products', None
+
+    return {
+        'predict': predict,
+        'comparison_batch': comparison_batch,
+        'analytics': analytics,
+        'products': products
+    }
+
+
+def run_scenario(base_url, generator, duration, concurrency, seed=0):
+    """Drive one scenario; returns latency summary, throughput and status codes"""
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    samples = []
+    statuses = Counter()
+
+    def client(index):
+        rng = random.Random(seed + index)
+        local_samples = []
+        local_statuses = Counter()
+        while time.perf_counter() < deadline:
+            method, path, body = generator(rng)
+            start = time.perf_counter()
+            try:
+                status, _ = _request(base_url, method, path, body)
+            except Exception:
+                status = 'connection_error'
+            local_samples.append(time.perf_counter() - start)
+            local_statuses[str(status)] += 1
+        with lock:
+            samples.extend(local_samples)
+            statuses.update(local_statuses)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize_timings(samples)
+    result['throughput_rps'] = round(len(samples) / elapsed, 2) if elapsed else 0
+    result['status_codes'] = dict(statuses)
+    result['errors'] = sum(count for code, count in statuses.items() if not code.startswith('2'))
+    result['concurrency'] = concurrency
+    result['duration_s'] = round(elapsed, 2)
+    return result
+
+
+def start_local_server(database_uri):
+    """Serve the app in-process on a free port, backed by a seeded stand-in database"""
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from bench.standin import seed, sqlite_engine_options
+
+    seed(database_uri)
+    config = {'SQLALCHEMY_DATABASE_URI': database_uri}
+    if database_uri.startswith('sqlite'):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options()
+    app = create_app(config)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='target an already running server')
+    parser.add_argument('--database', default=None, help='SQLAlchemy URL for the in-process stand-in')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated scenario names')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per scenario')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--output', default=None, help='results JSON path')
+    parser.add_argument('--baseline', default=None, help='compare against this baseline JSON')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed regression in percent')
+    args = parser.parse_args(argv)
+
+    enter_backend_dir()
+    quiet()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        database = args.database or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+        server, base_url = start_local_server(database)
+    base_url = base_url.rstrip('/')
+
+    try:
+        generators = build_generators(discover_combos(base_url))
+        results = {}
+        for name in args.scenarios.split(','):
+            name = name.strip()
+            if name not in generators:
+                parser.error(f"unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+            print(f'Running {name} for {args.duration}s with {args.concurrency} clients...')
+            results[name] = run_scenario(base_url, generators[name], args.duration, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print_table(results, key='p95_ms')
+    for name, stats in results.items():
+        print(f"  {name}: {stats['throughput_rps']} req/s, {stats['errors']} errors {stats['status_codes']}")
+    path = write_results('load', results, args.output)
+    print(f'\nResults written to {path}')
+
+    if args.baseline:
+        from bench.compare import compare_files
+        return 1 if compare_files(path, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Microbenchmarks for the prediction and analytics hot paths.
+
+    python -m bench.micro [--repeat 200] [--filter predict] [--baseline bench/baseline.json]
+
+Covers input resolution, feature building, encoder lookup, transform +
+predict and the shared prediction core (single and batched) for every loaded
+commodity, the forest quantile pass, volatility/statistics, the synthetic
+trend generators and crop recommendation (one sample and a 256-sample batch).
+"""
+import argparse
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from bench.common import enter_backend_dir, print_table, quiet, time_call, write_results
+
+
+def _sample_inputs(app_module, commodity):
+    """A (district key, district info, market id) the commodity's encoder knows, or None"""
+    known = set(app_module.COMMODITY_DISTRICTS.get(commodity, []))
+    for district_key, info in app_module.DISTRICT_TO_MARKETS.items():
+        if info['district_name'] in known:
+            return district_key, info, info['markets'][0].lower().replace(' ', '_')
+    return None
+
+
+def build_cases(app_module):
+    """Name -> zero-argument callable for every microbenchmark"""
+    import price_series
+    import price_stats
+    from ensemble import predict_with_quantiles
+
+    cases = {}
+    now = datetime.now()
+
+    for commodity in app_module.available_commodities:
+        model_data = app_module.COMMODITY_MODELS[commodity]
+        config = app_module.COMMODITY_CONFIG[commodity]
+        sample = _sample_inputs(app_module, commodity)
+        if sample is None:
+            continue
+        district_key, district_info, market = sample
+
+        predictor = app_module.PREDICTOR
+        resolved = predictor.resolve(commodity, district_key, market)
+        features = predictor.build_features([resolved], [now])
+        rows = [{'commodity': commodity, 'district': district_key, 'market': market}] * 64
+        prepared = model_data['preprocessor'].transform(features) if model_data['preprocessor'] else features
+        batch = np.repeat(features, 64, axis=0)
+
+        def transform_predict(model_data=model_data, features=features):
+            prepared = model_data['preprocessor'].transform(features) if model_data['preprocessor'] else features
+            model_data['model'].predict(prepared)
+
+        def transform_predict_batch(model_data=model_data, batch=batch):
+            prepared = model_data['preprocessor'].transform(batch) if model_data['preprocessor'] else batch
+            model_data['model'].predict(prepared)
+
+        def predict_uncached(commodity=commodity, district_key=district_key, market=market):
+            app_module.PREDICTION_CACHE.invalidate(commodity)
+            app_module.PREDICTOR.predict_one(commodity, district_key, market, now)
+
+        def predict_rows_uncached(commodity=commodity, rows=rows):
+            app_module.PREDICTION_CACHE.invalidate(commodity)
+            app_module.PREDICTOR.predict_rows(rows, now)
+
+        cases[f'resolve/{commodity}'] = (
+            lambda c=commodity, d=district_key, m=market: predictor.resolve(c, d, m)
+        )
+        cases[f'feature_build/{commodity}'] = lambda resolved=resolved: predictor.build_features([resolved], [now])
+        cases[f'encoder_lookup/{commodity}'] = (
+            lambda enc=model_data['district_encoder'], name=district_info['district_name']: enc.transform([name])
+        )
+        cases[f'transform_predict/{commodity}'] = transform_predict
+        cases[f'transform_predict_x64/{commodity}'] = transform_predict_batch
+        cases[f'predict_quantiles/{commodity}'] = (
+            lambda model=model_data['model'], X=prepared: predict_with_quantiles(model, X)
+        )
+        cases[f'predict_one/{commodity}'] = predict_uncached
+        cases[f'predict_one_cached/{commodity}'] = (
+            lambda c=commodity, d=district_key, m=market: app_module.PREDICTOR.predict_one(c, d, m, now)
+        )
+        cases[f'predict_rows_x64/{commodity}'] = predict_rows_uncached
+
+    rng = np.random.default_rng(0)
+    prices_30 = list(rng.uniform(2000, 3000, 30))
+    prices_365 = list(rng.uniform(2000, 3000, 365))
+    batch_365 = rng.uniform(2000, 3000, (len(app_module.COMMODITY_CONFIG) * 20, 365))
+    config = app_module.COMMODITY_CONFIG['wheat']
+    today = now.date()
+
+    cases['volatility/30'] = lambda: price_stats.volatility(prices_30, log=False)
+    cases['volatility/365'] = lambda: price_stats.volatility(prices_365, log=False)
+    cases['price_stats_summarize/batch_300x365'] = lambda: price_stats.summarize(batch_365)
+    cases['generate_series/365'] = lambda: price_series.generate_series('wheat', 'pune', 365, today)
+    cases['generate_price_trend/30'] = lambda: app_module.generate_price_trend('wheat', 'pune', config)
+    cases['generate_extended_trend/30'] = lambda: app_module.generate_extended_trend('wheat', 'pune', config, 30)
+    cases['generate_extended_trend/365'] = lambda: app_module.generate_extended_trend('wheat', 'pune', config, 365)
+    cases['generate_actual_price_sources'] = (
+        lambda: app_module.generate_actual_price_sources('wheat', 'pune', config)
+    )
+
+    recommender = app_module.CROP_RECOMMENDER
+    if recommender.available:
+        soil = np.column_stack([
+            rng.uniform(0, 140, 256), rng.uniform(5, 145, 256), rng.uniform(5, 205, 256),
+            rng.uniform(8, 44, 256), rng.uniform(14, 100, 256), rng.uniform(3.5, 10, 256),
+            rng.uniform(20, 300, 256)
+        ])
+        cases['crop_recommend/1'] = lambda X=soil[:1]: recommender.recommend(X)
+        cases['crop_recommend/x256'] = lambda X=soil: recommender.recommend(X)
+
+    return cases
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=100, help='timed calls per case')
+    parser.add_argument('--filter', default=None, help='only run cases containing this text')
+    parser.add_argument('--output', default=None, help='results JSON path')
+    parser.add_argument('--baseline', default=None, help='compare against this baseline JSON')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed regression in percent')
+    args = parser.parse_args(argv)
+
+    enter_backend_dir()
+    quiet()
+    import app as app_module
+
+    app_module.load_commodity_models()
+    app_module.load_crop_model()
+    cases = build_cases(app_module)
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    results = {}
+    for name, fn in cases.items():
+        try:
+            results[name] = time_call(fn, repeat=args.repeat)
+        except Exception as e:
+            results[name] = {'error': str(e)}
+
+    print_table(results)
+    path = write_results('micro', results, args.output)
+    print(f'\nResults written to {path}')
+
+    if args.baseline:
+        from bench.compare import compare_files
+        return 1 if compare_files(path, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
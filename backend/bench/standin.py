@@ -0,0 +1,134 @@
+"""
+Local database stand-in for benchmarks and testing.
+
+Creates the farmers/products tables the marketplace endpoints query, in
+SQLite (default) or any SQLAlchemy URL such as a MySQL container, and seeds
+them with synthetic rows.
+"""
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+SQLITE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS farmers (
+        farmer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        phone VARCHAR(20) NOT NULL UNIQUE,
+        district VARCHAR(100) NOT NULL,
+        taluka VARCHAR(100),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        farmer_id INTEGER NOT NULL REFERENCES farmers(farmer_id),
+        crop_name VARCHAR(100) NOT NULL,
+        crop_type VARCHAR(100),
+        district VARCHAR(100) NOT NULL,
+        market VARCHAR(100),
+        quantity FLOAT NOT NULL,
+        unit VARCHAR(20),
+        expected_price DECIMAL(10, 2) NOT NULL,
+        image_url VARCHAR(255),
+        harvest_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+]
+
+MYSQL_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS farmers (
+        farmer_id INT AUTO_INCREMENT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        phone VARCHAR(20) NOT NULL UNIQUE,
+        district VARCHAR(100) NOT NULL,
+        taluka VARCHAR(100),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        product_id INT AUTO_INCREMENT PRIMARY KEY,
+        farmer_id INT NOT NULL,
+        crop_name VARCHAR(100) NOT NULL,
+        crop_type VARCHAR(100),
+        district VARCHAR(100) NOT NULL,
+        market VARCHAR(100),
+        quantity FLOAT NOT NULL,
+        unit VARCHAR(20),
+        expected_price DECIMAL(10, 2) NOT NULL,
+        image_url VARCHAR(255),
+        harvest_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (farmer_id) REFERENCES farmers(farmer_id)
+    )
+    """
+]
+
+CROPS = ['Wheat', 'Rice', 'Onion', 'Tomato', 'Cotton', 'Bajra', 'Jowar', 'Grapes']
+DISTRICTS = ['Pune', 'Nashik', 'Nagpur', 'Kolhapur', 'Aurangabad', 'Solapur']
+
+
+def sqlite_engine_options():
+    """Engine options so SQLite returns datetime/date objects like MySQL does"""
+    return {'connect_args': {'detect_types': sqlite3.PARSE_DECLTYPES, 'check_same_thread': False}}
+
+
+def create_schema(database_uri):
+    engine = create_engine(database_uri, **(sqlite_engine_options() if database_uri.startswith('sqlite') else {}))
+    schema = SQLITE_SCHEMA if engine.dialect.name == 'sqlite' else MYSQL_SCHEMA
+    with engine.begin() as conn:
+        for statement in schema:
+            conn.execute(text(statement))
+    return engine
+
+
+def seed(database_uri, farmers=200, products_per_farmer=5, seed_value=0):
+    """Create the schema and fill it with synthetic farmers and products"""
+    rng = random.Random(seed_value)
+    engine = create_schema(database_uri)
+    now = datetime.now().replace(microsecond=0)
+
+    with engine.begin() as conn:
+        existing = conn.execute(text('SELECT COUNT(*) FROM farmers')).scalar()
+        if existing:
+            return engine
+
+        farmer_rows = [{
+            'name': f'Farmer {i}',
+            'phone': f'9{i:09d}',
+            'district': rng.choice(DISTRICTS),
+            'taluka': None,
+            'created_at': now - timedelta(days=rng.randint(0, 365))
+        } for i in range(1, farmers + 1)]
+        conn.execute(text(
+            'INSERT INTO farmers (name, phone, district, taluka, created_at) '
+            'VALUES (:name, :phone, :district, :taluka, :created_at)'
+        ), farmer_rows)
+
+        product_rows = [{
+            'farmer_id': farmer_id,
+            'crop_name': rng.choice(CROPS),
+            'crop_type': 'Grain',
+            'district': rng.choice(DISTRICTS),
+            'market': None,
+            'quantity': round(rng.uniform(1, 100), 1),
+            'unit': 'Quintal',
+            'expected_price': round(rng.uniform(1500, 8000), 2),
+            'image_url': None,
+            'harvest_date': (now - timedelta(days=rng.randint(0, 60))).date(),
+            'created_at': now - timedelta(minutes=rng.randint(0, 100000))
+        } for farmer_id in range(1, farmers + 1) for _ in range(products_per_farmer)]
+        conn.execute(text(
+            'INSERT INTO products (farmer_id, crop_name, crop_type, district, market, quantity, unit, '
+            'expected_price, image_url, harvest_date, created_at) VALUES (:farmer_id, :crop_name, '
+            ':crop_type, :district, :market, :quantity, :unit, :expected_price, :image_url, '
+            ':harvest_date, :created_at)'
+        ), product_rows)
+
+    return engine
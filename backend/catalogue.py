@@ -0,0 +1,127 @@
+"""
+Message catalogue for the multilingual endpoints.
+
+The source of truth is the React app's ``api`` namespace
+(frontend/src/locales/<lang>/api.json), so the UI and the API share one set
+of translations. At startup every language is compiled into a flat
+``{"messages.predictedPrice": template}`` table; templates use the i18next
+``{{name}}`` placeholder syntax and are pre-split so formatting is a join.
+
+    CATALOGUE.text('accuracy.high', 'hi')                        -> 'उच्च'
+    CATALOGUE.message('messages.districtNotFound', district='x') -> {'en': ..., 'hi': ..., 'mr': ...}
+    CATALOGUE.message('messages.predictedPrice',
+                      commodity=Term('commodities.rice'), ...)   -> commodity localized per language
+"""
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ('en', 'hi', 'mr')
+DEFAULT_LANGUAGE = 'en'
+NAMESPACE = 'api'
+LOCALES_DIR = os.environ.get(
+    'MANDINETRA_LOCALES_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend', 'src', 'locales')
+)
+
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+class Term:
+    """A template parameter that is itself looked up in the catalogue per language"""
+    __slots__ = ('key', 'default')
+
+    def __init__(self, key, default=None):
+        self.key = key
+        self.default = default
+
+
+class Template:
+    """A compiled message: literal chunks interleaved with parameter names"""
+    __slots__ = ('parts', 'fields')
+
+    def __init__(self, text):
+        self.parts = _PLACEHOLDER.split(text)
+        self.fields = tuple(self.parts[1::2])
+
+    def render(self, params):
+        if not self.fields:
+            return self.parts[0]
+        parts = list(self.parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = str(params.get(parts[i], '{{' + parts[i] + '}}'))
+        return ''.join(parts)
+
+
+def _flatten(tree, prefix=''):
+    for key, value in tree.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, path + '.')
+        else:
+            yield path, str(value)
+
+
+class Catalogue:
+    """Per-language tables of compiled templates; loads lazily on first use"""
+
+    def __init__(self, locales_dir=LOCALES_DIR, languages=LANGUAGES):
+        self.locales_dir = locales_dir
+        self.languages = tuple(languages)
+        self._tables = None
+        self._static = {}
+        self._lock = threading.RLock()
+
+    def load(self):
+        """(Re)compile every language from the locale files"""
+        tables = {}
+        for language in self.languages:
+            path = os.path.join(self.locales_dir, language, f'{NAMESPACE}.json')
+            try:
+                with open(path, encoding='utf-8') as f:
+                    tables[language] = {key: Template(text) for key, text in _flatten(json.load(f))}
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Message catalogue for '{language}' not loaded from {path}: {str(e)}")
+                tables[language] = {}
+        with self._lock:
+            self._tables = tables
+            self._static = {}
+        logger.info(f"🌐 Message catalogue loaded: {', '.join(f'{lang}={len(t)}' for lang, t in tables.items())}")
+        return self
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self.load()
+        return self._tables
+
+    def _template(self, key, language):
+        tables = self.tables
+        return tables.get(language, {}).get(key) or tables.get(DEFAULT_LANGUAGE, {}).get(key)
+
+    def text(self, key, language=DEFAULT_LANGUAGE, default=None, **params):
+        """Message for one language; falls back to English, then ``default``, then the key"""
+        template = self._template(key, language)
+        if template is None:
+            return default if default is not None else key
+        if params:
+            params = {
+                name: (self.text(value.key, language, value.default) if isinstance(value, Term) else value)
+                for name, value in params.items()
+            }
+        return template.render(params)
+
+    def message(self, key, **params):
+        """The message in every language, as returned to the React app"""
+        if not params:
+            cached = self._static.get(key)
+            if cached is None:
+                cached = self._static[key] = {language: self.text(key, language) for language in self.languages}
+            return dict(cached)
+        return {language: self.text(key, language, **params) for language in self.languages}
@@ -0,0 +1,28 @@
+"""
+Content hashes of files on disk: model artifacts, training inputs, price dumps.
+
+blake2b with an 8-byte digest, read in 1 MiB chunks so large CSVs and
+pickles are never loaded whole. train.py writes these hashes into
+manifest.json and model_registry.py checks artifacts against them, so
+every caller goes through this module.
+"""
+import hashlib
+
+CHUNK_BYTES = 1 << 20
+
+
+def new_digest():
+    return hashlib.blake2b(digest_size=8)
+
+
+def update_file(digest, path):
+    """Feed a file's bytes into ``digest``; returns it"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest
+
+
+def file_hash(path):
+    """Hex content hash of one file"""
+    return update_file(new_digest(), path).hexdigest()
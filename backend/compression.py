@@ -0,0 +1,109 @@
+"""
+Negotiated response compression.
+
+Responses above COMPRESS_MIN_SIZE bytes with a compressible mimetype are
+encoded with brotli (if the ``brotli`` package is installed and the client
+accepts ``br``) or gzip, following the client's Accept-Encoding q-values.
+Trend, analytics and marketplace payloads are repetitive JSON and shrink
+by 80-90%, which matters on slow mobile links.
+"""
+import gzip
+
+from flask import current_app, request
+
+from metrics import timer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_CONFIG = {
+    'COMPRESS_MIN_SIZE': 1024,
+    'COMPRESS_GZIP_LEVEL': 6,
+    'COMPRESS_BROTLI_QUALITY': 4,
+    'COMPRESS_MIMETYPES': (
+        'application/json', 'text/html', 'text/plain', 'text/css',
+        'text/csv', 'application/javascript'
+    )
+}
+
+
+def available_encodings():
+    """Encodings this server can produce, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding from the client's Accept-Encoding, or None"""
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def negotiate(data, mimetype, variants, accept_encodings=None, config=None):
+    """
+    Pick the encoding for an already rendered body and return
+    (encoding or None, body). Compressed bodies are memoized in ``variants``
+    so cached responses are only compressed once per encoding. Outside a
+    request context pass the parsed Accept-Encoding and the app config.
+    """
+    config = config if config is not None else current_app.config
+    if mimetype not in config['COMPRESS_MIMETYPES'] or len(data) < config['COMPRESS_MIN_SIZE']:
+        return None, data
+    encoding = choose_encoding(accept_encodings if accept_encodings is not None else request.accept_encodings)
+    if encoding is None:
+        return None, data
+    if encoding not in variants:
+        with timer('compress'):
+            variants[encoding] = compress(data, encoding, config)
+    return encoding, variants[encoding]
+
+
+def _should_compress(response, config):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return False
+    return response.content_length is not None and response.content_length >= config['COMPRESS_MIN_SIZE']
+
+
+def _after_request(response):
+    config = current_app.config
+    if not _should_compress(response, config):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    with timer('compress'):
+        body = compress(response.get_data(), encoding, config)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # A compressed body is a different representation of the resource
+        etag, weak = response.get_etag()
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+    return response
+
+
+def init_app(app):
+    """Install the compression hook; register after metrics so it is timed"""
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+    app.after_request(_after_request)
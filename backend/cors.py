@@ -0,0 +1,55 @@
+"""
+Cross-origin policy for the React frontend (CORS_ORIGINS).
+
+flask_cors adds the headers to Flask responses and answers preflight
+OPTIONS requests. The ASGI handlers (asgi.ReadTier,
+marketplace_async.MarketplaceApp, price_stream.StreamApp) answer without
+Flask's after_request hooks, so they add the same headers with
+``apply``, computed by flask_cors from the same options; OPTIONS requests
+fall through them to Flask. Responses carrying an allowed origin get
+``Vary: Origin`` on both paths so shared caches keep one origin's response
+away from another.
+"""
+from flask_cors import CORS
+from flask_cors.core import get_cors_headers, get_cors_options
+from werkzeug.datastructures import Headers
+
+
+def _vary_origin(response):
+    if 'Access-Control-Allow-Origin' in response.headers:
+        response.vary.add('Origin')
+    return response
+
+
+def apply(flask_app, request_headers, method, response_headers):
+    """
+    ``response_headers`` (list of lower-case (name, value) str pairs) plus the
+    CORS headers for a request with ``request_headers`` (name -> value).
+    """
+    options = flask_app.extensions.get('cors_options')
+    if options is None:
+        return response_headers
+    cors_headers = get_cors_headers(options, Headers(request_headers), method)
+    if not cors_headers:
+        return response_headers
+
+    headers = list(response_headers)
+    for name, value in cors_headers.items(multi=True):
+        if name.lower() != 'vary':
+            headers.append((name.lower(), str(value)))
+    for i, (name, value) in enumerate(headers):
+        if name == 'vary':
+            if 'origin' not in value.lower():
+                headers[i] = (name, f'{value}, Origin')
+            break
+    else:
+        headers.append(('vary', 'Origin'))
+    return headers
+
+
+def init_app(app):
+    options = {'origins': app.config['CORS_ORIGINS']}
+    # Registered first so it runs after flask_cors has set the origin
+    app.after_request(_vary_origin)
+    CORS(app, **options)
+    app.extensions['cors_options'] = get_cors_options(app, options)
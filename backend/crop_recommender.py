@@ -0,0 +1,244 @@
+"""
+Crop recommendation from soil and climate readings.
+
+Inputs are scored as a NumPy matrix (one row per soil sample, columns in
+FEATURE_NAMES) with a single ``predict_proba`` pass. The predicted crop is
+the argmax (what ``RandomForestClassifier.predict`` returns), the top-k
+come from ``argpartition`` and class indices map to crop names through a
+label array built once at load time.
+
+Soil reports repeat heavily (a few lab kits and weather stations serve
+whole villages), so inputs are quantized to CROP_CACHE_PRECISION (a step
+per feature; 0 keeps the exact value) and class probabilities are cached
+per quantized vector in an LRU. Identical samples within a batch are
+scored once. The model is scored on the quantized values, so a cached and
+a fresh answer for the same report never differ. The cache is dropped
+when the model artifact changes on disk (checked every
+CROP_MODEL_CHECK_INTERVAL seconds), and the new model is loaded.
+
+    CROP_RECOMMENDER.recommend([[90, 42, 43, 20.8, 82.0, 6.5, 202.9]], k=3)
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from prediction_cache import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+FEATURE_NAMES = ('N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall')
+
+
+def parse_precision(text):
+    """'N=1,ph=0.05' -> {'N': 1.0, 'ph': 0.05}"""
+    precision = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, step = item.partition('=')
+        precision[name.strip()] = float(step)
+    return precision
+
+
+DEFAULT_CONFIG = {
+    # Quantization step per feature: kg/ha nutrients to 1, °C/%/mm to 0.1, pH to 0.01
+    'CROP_CACHE_PRECISION': {
+        'N': 1.0, 'P': 1.0, 'K': 1.0, 'temperature': 0.1, 'humidity': 0.1, 'ph': 0.01, 'rainfall': 0.1,
+        **parse_precision(os.environ.get('CROP_CACHE_PRECISION', ''))
+    },
+    'CROP_CACHE_SIZE': int(os.environ.get('CROP_CACHE_SIZE', '8192')),
+    'CROP_MODEL_CHECK_INTERVAL': float(os.environ.get('CROP_MODEL_CHECK_INTERVAL', '30'))
+}
+
+# The artifact has lived in both places; CROP_MODEL_PATH overrides
+MODEL_PATHS = (
+    './crop_recommend/modules/crop_recommendation_model.pkl',
+    './crop_recommendation_model.pkl'
+)
+
+
+class CropRecommender:
+    """Loaded crop model plus the label lookup used to decode its probabilities"""
+
+    def __init__(self, precision=None, cache_size=DEFAULT_CONFIG['CROP_CACHE_SIZE'],
+                 check_interval=DEFAULT_CONFIG['CROP_MODEL_CHECK_INTERVAL']):
+        self.model = None
+        self.labels = None
+        self.feature_names = FEATURE_NAMES
+        self.path = None
+        self.precision = dict(DEFAULT_CONFIG['CROP_CACHE_PRECISION'] if precision is None else precision)
+        self.cache = PredictionCache(cache_size, name='crop') if cache_size > 0 else None
+        self.check_interval = check_interval
+        # (model, labels, version) swapped as one tuple so scoring never mixes versions
+        self._scoring = None
+        self._steps = None
+        self._fingerprint = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return self._scoring is not None
+
+    def load(self, model_path=None):
+        """Load the pickled {'model', 'label_encoder', 'feature_names'} artifact; returns success"""
+        candidates = [model_path] if model_path else [os.environ.get('CROP_MODEL_PATH'), *MODEL_PATHS]
+        errors = []
+        for path in filter(None, candidates):
+            try:
+                fingerprint = _fingerprint(path)
+                with open(path, 'rb') as f:
+                    artifact = pickle.load(f)
+                model, labels, feature_names = self._prepare(artifact)
+            except Exception as e:
+                errors.append(f'{path}: {str(e)}')
+                continue
+            with self._lock:
+                self.model, self.labels, self.feature_names, self.path = model, labels, feature_names, path
+                self._steps = np.array([self.precision.get(name, 0.0) for name in feature_names], dtype=float)
+                self._fingerprint = fingerprint
+                self._scoring = (model, labels, fingerprint)
+                if self.cache is not None:
+                    self.cache.invalidate()
+            logger.info(f"✅ Crop recommendation model loaded successfully from {path}")
+            return True
+
+        with self._lock:
+            self.model, self.labels, self.feature_names, self.path = None, None, FEATURE_NAMES, None
+            self._scoring = None
+            if self.cache is not None:
+                self.cache.invalidate()
+        logger.warning(f"⚠️ Crop recommendation model not loaded: {'; '.join(errors)}")
+        return False
+
+    @staticmethod
+    def _prepare(artifact):
+        model = artifact['model']
+        feature_names = tuple(artifact.get('feature_names', FEATURE_NAMES))
+        # Column i of predict_proba is class model.classes_[i]; decode once
+        labels = np.asarray(artifact['label_encoder'].inverse_transform(model.classes_), dtype=object)
+
+        fitted_names = getattr(model, 'feature_names_in_', None)
+        if fitted_names is not None:
+            if tuple(fitted_names) != feature_names:
+                raise ValueError(f'model features {list(fitted_names)} != {list(feature_names)}')
+            # Columns are validated here, so score plain arrays without a DataFrame per call
+            del model.feature_names_in_
+        return model, labels, feature_names
+
+    def matrix(self, samples):
+        """
+        (n, n_features) float matrix from a list of rows or of dicts keyed by
+        feature name. Raises ValueError naming the first bad sample.
+        """
+        if not isinstance(samples, (list, tuple)) or not samples:
+            raise ValueError('samples must be a non-empty list')
+        names = self.feature_names
+        X = np.empty((len(samples), len(names)))
+        for i, sample in enumerate(samples):
+            try:
+                if isinstance(sample, dict):
+                    X[i] = [float(sample[name]) for name in names]
+                else:
+                    if len(sample) != len(names):
+                        raise ValueError(f'expected {len(names)} values')
+                    X[i] = [float(value) for value in sample]
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f'sample {i}: {e.__class__.__name__} {str(e)}') from None
+        if not np.isfinite(X).all():
+            raise ValueError('samples must be finite numbers')
+        return X
+
+    def init_app(self, app):
+        """Apply the cache configuration from app.config"""
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        with self._lock:
+            self.precision = dict(app.config['CROP_CACHE_PRECISION'])
+            self._steps = np.array([self.precision.get(name, 0.0) for name in self.feature_names], dtype=float)
+            size = app.config['CROP_CACHE_SIZE']
+            self.cache = PredictionCache(size, name='crop') if size > 0 else None
+            self.check_interval = app.config['CROP_MODEL_CHECK_INTERVAL']
+
+    def _check_artifact(self):
+        """Reload the model if its artifact changed (at most every check_interval seconds)"""
+        if self.path is None or self.check_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        try:
+            changed = _fingerprint(self.path) != self._fingerprint
+        except OSError:
+            return
+        if changed:
+            logger.info(f"🔄 Crop model artifact {self.path} changed, reloading")
+            self.load(self.path)
+
+    def quantize(self, X):
+        """Round each feature to its cache precision (steps of 0 keep the exact value)"""
+        X = np.asarray(X, dtype=float)
+        steps = self._steps
+        if steps is None or not steps.any():
+            return X
+        exact = steps == 0
+        quantized = np.round(X / np.where(exact, 1.0, steps)) * steps
+        return np.where(exact, X, quantized)
+
+    def _probabilities(self, model, version, X):
+        """predict_proba over the distinct rows of X that are not cached"""
+        if self.cache is None:
+            with metrics.timer('crop_predict'):
+                return model.predict_proba(X)
+
+        unique, inverse = (X, np.arange(1)) if len(X) == 1 else np.unique(X, axis=0, return_inverse=True)
+        keys = [(version, row.tobytes()) for row in unique]
+        probabilities = np.empty((len(unique), len(model.classes_)))
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                probabilities[i] = cached
+        if missing:
+            with metrics.timer('crop_predict'):
+                computed = model.predict_proba(unique[missing])
+            probabilities[missing] = computed
+            for i, row in zip(missing, computed):
+                self.cache.put(keys[i], row)
+        return probabilities[np.asarray(inverse).reshape(-1)]
+
+    def recommend(self, X, k=3):
+        """
+        Score a feature matrix. Returns {'predicted': (n,) labels,
+        'top_labels': (n, k) labels, 'top_probabilities': (n, k)}, top-k
+        ordered by decreasing probability.
+        """
+        self._check_artifact()
+        scoring = self._scoring
+        if scoring is None:
+            raise RuntimeError('Crop recommendation model not available')
+        model, labels, version = scoring
+        probabilities = self._probabilities(model, version, self.quantize(X))
+
+        k = max(1, min(k, probabilities.shape[1]))
+        rows = np.arange(probabilities.shape[0])[:, None]
+        top = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+        top.sort(axis=1)  # Ties rank by class index, like argmax
+        order = np.argsort(-probabilities[rows, top], axis=1, kind='stable')
+        top = top[rows, order]
+        return {
+            'predicted': labels[probabilities.argmax(axis=1)],
+            'top_labels': labels[top],
+            'top_probabilities': probabilities[rows, top]
+        }
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
@@ -0,0 +1,79 @@
+"""
+Prediction intervals from tree ensembles.
+
+A RandomForest's per-tree predictions form an empirical distribution of the
+price. ``predict_with_quantiles`` gets every tree's leaf for every row with a
+single ``model.apply`` call and gathers the leaf values from a precomputed
+(n_trees, max_nodes) table, so the point estimate and the quantiles come from
+the same pass instead of a second model run.
+
+Memory-mapped forests (forest_store.FlatForest) compute their per-tree
+predictions directly and are used through the same functions.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+
+# model -> (n_trees, max_nodes) leaf value table
+_LEAF_TABLES = weakref.WeakKeyDictionary()
+_LEAF_TABLES_LOCK = threading.Lock()
+
+
+def supports_quantiles(model):
+    """True for fitted single-output tree ensembles (RandomForest, ExtraTrees, FlatForest)"""
+    if callable(getattr(model, 'tree_predictions', None)):
+        return True
+    estimators = getattr(model, 'estimators_', None)
+    # GradientBoosting keeps a 2-D ndarray of trees, which has no truth value
+    if estimators is None or len(estimators) == 0 or not hasattr(model, 'apply'):
+        return False
+    tree = getattr(estimators[0], 'tree_', None)
+    return tree is not None and tree.value.shape[1] == 1
+
+
+def leaf_value_table(model):
+    """Padded table of every tree's node values, built once per model object"""
+    table = _LEAF_TABLES.get(model)
+    if table is None:
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        max_nodes = max(tree.node_count for tree in trees)
+        table = np.zeros((len(trees), max_nodes))
+        for i, tree in enumerate(trees):
+            table[i, :tree.node_count] = tree.value[:, 0, 0]
+        with _LEAF_TABLES_LOCK:
+            _LEAF_TABLES[model] = table
+    return table
+
+
+def tree_predictions(model, X):
+    """Per-tree predictions, shape (n_rows, n_trees)"""
+    if callable(getattr(model, 'tree_predictions', None)):
+        return model.tree_predictions(X)
+    leaves = model.apply(X)  # (n_rows, n_trees)
+    table = leaf_value_table(model)
+    return table[np.arange(table.shape[0]), leaves]
+
+
+def predict_with_quantiles(model, X, quantiles=DEFAULT_QUANTILES):
+    """
+    Point estimate and quantiles for each row of ``X``.
+
+    Returns ``(point, q)`` where ``point`` has shape (n_rows,) and ``q`` has
+    shape (n_rows, len(quantiles)). For models that are not tree ensembles
+    ``q`` is None and ``point`` is ``model.predict(X)``.
+    """
+    if not supports_quantiles(model):
+        return np.asarray(model.predict(X), dtype=float), None
+
+    per_tree = tree_predictions(model, X)
+    point = per_tree.mean(axis=1)  # Same as RandomForestRegressor.predict
+    q = np.quantile(per_tree, quantiles, axis=1).T
+    return point, q
+
+
+def quantile_labels(quantiles=DEFAULT_QUANTILES):
+    """Response keys for quantiles, e.g. 0.1 -> 'p10'"""
+    return [f"p{int(round(q * 100))}" for q in quantiles]
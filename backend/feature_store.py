@@ -0,0 +1,259 @@
+"""
+Live market features for the prediction core.
+
+The commodity models were trained on each row's observed ``p_min``/``p_max``,
+but serving used the static COMMODITY_CONFIG defaults. The feature store
+keeps the latest observed prices and rolling lags of the modal price for
+every (commodity, market) and (commodity, district) series:
+
+    p_min, p_max, p_modal    latest day's prices (mean over varieties)
+    lag_1 .. lag_3           previous days' modal prices
+    mean_7, mean_30          mean modal price over the last 7 / 30 observed days
+    last_day                 date of the latest observation (days since epoch)
+
+All series live in one float64 matrix (one row per series) plus a
+``(series, WINDOW)`` history of recent modal prices; a dict maps series
+keys to rows, so a lookup is a dict get and a batch is one gather.
+
+It is built from the historical CSVs on first use, updated from
+PRICE_STORE ingestion and persisted to data/index/features.npz; other
+worker processes pick up a newer file on their next lookup.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from predictor import market_key
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('p_min', 'p_max', 'p_modal', 'lag_1', 'lag_2', 'lag_3', 'mean_7', 'mean_30', 'last_day')
+COLUMN = {name: i for i, name in enumerate(COLUMNS)}
+WINDOW = 30
+RELOAD_CHECK_INTERVAL = 5.0
+
+# Observations older than this are ignored at serve time (0 = no limit)
+MAX_AGE_DAYS = int(os.environ.get('FEATURE_MAX_AGE_DAYS', '0'))
+
+
+def series_values(history):
+    """Feature rows from (n, WINDOW) modal price histories (newest last, NaN padded on the left)"""
+    values = np.full((history.shape[0], len(COLUMNS)), np.nan)
+    for lag in range(4):
+        values[:, COLUMN['p_modal'] if lag == 0 else COLUMN[f'lag_{lag}']] = history[:, WINDOW - 1 - lag]
+    with warnings.catch_warnings():
+        # Series with fewer than 7 observations have empty slices
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        values[:, COLUMN['mean_7']] = np.nanmean(history[:, -7:], axis=1)
+        values[:, COLUMN['mean_30']] = np.nanmean(history, axis=1)
+    return values
+
+
+def daily_series(rows):
+    """
+    Collapse rows to one observation per (series key, day): mean prices over
+    varieties. Yields (key, days, p_min, p_max, p_modal) sorted by day, for
+    the market-level and the district-level series.
+    """
+    frame = rows[['date', 'market_name', 'district_name', 'p_min', 'p_max', 'p_modal']].copy()
+    frame['day'] = frame['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+    frame['market'] = frame['market_name'].astype(str).map(market_key)
+    frame['district'] = frame['district_name'].astype(str).str.strip().str.lower()
+    for level in ('market', 'district'):
+        daily = frame.groupby([level, 'day'], sort=True)[['p_min', 'p_max', 'p_modal']].mean()
+        for name, group in daily.groupby(level=0, sort=False):
+            days = group.index.get_level_values('day').to_numpy()
+            yield (level, name), days, group['p_min'].to_numpy(), group['p_max'].to_numpy(), group['p_modal'].to_numpy()
+
+
+class FeatureStore:
+    """Array-backed latest/lag features per (commodity, market|district) series"""
+
+    def __init__(self, path=None, price_store=None, max_age_days=MAX_AGE_DAYS):
+        self.price_store = price_store
+        self.path = path or (os.path.join(price_store.index_dir, 'features.npz') if price_store else None)
+        self.max_age_days = max_age_days
+        self.index = {}
+        self.values = np.empty((0, len(COLUMNS)))
+        self.history = np.empty((0, WINDOW))
+        self.version = 0
+        self._mtime = None
+        self._checked = 0.0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    # ---------- persistence ----------
+
+    def load(self):
+        """Load the persisted store, or build it from the historical CSVs"""
+        with self._lock:
+            self._loaded = True
+            if self.path and os.path.exists(self.path):
+                try:
+                    self._read()
+                    return self
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not read feature store {self.path}, rebuilding: {str(e)}")
+            if self.price_store is not None:
+                self.rebuild()
+        return self
+
+    def _read(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with np.load(self.path, allow_pickle=False) as data:
+            keys = json.loads(str(data['keys']))
+            self.values = data['values']
+            self.history = data['history']
+        self.index = {tuple(key): i for i, key in enumerate(keys)}
+        self._mtime = mtime
+        self.version += 1
+        logger.info(f"📈 Feature store loaded: {len(self.index)} series")
+
+    def save(self):
+        if not self.path:
+            return
+        keys = [None] * len(self.index)
+        for key, i in self.index.items():
+            keys[i] = list(key)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-', suffix='.npz', dir=os.path.dirname(self.path))
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, keys=np.array(json.dumps(keys)), values=self.values, history=self.history)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def rebuild(self):
+        """Recompute every series from the price store's historical CSVs"""
+        from train import COMMODITY_SOURCES
+
+        start = time.perf_counter()
+        with self._lock:
+            self.index = {}
+            self.values = np.empty((0, len(COLUMNS)))
+            self.history = np.empty((0, WINDOW))
+            for commodity in COMMODITY_SOURCES:
+                for chunk in self.price_store._read_history(commodity):
+                    self._apply(commodity, chunk)
+            self.version += 1
+            self.save()
+        logger.info(f"📈 Feature store built: {len(self.index)} series in {time.perf_counter() - start:.2f}s")
+
+    def _refresh(self):
+        """Pick up a store written by another process (checked at most every few seconds)"""
+        if not self._loaded:
+            self.load()
+            return
+        now = time.monotonic()
+        if not self.path or now - self._checked < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            with self._lock:
+                try:
+                    self._read()
+                except Exception as e:
+                    logger.error(f"❌ Could not reload feature store: {str(e)}")
+
+    # ---------- updates ----------
+
+    def _apply(self, commodity, rows):
+        """
+        Fold new observations into the arrays (caller holds the lock).
+        Works on copies and publishes them at the end, so concurrent lookups
+        always see a consistent index/values pair.
+        """
+        index = dict(self.index)
+        updates = []
+        for (level, name), days, p_min, p_max, p_modal in daily_series(rows):
+            key = (commodity, level, name)
+            if key not in index:
+                index[key] = len(index)
+            updates.append((index[key], days, p_min, p_max, p_modal))
+
+        grow = len(index) - len(self.index)
+        values = np.vstack([self.values, np.full((grow, len(COLUMNS)), np.nan)])
+        history = np.vstack([self.history, np.full((grow, WINDOW), np.nan)])
+
+        for i, days, p_min, p_max, p_modal in updates:
+            last_day = values[i, COLUMN['last_day']]
+            newer = days > last_day if not np.isnan(last_day) else np.ones(days.size, bool)
+            if not newer.any():
+                continue
+            recent = np.concatenate([history[i], p_modal[newer]])[-WINDOW:]
+            history[i] = recent
+            values[i] = series_values(recent[None, :])[0]
+            values[i, COLUMN['p_min']] = p_min[newer][-1]
+            values[i, COLUMN['p_max']] = p_max[newer][-1]
+            values[i, COLUMN['last_day']] = days[newer][-1]
+
+        # Values before index: a reader with the new index must find the new rows
+        self.values, self.history = values, history
+        self.index = index
+
+    def update(self, commodity, rows):
+        """Ingestion listener: fold new rows for one commodity in and persist"""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            self._apply(commodity, rows)
+            self.version += 1
+            self.save()
+
+    # ---------- serving ----------
+
+    def lookup(self, commodity, market, district=None, today=None):
+        """
+        Feature row for a market, falling back to its district; None if
+        neither has (recent enough) observations.
+        """
+        self._refresh()
+        index, values = self.index, self.values
+        if self.max_age_days:
+            today = np.datetime64(today or 'today', 'D').astype(np.int64)
+        for key in ((commodity, 'market', market_key(market or '')),
+                    (commodity, 'district', (district or '').strip().lower())):
+            i = index.get(key)
+            if i is None:
+                continue
+            row = values[i]
+            if self.max_age_days and today - row[COLUMN['last_day']] > self.max_age_days:
+                continue
+            return row
+        return None
+
+    def features(self, keys, today=None):
+        """Feature matrix for (commodity, market, district) triples; NaN rows where unknown"""
+        out = np.full((len(keys), len(COLUMNS)), np.nan)
+        for n, (commodity, market, district) in enumerate(keys):
+            row = self.lookup(commodity, market, district, today)
+            if row is not None:
+                out[n] = row
+        return out
+
+    def snapshot(self):
+        """Current (index, values) pair, after picking up a store written by another process"""
+        self._refresh()
+        return self.index, self.values
+
+    @staticmethod
+    def column(name):
+        return COLUMN[name]
+
+    def describe(self, row):
+        """JSON-friendly view of one feature row"""
+        if row is None:
+            return None
+        described = {name: (None if np.isnan(row[i]) else round(float(row[i]), 2)) for i, name in enumerate(COLUMNS[:-1])}
+        described['observed_on'] = str(np.datetime64(int(row[COLUMN['last_day']]), 'D'))
+        return described
@@ -0,0 +1,210 @@
+"""
+Memory-mapped storage for tree-ensemble models.
+
+Unpickling a scikit-learn forest copies every tree into private memory, so
+each gunicorn worker holds its own copy of every commodity model. This
+module exports a fitted single-output forest (RandomForest/ExtraTrees
+regressor) into flat NumPy arrays - all trees' nodes concatenated - saved
+as ``.npy`` files next to the pickle and opened with ``mmap_mode='r'``.
+Every worker then maps the same pages from the OS page cache.
+
+``FlatForest`` predicts straight from those arrays with a vectorized
+traversal (same ``x <= threshold`` rule on float32 inputs as sklearn) and
+exposes ``tree_predictions`` for ensemble.predict_with_quantiles.
+
+    python -m forest_store models/rice_model.pkl     # export ahead of time
+
+Layout: ``<model>.forest/<source hash>/{left,right,feature,threshold,value,roots}.npy``
+plus ``meta.json``; a new pickle gets a new directory, so readers never see
+a partially written export.
+"""
+import json
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from checksums import file_hash
+
+logger = logging.getLogger(__name__)
+
+ARRAYS = ('left', 'right', 'feature', 'threshold', 'value', 'roots')
+FORMAT_VERSION = 1
+
+
+def store_dir(path, digest):
+    return os.path.join(f'{path}.forest', digest)
+
+
+def is_exportable(model):
+    """Fitted single-output forest regressors whose prediction is the mean of the trees"""
+    estimators = getattr(model, 'estimators_', None)
+    # GradientBoosting keeps a 2-D ndarray of trees, which has no truth value
+    if estimators is None or len(estimators) == 0:
+        return False
+    if not hasattr(model, 'apply') or getattr(model, 'n_outputs_', 1) != 1:
+        return False
+    if getattr(model, '_estimator_type', None) != 'regressor':
+        return False
+    return all(getattr(estimator, 'tree_', None) is not None for estimator in estimators)
+
+
+def flatten(model):
+    """Concatenate every tree's nodes into flat arrays (children as global node ids, -1 for leaves)"""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    left, right, feature, threshold, value = [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        is_leaf = tree.children_left == -1
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        value.append(tree.value[:, 0, 0])
+
+    return {
+        'left': np.concatenate(left).astype(np.int64),
+        'right': np.concatenate(right).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': offsets[:-1].astype(np.int64)
+    }
+
+
+def export(model, path, digest=None):
+    """Write the flat arrays for the model pickled at ``path``; returns the store directory"""
+    digest = digest or file_hash(path)
+    final = store_dir(path, digest)
+    if os.path.exists(os.path.join(final, 'meta.json')):
+        return final
+
+    parent = os.path.dirname(final)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        for name, array in flatten(model).items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(array))
+        meta = {
+            'format': FORMAT_VERSION,
+            'source': os.path.basename(path),
+            'source_hash': digest,
+            'model_class': type(model).__name__,
+            'n_trees': len(model.estimators_),
+            'n_features': int(model.n_features_in_)
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.chmod(tmp, 0o755)  # mkdtemp is private; workers may run as another user
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            # Another worker finished the same export first
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Old exports of previous pickles are no longer needed
+    for entry in os.listdir(parent):
+        if entry != digest and not entry.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+    return final
+
+
+class FlatForest:
+    """Read-only forest over memory-mapped flat arrays"""
+
+    _estimator_type = 'regressor'
+
+    def __init__(self, arrays, meta):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.n_features_in_ = meta['n_features']
+        self.n_estimators = meta['n_trees']
+        self.n_outputs_ = 1
+
+    @classmethod
+    def open(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format {meta.get('format')}")
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(arrays, meta)
+
+    def apply(self, X):
+        """Global leaf node id per (row, tree)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f'X has shape {X.shape}, expected (n, {self.n_features_in_})')
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        while True:
+            left = self.left[nodes]
+            internal = left != -1
+            if not internal.any():
+                return nodes
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+
+    def tree_predictions(self, X):
+        """Per-tree predictions, shape (n_rows, n_trees)"""
+        return self.value[self.apply(X)]
+
+    def predict(self, X):
+        return self.tree_predictions(X).mean(axis=1)
+
+
+def load_model(path, loader=None, mmap=True, digest=None):
+    """
+    Load the model pickled at ``path``. Exportable forests are returned as a
+    memory-mapped FlatForest (exporting on first use); anything else, or any
+    failure to export (e.g. a read-only models directory), falls back to the
+    unpickled object. ``loader(f)`` unpickles a file object (default pickle.load);
+    ``digest`` is the file's checksums.file_hash if the caller already has it.
+    """
+    loader = loader or pickle.load
+    if mmap:
+        digest = digest or file_hash(path)
+        directory = store_dir(path, digest)
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            try:
+                return FlatForest.open(directory)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not map {directory}, unpickling instead: {str(e)}")
+
+    with open(path, 'rb') as f:
+        model = loader(f)
+
+    if mmap and is_exportable(model):
+        try:
+            return FlatForest.open(export(model, path, digest))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not export {path} for memory mapping: {str(e)}")
+    return model
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__)
+        return 2
+    for path in argv:
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        if not is_exportable(model):
+            print(f'{path}: {type(model).__name__} is not a single-output forest, skipped')
+            continue
+        print(f'{path} -> {export(model, path)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Gunicorn configuration for the MandiNetra API.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Models are loaded once in the master (preload_app) and shared copy-on-write
+by the forked workers. Every setting can be tuned from the environment:
+
+    MANDINETRA_BIND             address to bind (default 0.0.0.0:5000)
+    WEB_CONCURRENCY             worker processes (default 2 * CPUs + 1)
+    GUNICORN_THREADS            threads per worker (default 4)
+    GUNICORN_TIMEOUT            worker timeout in seconds (default 60)
+    GUNICORN_GRACEFUL_TIMEOUT   seconds to finish in-flight requests (default 30)
+    GUNICORN_MAX_REQUESTS       recycle workers after N requests (default 0, off)
+
+Graceful reload: `kill -HUP <master>` restarts workers after they finish their
+in-flight requests. Because the app is preloaded, picking up new code needs a
+binary upgrade instead: `kill -USR2 <master>`, then `kill -QUIT <old master>`.
+"""
+import gc
+import multiprocessing
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('MANDINETRA_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Freeze the preloaded heap so the GC doesn't dirty shared pages after fork"""
+    gc.freeze()
+    server.log.info(f"Models preloaded; starting {workers} workers x {threads} threads")
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master"""
+    from wsgi import application
+    from app import db
+
+    with application.app_context():
+        db.engine.dispose()
@@ -0,0 +1,609 @@
+"""
+Incremental ingestion of daily Agmarknet-style price dumps.
+
+Dumps use the same schema as the historical CSVs in data/
+(``t,cmdty,market_id,market_name,...,variety,p_min,p_max,p_modal``) and may
+mix commodities. Each new file is read in chunks; rows are routed to their
+commodity, deduplicated on (date, market_id, variety) against an
+append-only key index, appended to the commodity's ingested partition
+(data/ingested/<commodity>.csv, ISO dates; the tracked CSVs are never
+written) and folded into per-(commodity, market) summary aggregates
+without rescanning the history. History readers and ``python -m train``
+read the tracked CSV followed by the partition.
+
+Dump dates are ISO or dd-mm-yyyy. Slash dates are only accepted where day
+and month can't be confused (03/04/2025 is rejected, 13/04/2025 is
+13 April) unless the source's format is given (INGEST_DATE_FORMAT,
+``--date-format``).
+
+Index state lives in data/index/:
+    <commodity>.keys     append-only uint64 row keys (built from the CSVs on first use)
+    state.json           per-series count/sum/sumsq/min/max, first/last date and last
+                         prices, plus the committed size of each partition and key file
+    ingested.json        ledger of ingested files by content hash (re-drops are skipped)
+
+state.json is replaced atomically after each chunk's rows are appended and
+is the commit point: a crash between the appends and the commit leaves a
+tail in the partition or key file that the next ingestion truncates away
+before reading the keys, so those rows are ingested again, exactly once.
+
+Files dropped into data/incoming/ are picked up by a background watcher
+(started with the app, one ingesting process at a time via a lock file) and
+moved to incoming/processed/ (or incoming/failed/).
+
+    python -m ingest dumps/2025-01-02.csv      # ingest files now
+    python -m ingest --watch                   # poll the drop directory
+"""
+import argparse
+import fcntl
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+import metrics
+from checksums import file_hash
+from train import COMMODITY_SOURCES, DATA_DIR, INGESTED_DATE_FORMAT, ingested_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'INGEST_DROP_DIR': os.environ.get('INGEST_DROP_DIR', os.path.join(DATA_DIR, 'incoming')),
+    'INGEST_WATCH_INTERVAL': float(os.environ.get('INGEST_WATCH_INTERVAL', '60')),
+    # strptime format of the dumps' dates; empty detects unambiguous formats
+    'INGEST_DATE_FORMAT': os.environ.get('INGEST_DATE_FORMAT') or None
+}
+
+CHUNK_ROWS = 50_000
+
+REQUIRED_COLUMNS = (
+    't', 'cmdty', 'market_id', 'market_name', 'district_id', 'district_name',
+    'variety', 'p_min', 'p_max', 'p_modal'
+)
+# Header for commodities that have no historical CSV yet
+DEFAULT_HEADER = (
+    't', 'cmdty', 'market_id', 'market_name', 'state_id', 'state_name',
+    'district_id', 'district_name', 'variety', 'p_min', 'p_max', 'p_modal'
+)
+# Formats tried for dump dates, in order; each row takes the first that parses it.
+# Slash dates are handled separately (see parse_dates)
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y')
+SLASH_DATE = r'\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*'
+STATE_NAME = 'state.json'
+
+# Agmarknet commodity names that don't match our commodity ids
+COMMODITY_ALIASES = {
+    'chikoo (sapota)': 'chikoo',
+    'sapota': 'chikoo',
+    'mango': 'mangos',
+    'bringal': 'brinjal',
+    'brinjal': 'brinjal',
+    'green chilli': 'greenchilli',
+    'jowar(sorghum)': 'jowar',
+    'bajra(pearl millet/cumbu)': 'bajra',
+    'paddy(dhan)(common)': 'rice',
+    'cotton': 'cotton'
+}
+
+
+def commodity_key(cmdty):
+    """Our commodity id for an Agmarknet commodity name, or None"""
+    name = str(cmdty).strip().lower()
+    if name in COMMODITY_ALIASES:
+        return COMMODITY_ALIASES[name]
+    compact = name.replace(' ', '')
+    if compact in COMMODITY_SOURCES:
+        return compact
+    first = name.split('(')[0].split()[0] if name else ''
+    return first if first in COMMODITY_SOURCES else None
+
+
+def parse_dates(values, date_format=None):
+    """
+    Parse a date column with ``date_format``, or else with DATE_FORMATS plus
+    slash dates whose day and month can't be confused (a part over 12, or
+    both equal). Ambiguous slash dates such as 03/04/2025 come back NaT.
+    """
+    import pandas as pd
+
+    if date_format:
+        return pd.to_datetime(values, format=date_format, errors='coerce')
+    parsed = pd.to_datetime(values, format=DATE_FORMATS[0], errors='coerce')
+    for fmt in DATE_FORMATS[1:]:
+        missing = parsed.isna()
+        if not missing.any():
+            return parsed
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+
+    missing = parsed.isna()
+    if missing.any():
+        parts = values[missing].astype(str).str.extract(f'^{SLASH_DATE}$').astype(float)
+        day_first = (parts[0] > 12) | (parts[0] == parts[1])
+        month_first = (parts[1] > 12) & ~day_first
+        for mask, fmt in ((day_first, '%d/%m/%Y'), (month_first, '%m/%d/%Y')):
+            rows = mask[mask].index
+            if len(rows):
+                parsed[rows] = pd.to_datetime(values[rows], format=fmt, errors='coerce')
+    return parsed
+
+
+def ambiguous_dates(values, parsed):
+    """Mask of slash dates parse_dates left unparsed because day and month can't be told apart"""
+    return parsed.isna() & values.astype(str).str.fullmatch(SLASH_DATE)
+
+
+def row_keys(frame):
+    """Stable uint64 key per row from (date, market_id, variety)"""
+    import pandas as pd
+
+    parts = pd.DataFrame({
+        'day': frame['date'].to_numpy(dtype='datetime64[D]').astype(np.int64),
+        'market_id': frame['market_id'].astype(np.int64).to_numpy(),
+        'variety': frame['variety'].fillna('').astype(str).str.strip().to_numpy()
+    })
+    return pd.util.hash_pandas_object(parts, index=False).to_numpy(dtype=np.uint64)
+
+
+def _write_json(path, data):
+    fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, sort_keys=True)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _merge_summary(current, update):
+    """Fold a chunk's aggregates for one series into the running summary"""
+    if current is None:
+        return update
+    merged = dict(current)
+    merged['count'] = current['count'] + update['count']
+    merged['sum'] = current['sum'] + update['sum']
+    merged['sumsq'] = current['sumsq'] + update['sumsq']
+    merged['min'] = min(current['min'], update['min'])
+    merged['max'] = max(current['max'], update['max'])
+    merged['first_date'] = min(current['first_date'], update['first_date'])
+    if update['last_date'] >= current['last_date']:
+        for key in ('last_date', 'last', 'market_name', 'district_name', 'district_id'):
+            merged[key] = update[key]
+    return merged
+
+
+def summarize(frame):
+    """Per-market aggregates of a frame of (deduplicated) rows"""
+    frame = frame.sort_values('date', kind='stable')
+    summaries = {}
+    for market_id, rows in frame.groupby('market_id', sort=False):
+        modal = rows['p_modal'].to_numpy(dtype=float)
+        last = rows.iloc[-1]
+        summaries[str(int(market_id))] = {
+            'count': int(modal.size),
+            'sum': float(modal.sum()),
+            'sumsq': float((modal * modal).sum()),
+            'min': float(modal.min()),
+            'max': float(modal.max()),
+            'first_date': rows['date'].iloc[0].date().isoformat(),
+            'last_date': last['date'].date().isoformat(),
+            'last': {key: float(last[key]) for key in ('p_min', 'p_max', 'p_modal')},
+            'market_name': str(last['market_name']),
+            'district_name': str(last['district_name']),
+            'district_id': int(last['district_id'])
+        }
+    return summaries
+
+
+class PriceStore:
+    """
+    Append-only historical price store over the per-commodity CSVs and
+    their ingested partitions. Listeners registered with ``on_ingest`` get ``(commodity, rows)`` for
+    every batch of new rows (a DataFrame with a parsed ``date`` column).
+    """
+
+    def __init__(self, data_dir=DATA_DIR, index_dir=None, drop_dir=None, date_format=None):
+        self.data_dir = data_dir
+        self.index_dir = index_dir or os.path.join(data_dir, 'index')
+        self.drop_dir = drop_dir or DEFAULT_CONFIG['INGEST_DROP_DIR']
+        self.date_format = date_format
+        self._keys = {}
+        self._state = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._watcher = None
+        self._watcher_pid = None
+        self._stop = threading.Event()
+
+    def on_ingest(self, listener):
+        """Register ``listener(commodity, rows)`` to run after new rows are stored"""
+        self._listeners.append(listener)
+        return listener
+
+    # ---------- paths and state ----------
+
+    def csv_path(self, commodity):
+        """The tracked historical CSV (read only)"""
+        return os.path.join(self.data_dir, COMMODITY_SOURCES[commodity][0])
+
+    def ingested_path(self, commodity):
+        return ingested_path(self.data_dir, commodity)
+
+    def _keys_path(self, commodity):
+        return os.path.join(self.index_dir, f'{commodity}.keys')
+
+    @property
+    def state(self):
+        if self._state is None:
+            state = _read_json(os.path.join(self.index_dir, STATE_NAME), {})
+            state.setdefault('summaries', {})
+            state.setdefault('partitions', {})
+            self._state = state
+        return self._state
+
+    @property
+    def summaries(self):
+        return self.state['summaries']
+
+    def summary(self, commodity, market_id):
+        """Aggregates for one series with mean/std derived, or None"""
+        record = self.summaries.get(commodity, {}).get(str(int(market_id)))
+        if record is None:
+            return None
+        mean = record['sum'] / record['count']
+        variance = max(record['sumsq'] / record['count'] - mean * mean, 0.0)
+        return dict(record, mean=mean, std=variance ** 0.5)
+
+    @contextmanager
+    def locked(self, blocking=True):
+        """Cross-process lock so only one process appends at a time; yields False if busy"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, '.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                # Another process may have ingested since we last looked
+                self._keys.clear()
+                self._state = None
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_history(self, commodity):
+        """Yield chunks of a commodity's historical CSV, then of its ingested partition, with parsed dates"""
+        import pandas as pd
+
+        sources = (
+            (self.csv_path(commodity), COMMODITY_SOURCES[commodity][1]),
+            (self.ingested_path(commodity), INGESTED_DATE_FORMAT)
+        )
+        for path, date_format in sources:
+            if not os.path.exists(path) or not os.path.getsize(path):
+                continue
+            for chunk in pd.read_csv(path, chunksize=CHUNK_ROWS):
+                chunk['date'] = parse_dates(chunk['t'], date_format)
+                yield chunk.dropna(subset=['date', 'market_id', 'district_id', 'p_modal'])
+
+    def _recover(self, commodity):
+        """
+        Truncate the partition and key file to their committed sizes; False
+        if there is no usable commit and the keys must be rebuilt.
+        """
+        record = self.state['partitions'].get(commodity)
+        keys_path = self._keys_path(commodity)
+        if record is None or not os.path.exists(keys_path):
+            return False
+        for path, size in ((self.ingested_path(commodity), record['bytes']), (keys_path, record['keys'] * 8)):
+            actual = os.path.getsize(path) if os.path.exists(path) else 0
+            if actual < size:
+                return False
+            if actual > size:
+                logger.warning(f"⚠️ Dropping {actual - size} uncommitted bytes from {path}")
+                with open(path, 'rb+') as f:
+                    f.truncate(size)
+        return True
+
+    def _commit(self):
+        """Atomically record summaries and partition sizes; appended rows count from here on"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        _write_json(os.path.join(self.index_dir, STATE_NAME), self.state)
+
+    def keys(self, commodity):
+        """
+        Sorted key index for a commodity (callers hold ``locked()``); built
+        from the CSVs (with summaries) the first time or after a lost commit.
+        """
+        keys = self._keys.get(commodity)
+        if keys is not None:
+            return keys
+
+        path = self._keys_path(commodity)
+        if self._recover(commodity):
+            keys = np.unique(np.fromfile(path, dtype='<u8'))
+        else:
+            start = time.perf_counter()
+            parts, summary = [], {}
+            for chunk in self._read_history(commodity):
+                parts.append(row_keys(chunk))
+                for market_id, update in summarize(chunk).items():
+                    summary[market_id] = _merge_summary(summary.get(market_id), update)
+            keys = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+            os.makedirs(self.index_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=self.index_dir)
+            with os.fdopen(fd, 'wb') as f:
+                keys.astype('<u8').tofile(f)
+            os.replace(tmp, path)
+            partition = self.ingested_path(commodity)
+            self.summaries[commodity] = summary
+            self.state['partitions'][commodity] = {
+                'bytes': os.path.getsize(partition) if os.path.exists(partition) else 0,
+                'keys': int(keys.size)
+            }
+            self._commit()
+            logger.info(f"🗂️ Indexed {keys.size} {commodity} rows in {time.perf_counter() - start:.2f}s")
+        self._keys[commodity] = keys
+        return keys
+
+    # ---------- ingestion ----------
+
+    def _append(self, commodity, rows):
+        """
+        Append deduplicated rows to the commodity's ingested partition, key
+        file and summaries; they are durable once ``_commit`` runs.
+        """
+        import pandas as pd
+
+        path = self.ingested_path(commodity)
+        if os.path.exists(path) and os.path.getsize(path):
+            header = list(pd.read_csv(path, nrows=0).columns)
+        else:
+            # Same columns as the tracked CSV so readers can concatenate them
+            source = self.csv_path(commodity)
+            header = list(pd.read_csv(source, nrows=0).columns) if os.path.exists(source) else list(DEFAULT_HEADER)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(','.join(header) + '\n')
+
+        out = rows.copy()
+        out['t'] = out['date'].dt.strftime(INGESTED_DATE_FORMAT)
+        if 'commodity' in header and 'commodity' not in rows:
+            # The fruit CSVs tag rows with <name><year>, e.g. mango2025
+            out['commodity'] = out['cmdty'].str.split().str[0].str.lower() + out['date'].dt.year.astype(str)
+        out = out.reindex(columns=header)
+        out.to_csv(path, mode='a', header=False, index=False)
+
+        with open(self._keys_path(commodity), 'ab') as f:
+            rows['_key'].to_numpy(dtype='<u8').tofile(f)
+        self._keys[commodity] = np.union1d(self._keys[commodity], rows['_key'].to_numpy(dtype=np.uint64))
+
+        series = self.summaries.setdefault(commodity, {})
+        for market_id, update in summarize(rows).items():
+            series[market_id] = _merge_summary(series.get(market_id), update)
+        partition = self.state['partitions'][commodity]
+        partition['bytes'] = os.path.getsize(path)
+        partition['keys'] += len(rows)
+
+    def ingest_frame(self, chunk, stats, date_format=None):
+        """Route, deduplicate and store one chunk of a dump"""
+        import pandas as pd
+
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk]
+        if missing:
+            raise ValueError(f"missing columns: {', '.join(missing)}")
+
+        chunk = chunk.copy()
+        chunk['date'] = parse_dates(chunk['t'], date_format)
+        if not date_format:
+            stats['ambiguous_date'] += int(ambiguous_dates(chunk['t'], chunk['date']).sum())
+        for column in ('market_id', 'district_id', 'p_min', 'p_max', 'p_modal'):
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        valid = chunk[['date', 'market_id', 'district_id', 'p_modal']].notna().all(axis=1)
+        stats['invalid'] += int((~valid).sum())
+        chunk = chunk[valid]
+        chunk['_commodity'] = chunk['cmdty'].map(commodity_key)
+        stats['unknown_commodity'] += int(chunk['_commodity'].isna().sum())
+
+        stored = []
+        for commodity, rows in chunk.dropna(subset=['_commodity']).groupby('_commodity'):
+            rows = rows.drop(columns='_commodity')
+            rows['_key'] = row_keys(rows)
+            repeated = rows['_key'].duplicated()
+            stats['duplicates'] += int(repeated.sum())
+            rows = rows[~repeated]
+            is_known = np.isin(rows['_key'].to_numpy(dtype=np.uint64), self.keys(commodity), assume_unique=True)
+            stats['duplicates'] += int(is_known.sum())
+            rows = rows[~is_known]
+            if rows.empty:
+                continue
+
+            self._append(commodity, rows)
+            added = stats['added'].setdefault(commodity, 0)
+            stats['added'][commodity] = added + len(rows)
+            stored.append((commodity, rows.drop(columns='_key')))
+        if not stored:
+            return
+
+        # Listeners only ever see committed rows
+        self._commit()
+        for commodity, rows in stored:
+            for listener in self._listeners:
+                try:
+                    listener(commodity, rows)
+                except Exception as e:
+                    logger.error(f"❌ Ingest listener failed for {commodity}: {str(e)}")
+
+    def ingest_file(self, path, date_format=None):
+        """
+        Ingest one dump (callers hold ``locked()``). Returns a stats dict;
+        a file whose content was already ingested (with the same date
+        format) is skipped.
+        """
+        import pandas as pd
+
+        date_format = date_format or self.date_format
+        ledger_path = os.path.join(self.index_dir, 'ingested.json')
+        ledger = _read_json(ledger_path, {})
+        digest = file_hash(path)
+        if date_format:
+            # Re-ingesting with an explicit format picks up rows rejected as ambiguous
+            digest = f'{digest}:{date_format}'
+        if digest in ledger:
+            logger.info(f"⏭️ {os.path.basename(path)} already ingested on {ledger[digest]['ingested_at']}")
+            return dict(ledger[digest], skipped=True)
+
+        start = time.perf_counter()
+        stats = {'file': os.path.basename(path), 'rows': 0, 'added': {}, 'duplicates': 0,
+                 'invalid': 0, 'ambiguous_date': 0, 'unknown_commodity': 0}
+        for chunk in pd.read_csv(path, chunksize=CHUNK_ROWS, dtype={'variety': str, 't': str}):
+            stats['rows'] += len(chunk)
+            self.ingest_frame(chunk, stats, date_format)
+
+        stats['ingested_at'] = datetime.now().replace(microsecond=0).isoformat()
+        stats['duration_s'] = round(time.perf_counter() - start, 3)
+        ledger[digest] = stats
+        _write_json(ledger_path, ledger)
+        metrics.observe('ingest_file', time.perf_counter() - start)
+        logger.info(
+            f"📥 {stats['file']}: {sum(stats['added'].values())} new rows {stats['added']}, "
+            f"{stats['duplicates']} duplicates, {stats['invalid']} invalid in {stats['duration_s']}s"
+        )
+        if stats['ambiguous_date']:
+            logger.warning(
+                f"⚠️ {stats['file']}: {stats['ambiguous_date']} rows with ambiguous dd/mm vs mm/dd dates skipped; "
+                f"ingest again with the source's date format to keep them"
+            )
+        return stats
+
+    def ingest(self, paths, date_format=None):
+        """Ingest files in order under the store lock"""
+        with self.locked():
+            return [self.ingest_file(path, date_format) for path in paths]
+
+    # ---------- drop directory ----------
+
+    def check(self, settle=True):
+        """
+        Ingest files in the drop directory. With ``settle`` a file must be
+        unchanged across two checks first, so uploads in progress are skipped.
+        Returns the stats of the ingested files ([] if another process holds the lock).
+        """
+        try:
+            names = sorted(
+                name for name in os.listdir(self.drop_dir)
+                if name.endswith('.csv') and os.path.isfile(os.path.join(self.drop_dir, name))
+            )
+        except OSError:
+            return []
+
+        ready = []
+        for name in names:
+            path = os.path.join(self.drop_dir, name)
+            st = os.stat(path)
+            fingerprint = (st.st_mtime_ns, st.st_size)
+            if settle and self._pending.get(name) != fingerprint:
+                self._pending[name] = fingerprint
+                continue
+            ready.append(path)
+        if not ready:
+            return []
+
+        results = []
+        with self.locked(blocking=False) as acquired:
+            if not acquired:
+                return []
+            for path in ready:
+                name = os.path.basename(path)
+                self._pending.pop(name, None)
+                try:
+                    results.append(self.ingest_file(path))
+                    target = 'processed'
+                except Exception as e:
+                    logger.error(f"❌ Ingestion of {name} failed: {str(e)}")
+                    target = 'failed'
+                os.makedirs(os.path.join(self.drop_dir, target), exist_ok=True)
+                shutil.move(path, os.path.join(self.drop_dir, target, name))
+        return results
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Ingest watcher error: {str(e)}")
+
+    def ensure_watcher(self, interval):
+        """Start the drop directory watcher in this process if it isn't running"""
+        if interval <= 0:
+            return
+        if self._watcher is not None and self._watcher.is_alive() and self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive() and self._watcher_pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name='ingest-watcher', daemon=True)
+            self._watcher_pid = os.getpid()
+            self._watcher.start()
+        logger.info(f"👀 Watching {self.drop_dir} for price dumps every {interval}s")
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def init_app(self, app):
+        """Start the watcher lazily on the first request of each worker process"""
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.drop_dir = app.config['INGEST_DROP_DIR']
+        self.date_format = app.config['INGEST_DATE_FORMAT']
+        interval = app.config['INGEST_WATCH_INTERVAL']
+        if interval > 0:
+            app.before_request(lambda: self.ensure_watcher(interval))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='dumps to ingest (default: the drop directory)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory with the historical CSVs')
+    parser.add_argument('--date-format', default=DEFAULT_CONFIG['INGEST_DATE_FORMAT'],
+                        help="strptime format of the dumps' dates, e.g. %%d/%%m/%%Y (default: unambiguous dates only)")
+    parser.add_argument('--drop-dir', default=DEFAULT_CONFIG['INGEST_DROP_DIR'], help='watched drop directory')
+    parser.add_argument('--watch', action='store_true', help='keep polling the drop directory')
+    parser.add_argument('--interval', type=float, default=DEFAULT_CONFIG['INGEST_WATCH_INTERVAL'], help='poll interval in seconds')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    store = PriceStore(data_dir=args.data_dir, drop_dir=args.drop_dir, date_format=args.date_format)
+    if args.files:
+        results = store.ingest(args.files)
+    elif args.watch:
+        try:
+            while True:
+                store.check()
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return 0
+    else:
+        results = store.check(settle=False)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Fast JSON provider for Flask.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Either way datetime/date/time values are written as ISO 8601
+strings, Decimal as a number and NumPy scalars/arrays as plain JSON, so
+views can hand database rows and model outputs straight to jsonify().
+
+Install with ``app.json = FastJSONProvider(app)`` (create_app does this).
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, time
+
+import numpy as np
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def default(obj):
+    """Convert the types neither encoder handles on its own"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson (or stdlib json as a fallback).
+
+    ``sort_keys`` defaults to False: dicts keep their insertion order, which
+    is already deterministic and skips a sort per response. ``compact``
+    follows Flask: None means pretty-print in debug mode only.
+    """
+
+    sort_keys = False
+    compact = None
+    mimetype = 'application/json'
+
+    def _orjson_options(self, indent):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize to UTF-8 bytes"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=default, option=self._orjson_options(indent))
+            except TypeError:
+                # Integers beyond 64 bits and other values orjson rejects
+                pass
+        return json.dumps(
+            obj, default=default, ensure_ascii=False, sort_keys=self.sort_keys,
+            indent=2 if indent else None, separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        if kwargs:
+            kwargs.setdefault('default', default)
+            kwargs.setdefault('ensure_ascii', False)
+            return json.dumps(obj, indent=indent, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(indent)).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            body = self.dumps(obj, indent=2) + '\n'
+        else:
+            body = self.dumps(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,129 @@
+"""
+Farmers/products queries and payloads.
+
+Shared by the Flask views in app.py and their async counterparts in
+marketplace_async.py, so both servers run the same SQL, validate input the
+same way and answer with the same JSON.
+"""
+from datetime import datetime
+
+FARMERS_QUERY = "SELECT * FROM farmers ORDER BY created_at DESC"
+FARMER_BY_PHONE_QUERY = "SELECT * FROM farmers WHERE phone = :phone"
+FARMER_QUERY = "SELECT * FROM farmers WHERE farmer_id = :farmer_id"
+FARMER_ID_BY_PHONE_QUERY = "SELECT farmer_id FROM farmers WHERE phone = :phone"
+FARMER_EXISTS_QUERY = "SELECT farmer_id FROM farmers WHERE farmer_id = :farmer_id"
+
+PRODUCT_QUERY = """
+SELECT p.*, f.name as farmer_name, f.phone, f.district as farmer_district
+FROM products p
+JOIN farmers f ON p.farmer_id = f.farmer_id
+"""
+PRODUCTS_QUERY = PRODUCT_QUERY + "ORDER BY p.created_at DESC"
+FARMER_PRODUCTS_QUERY = PRODUCT_QUERY + "WHERE p.farmer_id = :farmer_id\nORDER BY p.created_at DESC"
+
+INSERT_FARMER = """
+INSERT INTO farmers (name, phone, district, taluka)
+VALUES (:name, :phone, :district, :taluka)
+"""
+INSERT_PRODUCT = """
+INSERT INTO products
+(farmer_id, crop_name, crop_type, district, market, quantity, unit, expected_price, image_url, harvest_date)
+VALUES
+(:farmer_id, :crop_name, :crop_type, :district, :market, :quantity, :unit, :expected_price, :image_url, :harvest_date)
+"""
+
+
+def farmer_dict(row):
+    return {
+        'farmer_id': row.farmer_id,
+        'name': row.name,
+        'phone': row.phone,
+        'district': row.district,
+        'taluka': row.taluka,
+        'created_at': row.created_at
+    }
+
+
+def product_dict(row, farmer_district=True):
+    product = {
+        'product_id': row.product_id,
+        'crop_name': row.crop_name,
+        'crop_type': row.crop_type,
+        'district': row.district,
+        'market': row.market,
+        'quantity': row.quantity,
+        'unit': row.unit,
+        'expected_price': row.expected_price,
+        'image_url': row.image_url,
+        'harvest_date': row.harvest_date,
+        'created_at': row.created_at,
+        'farmer_name': row.farmer_name,
+        'farmer_phone': row.phone
+    }
+    if farmer_district:
+        product['farmer_district'] = row.farmer_district
+    return product
+
+
+def farmers_payload(rows):
+    farmers = [farmer_dict(row) for row in rows]
+    return {'farmers': farmers, 'count': len(farmers)}
+
+
+def farmer_products_payload(rows, farmer_id):
+    products = [product_dict(row, farmer_district=False) for row in rows]
+    return {'products': products, 'count': len(products), 'farmer_id': farmer_id}
+
+
+def products_payload(rows):
+    products = [product_dict(row) for row in rows]
+    return {'products': products, 'count': len(products), 'timestamp': datetime.now().isoformat()}
+
+
+def farmer_values(data):
+    """(INSERT_FARMER parameters, None) for a create-farmer body, or (None, 400 message)"""
+    values = {key: data.get(key) for key in ('name', 'phone', 'district', 'taluka')}
+    if not all([values['name'], values['phone'], values['district']]):
+        return None, 'Missing required fields: name, phone, district'
+    return values, None
+
+
+def product_values(form, image_url=None):
+    """(INSERT_PRODUCT parameters, None) for an add-product form, or (None, 400 message)"""
+    crop_name = form.get('crop_name')
+    quantity = form.get('quantity')
+    expected_price = form.get('expected_price')
+    district = form.get('district')
+    farmer_id = form.get('farmer_id')
+    if not all([crop_name, quantity, expected_price, district, farmer_id]):
+        return None, 'Missing required fields: crop_name, quantity, expected_price, district, farmer_id'
+    try:
+        quantity_float = float(quantity)
+        expected_price_float = float(expected_price)
+        farmer_key = int(farmer_id)
+    except ValueError:
+        return None, 'Invalid quantity or price format'
+
+    return {
+        'farmer_id': farmer_key,
+        'crop_name': crop_name,
+        'crop_type': form.get('crop_type'),
+        'district': district,
+        'market': form.get('market'),
+        'quantity': quantity_float,
+        'unit': form.get('unit'),
+        'expected_price': expected_price_float,
+        'image_url': image_url,
+        'harvest_date': form.get('harvest_date')
+    }, None
+
+
+def farmer_created(farmer_id, values):
+    return {'message': 'Farmer created successfully', 'farmer_id': farmer_id,
+            'name': values['name'], 'phone': values['phone']}
+
+
+def product_created(product_id, form):
+    # farmer_id is echoed as posted
+    return {'message': 'Product added successfully', 'product_id': product_id,
+            'crop_name': form.get('crop_name'), 'farmer_id': form.get('farmer_id')}
@@ -0,0 +1,321 @@
+"""
+Async data access and ASGI handlers for the marketplace endpoints.
+
+The Flask views for farmers and products hold a worker thread for every
+DB round-trip through the sync session. Under ASGI (asgi.py) these routes
+are served here instead: ``MarketplaceDB`` runs the same queries on an
+async SQLAlchemy engine (aiomysql for MySQL, aiosqlite for the SQLite
+stand-in) and ``MarketplaceApp`` answers on the event loop. Concurrency is
+bounded by the engine pool (ASYNC_DB_POOL_SIZE + ASYNC_DB_MAX_OVERFLOW);
+a request that cannot get a connection within ASYNC_DB_POOL_TIMEOUT
+seconds gets 503 with Retry-After, and a body over MAX_CONTENT_LENGTH
+gets 413 like Flask. Payloads match the Flask views, which stay in place
+for WSGI servers; both build them with the queries and serializers in
+marketplace.py.
+
+Flask's before_request hooks do not run here, so admission control is
+applied by ``MarketplaceApp`` itself: each route is admitted against the
+same ADMISSION_ROUTES class as its Flask view (heavy for product listings)
+and rejected with the same 429/503 body and Retry-After. CORS headers come
+from the app's policy (cors.py); preflight OPTIONS requests fall through to
+Flask.
+
+    python -m bench.standin  # or any seeded database
+    DATABASE_URL=sqlite:////tmp/bench.db uvicorn asgi:app
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from io import BytesIO
+from urllib.parse import parse_qsl
+
+from sqlalchemy import exc, text
+from werkzeug.exceptions import HTTPException
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+from werkzeug.routing import Map, Rule
+from werkzeug.utils import secure_filename
+
+import cors
+import marketplace
+import metrics
+from admission import Rejected
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'ASYNC_DB_POOL_SIZE': int(os.environ.get('ASYNC_DB_POOL_SIZE', '10')),
+    'ASYNC_DB_MAX_OVERFLOW': int(os.environ.get('ASYNC_DB_MAX_OVERFLOW', '0')),
+    'ASYNC_DB_POOL_TIMEOUT': float(os.environ.get('ASYNC_DB_POOL_TIMEOUT', '5'))
+}
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite'
+}
+
+
+def async_url(database_uri):
+    """SQLAlchemy URL with the driver swapped for its async counterpart"""
+    scheme, sep, rest = database_uri.partition('://')
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+class MarketplaceDB:
+    """Farmers/products queries on a pooled async engine (created on first use in the serving loop)"""
+
+    def __init__(self, database_uri, pool_size=DEFAULT_CONFIG['ASYNC_DB_POOL_SIZE'],
+                 max_overflow=DEFAULT_CONFIG['ASYNC_DB_MAX_OVERFLOW'],
+                 pool_timeout=DEFAULT_CONFIG['ASYNC_DB_POOL_TIMEOUT']):
+        self.url = async_url(database_uri)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self._engine = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            # Imported here so WSGI-only deployments never need the async drivers
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            options = {}
+            if self.url.startswith('sqlite'):
+                # Return datetime/date objects like MySQL does (see bench/standin.py)
+                options['connect_args'] = {'detect_types': sqlite3.PARSE_DECLTYPES}
+            if ':memory:' not in self.url and self.url.rstrip('/') != 'sqlite+aiosqlite:':
+                options.update(pool_size=self.pool_size, max_overflow=self.max_overflow,
+                               pool_timeout=self.pool_timeout, pool_pre_ping=True)
+            self._engine = create_async_engine(self.url, **options)
+        return self._engine
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+    async def _fetch(self, query, params=None):
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text(query), params or {})
+            return result.fetchall()
+
+    async def farmers(self, phone=None):
+        if phone:
+            return await self._fetch(marketplace.FARMER_BY_PHONE_QUERY, {'phone': phone})
+        return await self._fetch(marketplace.FARMERS_QUERY)
+
+    async def farmer(self, farmer_id):
+        rows = await self._fetch(marketplace.FARMER_QUERY, {'farmer_id': farmer_id})
+        return rows[0] if rows else None
+
+    async def farmer_products(self, farmer_id):
+        return await self._fetch(marketplace.FARMER_PRODUCTS_QUERY, {'farmer_id': farmer_id})
+
+    async def products(self):
+        return await self._fetch(marketplace.PRODUCTS_QUERY)
+
+    async def create_farmer(self, values):
+        """New farmer id, or (None, existing id) if the phone is taken"""
+        async with self.engine.begin() as conn:
+            existing = (await conn.execute(
+                text(marketplace.FARMER_ID_BY_PHONE_QUERY), {'phone': values['phone']}
+            )).fetchone()
+            if existing:
+                return None, existing[0]
+            result = await conn.execute(text(marketplace.INSERT_FARMER), values)
+            return result.lastrowid, None
+
+    async def add_product(self, values):
+        """New product id, or None if the farmer does not exist"""
+        async with self.engine.begin() as conn:
+            farmer = (await conn.execute(
+                text(marketplace.FARMER_EXISTS_QUERY), {'farmer_id': values['farmer_id']}
+            )).fetchone()
+            if not farmer:
+                return None
+            result = await conn.execute(text(marketplace.INSERT_PRODUCT), values)
+            return result.lastrowid
+
+
+class Request:
+    """The parts of an ASGI request the handlers need"""
+
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.body = body
+        self.headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+
+    @property
+    def args(self):
+        args = {}
+        for name, value in parse_qsl(self.scope['query_string'].decode('latin-1'), keep_blank_values=True):
+            args.setdefault(name, value)
+        return args
+
+    def form(self):
+        """(form, files) for urlencoded or multipart bodies"""
+        mimetype, options = parse_options_header(self.headers.get('content-type', ''))
+        _, form, files = FormDataParser().parse(BytesIO(self.body), mimetype, len(self.body), options)
+        return form, files
+
+
+class MarketplaceApp:
+    """
+    ASGI handlers for /api/farmers* and /api/products; other requests go to
+    ``fallback``. ``admission`` is the app's AdmissionController (None skips
+    admission control).
+    """
+
+    url_map = Map([
+        Rule('/api/farmers', methods=['GET'], endpoint='get_farmers'),
+        Rule('/api/farmers', methods=['POST'], endpoint='create_farmer'),
+        Rule('/api/farmers/<int:farmer_id>', methods=['GET'], endpoint='get_farmer'),
+        Rule('/api/farmers/<int:farmer_id>/products', methods=['GET'], endpoint='get_farmer_products'),
+        Rule('/api/products', methods=['GET'], endpoint='get_all_products'),
+        Rule('/api/products', methods=['POST'], endpoint='add_product')
+    ])
+
+    def __init__(self, flask_app, fallback, db=None, admission=None):
+        for key, value in DEFAULT_CONFIG.items():
+            flask_app.config.setdefault(key, value)
+        config = flask_app.config
+        self.flask_app = flask_app
+        self.fallback = fallback
+        self.admission = admission
+        self.db = db or MarketplaceDB(
+            config['SQLALCHEMY_DATABASE_URI'], config['ASYNC_DB_POOL_SIZE'],
+            config['ASYNC_DB_MAX_OVERFLOW'], config['ASYNC_DB_POOL_TIMEOUT']
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.fallback(scope, receive, send)
+        try:
+            rule, view_args = self.url_map.bind('localhost').match(
+                scope['path'], method=scope['method'], return_rule=True
+            )
+        except HTTPException:
+            return await self.fallback(scope, receive, send)
+
+        start = time.perf_counter()
+        retry_after = 1
+        try:
+            priority = await self.admission.admit_async(rule.rule) if self.admission is not None else None
+        except Rejected as e:
+            payload, status, retry_after = e.payload(), e.status, e.retry_after
+        else:
+            admitted = time.perf_counter()
+            try:
+                payload, status = await self.dispatch(rule, view_args, scope, receive)
+            finally:
+                if priority is not None:
+                    priority.release(time.perf_counter() - admitted)
+
+        body = self.flask_app.json.dumps_bytes(payload)
+        headers = [('content-type', 'application/json'), ('content-length', str(len(body)))]
+        if status in (429, 503):
+            headers.append(('retry-after', str(retry_after)))
+        request_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        headers = cors.apply(self.flask_app, request_headers, scope['method'], headers)
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, method=scope['method'], route=rule.rule)
+        metrics.REQUESTS_TOTAL.inc(method=scope['method'], route=rule.rule, status=status)
+
+    async def dispatch(self, rule, view_args, scope, receive):
+        """(payload, status) from the handler for ``rule``"""
+        limit = self.flask_app.config.get('MAX_CONTENT_LENGTH')
+        body = await self.read_body(scope, receive, limit)
+        if body is None:
+            return {'error': f'Request body larger than {limit} bytes'}, 413
+
+        try:
+            return await getattr(self, rule.endpoint)(Request(scope, body), **view_args)
+        except exc.TimeoutError:
+            # Every pooled connection is busy: shed instead of queueing without bound
+            return {'error': 'Database busy, retry later'}, 503
+        except Exception as e:
+            logger.error(f"❌ Async {rule.endpoint} failed: {str(e)}")
+            return {'error': f'Failed to {rule.endpoint.replace("_", " ")}'}, 500
+
+    @staticmethod
+    async def read_body(scope, receive, limit=None):
+        """The request body, or None as soon as it is known to exceed ``limit`` bytes"""
+        for name, value in scope['headers']:
+            if limit is not None and name == b'content-length' and value.isdigit() and int(value) > limit:
+                return None
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if limit is not None and size > limit:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    # ---------- handlers (same payloads as the Flask views) ----------
+
+    async def get_farmers(self, request):
+        return marketplace.farmers_payload(await self.db.farmers(request.args.get('phone'))), 200
+
+    async def get_farmer(self, request, farmer_id):
+        farmer = await self.db.farmer(farmer_id)
+        if farmer is None:
+            return {'error': 'Farmer not found'}, 404
+        return marketplace.farmer_dict(farmer), 200
+
+    async def get_farmer_products(self, request, farmer_id):
+        return marketplace.farmer_products_payload(await self.db.farmer_products(farmer_id), farmer_id), 200
+
+    async def get_all_products(self, request):
+        return marketplace.products_payload(await self.db.products()), 200
+
+    async def create_farmer(self, request):
+        try:
+            data = self.flask_app.json.loads(request.body) if request.body else None
+        except ValueError:
+            data = None
+        if not data:
+            return {'error': 'No JSON data provided'}, 400
+
+        values, error = marketplace.farmer_values(data)
+        if error:
+            return {'error': error}, 400
+
+        farmer_id, existing = await self.db.create_farmer(values)
+        if existing is not None:
+            return {'error': f"Farmer with phone number {values['phone']} already exists", 'farmer_id': existing}, 400
+
+        logger.info(f"✅ Farmer created successfully: ID {farmer_id}, Name: {values['name']}, Phone: {values['phone']}")
+        return marketplace.farmer_created(farmer_id, values), 201
+
+    async def add_product(self, request):
+        form, files = request.form()
+        image_url = None
+        image_file = files.get('crop_image')
+        if image_file and image_file.filename != '':
+            filename = secure_filename(image_file.filename)
+            image_path = os.path.join(self.flask_app.config['UPLOAD_FOLDER'], filename)
+            await asyncio.to_thread(image_file.save, image_path)
+            image_url = f"/uploads/{filename}"
+
+        values, error = marketplace.product_values(form, image_url)
+        if error:
+            return {'error': error}, 400
+
+        product_id = await self.db.add_product(values)
+        if product_id is None:
+            return {'error': 'Farmer not found'}, 404
+
+        logger.info(f"✅ Product added successfully: ID {product_id}, Crop: {values['crop_name']}, Farmer: {values['farmer_id']}")
+        return marketplace.product_created(product_id, form), 201
@@ -0,0 +1,291 @@
+"""
+Request and stage metrics exposed in Prometheus text format at /metrics.
+
+Request hooks record per-route latency histograms, in-flight gauges and
+status-code counters. ``timer(stage)`` records sub-stages such as model
+loading, feature building, preprocessing, prediction, database execution and
+JSON serialization, so slow requests can be broken down.
+
+Metrics are kept per process; under gunicorn each worker reports its own.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'mandinetra_http_request_duration_seconds', 'Request latency by route', ('method', 'route'))
+REQUESTS_TOTAL = REGISTRY.counter(
+    'mandinetra_http_requests_total', 'Requests by route and status code', ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'mandinetra_http_requests_in_flight', 'Requests currently being handled', ('route',))
+STAGE_LATENCY = REGISTRY.histogram(
+    'mandinetra_stage_duration_seconds',
+    'Time spent in request sub-stages (model_load, feature_build, preprocessor_transform, '
+    'model_predict, db_execute, json_serialize, ...)', ('stage',))
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    'mandinetra_cache_lookups_total', 'In-process cache lookups by cache and result (hit/miss)', ('cache', 'result'))
+CACHE_ENTRIES = REGISTRY.gauge(
+    'mandinetra_cache_entries', 'Entries currently held by each in-process cache', ('cache',))
+COALESCED_REQUESTS = REGISTRY.counter(
+    'mandinetra_coalesced_requests_total',
+    'Single-flight calls by group and role (leader computed, coalesced shared its result, timeout gave up waiting)',
+    ('group', 'role'))
+ADMISSION_DECISIONS = REGISTRY.counter(
+    'mandinetra_admission_decisions_total',
+    'Admission decisions by priority class (admitted, queued, rejected_429, rejected_503)', ('priority', 'decision'))
+ADMISSION_QUEUED = REGISTRY.gauge(
+    'mandinetra_admission_queued', 'Requests waiting for a slot in each priority class', ('priority',))
+
+
+ASYNC_READS = REGISTRY.counter(
+    'mandinetra_async_reads_total',
+    'GET requests seen by the ASGI read tier by outcome (cache: served on the event loop, fallback: sent to Flask)',
+    ('result',))
+
+STREAM_SUBSCRIBERS = REGISTRY.gauge(
+    'mandinetra_stream_subscribers', 'Clients connected to /api/stream/prices in this process')
+STREAM_EVENTS = REGISTRY.counter(
+    'mandinetra_stream_events_total', 'Price stream events by kind (price fan-outs, heartbeats, dropped by full buffers)',
+    ('kind',))
+
+BOOT_PHASE_SECONDS = REGISTRY.gauge(
+    'mandinetra_boot_phase_seconds', 'Time this process spent in each startup phase', ('phase',))
+
+# Startup phase -> seconds, in the order the phases ran
+BOOT_TIMINGS = {}
+
+
+@contextmanager
+def timer(stage):
+    """Record the duration of a block under the given stage name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+
+def observe(stage, seconds):
+    """Record an already-measured stage duration"""
+    STAGE_LATENCY.observe(seconds, stage=stage)
+
+
+def record_boot_phase(phase, seconds):
+    """Add an already-measured startup phase to the boot report"""
+    BOOT_TIMINGS[phase] = BOOT_TIMINGS.get(phase, 0.0) + seconds
+    BOOT_PHASE_SECONDS.set(BOOT_TIMINGS[phase], phase=phase)
+
+
+@contextmanager
+def boot_phase(phase):
+    """Time a startup phase (imports, model loads, DB init, route registration, ...)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_boot_phase(phase, time.perf_counter() - start)
+
+
+def _route_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_route = _route_label()
+    REQUESTS_IN_FLIGHT.inc(route=g.metrics_route)
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is not None:
+        route = g.metrics_route
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route)
+        REQUESTS_TOTAL.inc(method=request.method, route=route, status=response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    route = g.pop('metrics_route', None)
+    if route is not None:
+        REQUESTS_IN_FLIGHT.dec(route=route)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts:
+        STAGE_LATENCY.observe(time.perf_counter() - starts.pop(), stage='db_execute')
+
+
+def metrics_view():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app):
+    """Install request hooks, the DB/JSON sub-timers and the /metrics route"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    json_dumps = app.json.dumps
+
+    def timed_dumps(obj, **kwargs):
+        with timer('json_serialize'):
+            return json_dumps(obj, **kwargs)
+
+    app.json.dumps = timed_dumps
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
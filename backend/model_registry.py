@@ -0,0 +1,344 @@
+"""
+Commodity model registry with hot reload.
+
+The registry owns loading of every commodity's artifacts (model,
+preprocessor, district/market encoders). A background watcher polls the
+files' mtime/size; when a commodity's artifacts change (and have settled
+for one poll, so half-written pickles are skipped) the new version is
+loaded off the request path, validated with a smoke-test prediction and
+swapped into the live tables in one step. Requests keep using the old
+model until the swap, and a failed load leaves it in place.
+
+Listeners registered with ``on_swap`` run after each swap (app.py uses
+this to invalidate the prediction and reference caches).
+
+With ``defer(loader)`` (MODEL_LOAD=lazy) nothing is loaded at boot; the
+first request of each process runs the full load instead.
+
+Models produced by ``python -m train`` are described in
+models/manifest.json; commodities listed there are loaded from the
+manifest's files (overriding COMMODITY_FILES) and must match its hashes.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+import forest_store
+import metrics
+from checksums import file_hash, new_digest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'MODEL_WATCH_INTERVAL': float(os.environ.get('MODEL_WATCH_INTERVAL', '30'))
+}
+
+DEFAULT_MANIFEST = os.environ.get('MODEL_MANIFEST', './models/manifest.json')
+
+# Serve forests from memory-mapped flat arrays shared by all worker processes
+MODEL_MMAP = os.environ.get('MODEL_MMAP', '1') == '1'
+
+
+def stat_fingerprint(files):
+    """Cheap change detector: (path, mtime_ns, size) for every artifact"""
+    fingerprint = []
+    for path in files.values():
+        if not path:
+            continue
+        try:
+            st = os.stat(path)
+            fingerprint.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+def file_hashes(files):
+    """Content hash of every artifact by name; each file is read once per load"""
+    return {name: file_hash(path) for name, path in files.items() if path}
+
+
+def content_version(hashes):
+    """Short hash over all artifact hashes; identifies a model version"""
+    digest = new_digest()
+    for name in sorted(hashes):
+        digest.update(f'{name}={hashes[name]};'.encode())
+    return digest.hexdigest()
+
+
+def read_manifest(path):
+    """Commodity entries of a training manifest, with file names resolved to paths"""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(path)
+    entries = {}
+    for commodity, entry in manifest.get('commodities', {}).items():
+        entry = dict(entry)
+        entry['paths'] = {name: os.path.join(base, filename) for name, filename in entry['files'].items()}
+        entries[commodity] = entry
+    return entries
+
+
+def load_artifacts(files, hashes=None):
+    """
+    Load one commodity's model (memory-mapped when possible), preprocessor and
+    encoders. ``hashes`` (from file_hashes) saves hashing the model again.
+    """
+    model_data = {}
+    hashes = hashes or {}
+
+    # Load model (handle .joblib for brinjal)
+    if files['model'].endswith('.joblib'):
+        import joblib
+        loader = joblib.load
+    else:
+        loader = pickle.load
+    model_data['model'] = forest_store.load_model(files['model'], loader, mmap=MODEL_MMAP, digest=hashes.get('model'))
+
+    for name in ('preprocessor', 'district_encoder', 'market_encoder'):
+        if files.get(name):
+            with open(files[name], 'rb') as f:
+                model_data[name] = pickle.load(f)
+        else:
+            model_data[name] = None
+
+    if model_data['district_encoder'] is None:
+        raise ValueError('district encoder is required')
+    return model_data
+
+
+class ModelRegistry:
+    """
+    Loads commodity models into the shared ``models`` / ``districts`` /
+    ``available`` tables and keeps them current.
+    ``validate(commodity, model_data)`` must raise if a candidate is unusable.
+    """
+
+    def __init__(self, files, models, districts, available, validate=None, manifest=DEFAULT_MANIFEST):
+        self.files = files
+        self.manifest_path = manifest
+        self.manifest = {}
+        self._manifest_stat = None
+        self.models = models
+        self.districts = districts
+        self.available = available
+        self.validate = validate
+        self.versions = {}
+        self._fingerprints = {}
+        self._pending = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._deferred = None
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._stop = threading.Event()
+
+    def defer(self, loader):
+        """Run ``loader()`` (the full model load) on first use instead of at boot"""
+        self._deferred = loader
+
+    def ensure_loaded(self):
+        """Run a deferred load once; concurrent first requests wait for it"""
+        if self._deferred is None:
+            return
+        with self._load_lock:
+            if self._deferred is not None:
+                self._deferred()
+                self._deferred = None
+
+    def on_swap(self, listener):
+        """Register ``listener(commodity)`` to run after a model is swapped in"""
+        self._listeners.append(listener)
+        return listener
+
+    def refresh_manifest(self):
+        """Re-read the training manifest if it changed; returns the commodities it covers"""
+        if not self.manifest_path:
+            return []
+        try:
+            st = os.stat(self.manifest_path)
+        except OSError:
+            return []
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat == self._manifest_stat:
+            return list(self.manifest)
+        try:
+            entries = read_manifest(self.manifest_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"❌ Could not read model manifest {self.manifest_path}: {str(e)}")
+            return list(self.manifest)
+
+        with self._lock:
+            for commodity, entry in entries.items():
+                if self.manifest.get(commodity, {}).get('hashes') != entry.get('hashes'):
+                    # New artifacts described: make the next check reload them
+                    self._fingerprints.pop(commodity, None)
+                self.files[commodity] = entry['paths']
+            self.manifest = entries
+            self._manifest_stat = stat
+        return list(entries)
+
+    def load(self, commodity):
+        """
+        Load, validate and swap in the current artifacts for one commodity.
+        Returns True if a new version went live, False if nothing changed.
+        Raises if the files are missing or the candidate fails validation.
+        """
+        files = self.files[commodity]
+        fingerprint = stat_fingerprint(files)
+        missing = [path for path, mtime, _ in fingerprint if mtime is None]
+        if missing:
+            self._fingerprints[commodity] = fingerprint
+            raise FileNotFoundError(f"Missing files for {commodity}: {', '.join(missing)}")
+
+        hashes = file_hashes(files)
+        version = content_version(hashes)
+        current = self.versions.get(commodity)
+        if current and current['version'] == version:
+            # Touched but identical; just remember the new timestamps
+            self._fingerprints[commodity] = fingerprint
+            return False
+
+        entry = self.manifest.get(commodity)
+        if entry is not None:
+            mismatched = [
+                name for name, path in entry['paths'].items()
+                if (hashes[name] if files.get(name) == path else file_hash(path)) != entry['hashes'].get(name)
+            ]
+            if mismatched:
+                self._fingerprints[commodity] = fingerprint
+                raise ValueError(f"Artifacts do not match the manifest: {', '.join(mismatched)}")
+
+        load_start = time.perf_counter()
+        model_data = load_artifacts(files, hashes)
+        if self.validate is not None:
+            self.validate(commodity, model_data)
+        metrics.observe('model_load', time.perf_counter() - load_start)
+
+        self._swap(commodity, model_data, version, fingerprint)
+        return True
+
+    def _swap(self, commodity, model_data, version, fingerprint):
+        district_encoder = model_data['district_encoder']
+        districts = [district.strip() for district in getattr(district_encoder, 'classes_', [])]
+
+        with self._lock:
+            # Single dict assignments: readers see either the old or the new model
+            self.models[commodity] = model_data
+            self.districts[commodity] = districts
+            if commodity not in self.available:
+                self.available.append(commodity)
+            previous = self.versions.get(commodity)
+            entry = self.manifest.get(commodity)
+            self.versions[commodity] = {
+                'version': version,
+                'loaded_at': datetime.now().replace(microsecond=0).isoformat(),
+                'previous_version': previous['version'] if previous else None,
+                'trained_at': entry.get('trained_at') if entry else None
+            }
+            self._fingerprints[commodity] = fingerprint
+
+        logger.info(f"✅ {commodity} model {version} live with {len(districts)} districts")
+        for listener in self._listeners:
+            try:
+                listener(commodity)
+            except Exception as e:
+                logger.error(f"❌ Model swap listener failed for {commodity}: {str(e)}")
+
+    def load_all(self):
+        """Initial (or full) load of every commodity; returns the loaded names"""
+        logger.info("🚀 Loading commodity models...")
+        logger.info(f"📁 Current directory: {os.getcwd()}")
+
+        with self._lock:
+            self.models.clear()
+            self.districts.clear()
+            del self.available[:]
+            self.versions.clear()
+            self._fingerprints.clear()
+            self._pending.clear()
+            self._manifest_stat = None
+        self.refresh_manifest()
+
+        for commodity in self.files:
+            try:
+                logger.info(f"🔍 Attempting to load {commodity}...")
+                self.load(commodity)
+            except FileNotFoundError as e:
+                logger.warning(f"❌ {str(e)}")
+            except Exception as e:
+                logger.error(f"❌ Error loading {commodity}: {str(e)}")
+
+        logger.info(f"🌾 Available commodities: {self.available}")
+        return list(self.available)
+
+    def check(self, settle=True):
+        """
+        Reload every commodity whose artifacts changed since they were loaded.
+        With ``settle`` a change must be seen unchanged on two consecutive
+        checks first, so files still being written are not picked up.
+        Returns the commodities that were swapped.
+        """
+        reloaded = []
+        self.refresh_manifest()
+        for commodity, files in list(self.files.items()):
+            fingerprint = stat_fingerprint(files)
+            if fingerprint == self._fingerprints.get(commodity):
+                self._pending.pop(commodity, None)
+                continue
+            if settle and self._pending.get(commodity) != fingerprint:
+                self._pending[commodity] = fingerprint
+                continue
+            self._pending.pop(commodity, None)
+
+            try:
+                if self.load(commodity):
+                    reloaded.append(commodity)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # Keep serving the previous version; retry once the files change again
+                self._fingerprints[commodity] = fingerprint
+                logger.error(f"❌ Reload of {commodity} rejected, keeping current model: {str(e)}")
+        return reloaded
+
+    # ---------- background watcher ----------
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"❌ Model watcher error: {str(e)}")
+
+    def ensure_watcher(self, interval):
+        """Start the watcher thread in this process if it isn't running (threads don't survive fork)"""
+        if interval <= 0:
+            return
+        if self._watcher is not None and self._watcher.is_alive() and self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive() and self._watcher_pid == os.getpid():
+                return
+            self._stop = threading.Event()
+            self._watcher = threading.Thread(target=self._watch, args=(interval,), name='model-watcher', daemon=True)
+            self._watcher_pid = os.getpid()
+            self._watcher.start()
+        logger.info(f"👀 Watching model artifacts every {interval}s")
+
+    def stop_watcher(self):
+        self._stop.set()
+
+    def init_app(self, app):
+        """Run a deferred load and start the watcher lazily on the first request of each worker process"""
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        app.before_request(self.ensure_loaded)
+        interval = app.config['MODEL_WATCH_INTERVAL']
+        if interval > 0:
+            app.before_request(lambda: self.ensure_watcher(interval))
@@ -0,0 +1,72 @@
+"""
+In-process cache of model predictions.
+
+Prediction features only depend on (commodity, district, market, date), so a
+prediction is valid for the rest of the day. Entries are keyed by tuples whose
+first element is the commodity, which lets a model reload drop just that
+commodity's entries.
+"""
+import threading
+from collections import OrderedDict
+
+import metrics
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache for prediction results. A named cache reports its
+    hits, misses and size to /metrics.
+    """
+
+    def __init__(self, maxsize=4096, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if self.name:
+            metrics.CACHE_LOOKUPS.inc(cache=self.name, result='miss' if value is None else 'hit')
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            size = len(self._data)
+        if self.name:
+            metrics.CACHE_ENTRIES.set(size, cache=self.name)
+
+    def invalidate(self, commodity=None):
+        """Drop every entry, or only those for one commodity"""
+        with self._lock:
+            if commodity is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if k[0] == commodity]:
+                    del self._data[key]
+            size = len(self._data)
+        if self.name:
+            metrics.CACHE_ENTRIES.set(size, cache=self.name)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
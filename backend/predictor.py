@@ -0,0 +1,369 @@
+"""
+Shared price prediction core.
+
+Every endpoint that runs the commodity models goes through PricePredictor:
+inputs are resolved and validated in one place, encoder lookups are
+memoized per loaded encoder, feature rows are built as one array and each
+commodity's rows go through the preprocessor and the forest in a single
+call. Endpoints only shape (and localize) the response.
+
+    batch = PREDICTOR.predict_rows([{'commodity': 'rice', 'district': 'bhandara', 'market': 'bhandara'}, ...])
+    batch['predicted_price']   # (n,) prices, NaN where the row failed
+    batch['quantiles']         # (n, 3) p10/p50/p90, NaN for non-ensemble models
+    batch['errors']            # PredictionError or None per row
+
+With a feature store, p_min/p_max are the latest observed prices for the
+market (or its district) instead of the commodity's static defaults.
+With ``flights`` (a SingleFlight), concurrent identical ``predict_one``
+calls share one computation.
+"""
+import time
+import weakref
+from datetime import date, datetime
+
+import numpy as np
+
+import metrics
+from ensemble import predict_with_quantiles, quantile_labels
+
+# Column order the commodity models were trained on
+FEATURE_COLUMNS = (
+    'market_encoded', 'state_id', 'district_id', 'p_min', 'p_max',
+    'year', 'month', 'day', 'district_encoded'
+)
+
+# Used for districts missing from the lookup table in lenient mode
+DEFAULT_DISTRICT_IDS = {'district_id': 501, 'market_id': 1101}
+
+
+class PredictionError(ValueError):
+    """
+    Invalid prediction input. ``code`` names the catalogue message
+    (messages.<code>) and ``params`` fills it, so callers can localize.
+    """
+
+    def __init__(self, code, message, **params):
+        super().__init__(message)
+        self.code = code
+        self.params = params
+
+
+def market_key(market):
+    """Market id as used by the API ('Kalyan' -> 'kalyan')"""
+    return market.lower().replace(' ', '_')
+
+
+def input_text(value, field):
+    """resolve()'s view of a commodity/district/market input: lower-cased, '' when absent"""
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise PredictionError('invalidField', f"'{field}' must be text, got {type(value).__name__}", field=field)
+    return value.lower()
+
+
+def row_date(value, default):
+    """A batch row's prediction day: ``default`` if absent, else a date/datetime or an ISO string"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.strip()).replace(tzinfo=None)
+        except ValueError:
+            pass
+    raise PredictionError('invalidDate', f"Invalid date '{value}', expected YYYY-MM-DD", date=str(value))
+
+
+def date_columns(dates):
+    """(years, months, days) arrays for datetimes or a datetime64 array"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    months = dates.astype('datetime64[M]').astype(int) % 12 + 1
+    days = (dates - dates.astype('datetime64[M]')).astype(int) + 1
+    return years, months, days
+
+
+class PricePredictor:
+    """
+    Batch-first predictor over the loaded commodity models.
+    ``models``, ``configs`` and ``districts`` are the live tables from app.py
+    (they are repopulated in place on reload, so references stay valid).
+    """
+
+    def __init__(self, models, configs, districts, cache=None, state_id=27, fallback_commodity='bajra', features=None,
+                 flights=None):
+        self.models = models
+        self.configs = configs
+        self.districts = districts
+        self.cache = cache
+        self.features = features
+        self.flights = flights
+        self.state_id = state_id
+        self.fallback_commodity = fallback_commodity
+        self._codes = weakref.WeakKeyDictionary()
+
+    # ---------- input resolution ----------
+
+    def find_district(self, district_input):
+        """Exact district id, else the first partial name match, else None"""
+        key = district_input.lower()
+        info = self.districts.get(key)
+        if info:
+            return info
+        for district_id, district_info in self.districts.items():
+            name = district_info['district_name'].lower()
+            if key in district_id or key in name or name in key:
+                return district_info
+        return None
+
+    def _encode(self, encoder, value):
+        """Memoized encoder.transform([value])[0]; None if the encoder doesn't know it"""
+        try:
+            table = self._codes.setdefault(encoder, {})
+        except TypeError:
+            table = {}
+        if value not in table:
+            try:
+                table[value] = encoder.transform([value])[0]
+            except Exception:
+                table[value] = None
+        return table[value]
+
+    def resolve(self, commodity, district_input, market_input, strict=True):
+        """
+        Validate one input and encode it for the model.
+        In strict mode (API requests) unknown districts, markets and encodings
+        raise PredictionError; lenient mode (analytics) falls back to defaults.
+        """
+        commodity = input_text(commodity, 'commodity')
+        district_input = input_text(district_input, 'district')
+        market_input = input_text(market_input, 'market')
+
+        if not commodity:
+            raise PredictionError('commodityRequired', 'Commodity is required')
+        if strict and not district_input:
+            raise PredictionError('districtRequired', 'District is required')
+        if strict and not market_input:
+            raise PredictionError('marketRequired', 'Market is required')
+        if commodity not in self.models:
+            raise PredictionError(
+                'commodityNotAvailable',
+                f"Commodity '{commodity}' not available. Available: {', '.join(self.models)}",
+                commodity=commodity
+            )
+
+        model_data = self.models[commodity]
+        config = self.configs.get(commodity, self.configs[self.fallback_commodity])
+
+        district_info = self.find_district(district_input)
+        if district_info is None:
+            if strict:
+                raise PredictionError(
+                    'districtNotFound',
+                    f"District '{district_input}' not found. Available districts: {list(self.districts.keys())}",
+                    district=district_input
+                )
+            district_info = dict(DEFAULT_DISTRICT_IDS, district_name=district_input.title(), markets=[])
+        district_name = district_info['district_name']
+
+        if strict and market_input not in [market_key(m) for m in district_info['markets']]:
+            raise PredictionError(
+                'marketNotFound',
+                f"Market '{market_input}' not found in {district_name}. Available markets: {district_info['markets']}",
+                market=market_input, district=district_name
+            )
+
+        district_encoded = self._encode(model_data['district_encoder'], district_name)
+        if district_encoded is None:
+            if strict:
+                known = [d.strip() for d in getattr(model_data['district_encoder'], 'classes_', [])]
+                raise PredictionError(
+                    'districtNotAvailable',
+                    f"District '{district_name}' not available for {commodity}. Available districts: {known}",
+                    district=district_name, commodity=commodity
+                )
+            district_encoded = 0
+
+        market_name = market_input.replace('_', ' ').title()
+        market_encoded = None
+        if model_data['market_encoder']:
+            market_encoded = self._encode(model_data['market_encoder'], market_name)
+        if market_encoded is None:
+            market_encoded = district_info['market_id']
+
+        observed = None
+        if self.features is not None:
+            observed = self.features.lookup(commodity, market_input, district_name)
+
+        return {
+            'commodity': commodity,
+            'config': config,
+            'model_data': model_data,
+            'district_info': district_info,
+            'market_input': market_input,
+            'market': market_name,
+            'market_encoded': market_encoded,
+            'district_encoded': district_encoded,
+            'observed': observed
+        }
+
+    # ---------- features and model ----------
+
+    def build_features(self, resolved, dates):
+        """Feature matrix with one row per (resolved input, date) pair"""
+        start = time.perf_counter()
+        features = np.empty((len(resolved), len(FEATURE_COLUMNS)))
+        features[:, 0] = [r['market_encoded'] for r in resolved]
+        features[:, 1] = self.state_id
+        features[:, 2] = [r['district_info']['district_id'] for r in resolved]
+        features[:, 3] = [self._observed(r, 'p_min') for r in resolved]
+        features[:, 4] = [self._observed(r, 'p_max') for r in resolved]
+        features[:, 5], features[:, 6], features[:, 7] = date_columns(dates)
+        features[:, 8] = [r['district_encoded'] for r in resolved]
+        metrics.observe('feature_build', time.perf_counter() - start)
+        return features
+
+    def _observed(self, resolved, column):
+        """Latest observed price from the feature store, else the commodity default"""
+        observed = resolved.get('observed')
+        if observed is not None:
+            value = observed[self.features.column(column)]
+            if value == value:  # not NaN
+                return value
+        return resolved['config'][f'default_{column}']
+
+    def predict_features(self, model_data, features, quantiles=True):
+        """Run preprocessor + model once over a feature matrix; returns (point, quantiles or None)"""
+        if model_data['preprocessor']:
+            with metrics.timer('preprocessor_transform'):
+                features = model_data['preprocessor'].transform(features)
+        with metrics.timer('model_predict'):
+            if quantiles:
+                return predict_with_quantiles(model_data['model'], features)
+            return model_data['model'].predict(features), None
+
+    def smoke_test(self, commodity, model_data):
+        """
+        Predict one feature row with a candidate model before it goes live.
+        Raises ValueError unless it returns a single finite, non-negative price.
+        """
+        classes = list(getattr(model_data['district_encoder'], 'classes_', []))
+        if not classes:
+            raise ValueError('district encoder has no classes')
+        district_name = str(classes[0]).strip()
+        district_info = self.find_district(district_name) or dict(
+            DEFAULT_DISTRICT_IDS, district_name=district_name, markets=[]
+        )
+        resolved = {
+            'config': self.configs.get(commodity, self.configs[self.fallback_commodity]),
+            'district_info': district_info,
+            'market_encoded': district_info['market_id'],
+            'district_encoded': model_data['district_encoder'].transform([classes[0]])[0]
+        }
+        point, _ = self.predict_features(model_data, self.build_features([resolved], [datetime.now()]), quantiles=False)
+        point = np.asarray(point, dtype=float)
+        if point.shape != (1,) or not np.isfinite(point).all() or point[0] < 0:
+            raise ValueError(f'smoke test produced {point!r}')
+        return float(point[0])
+
+    # ---------- public API ----------
+
+    def predict_rows(self, rows, current_date=None):
+        """
+        Predict a batch of {commodity, district, market[, date]} rows
+        (``date`` a datetime or 'YYYY-MM-DD'; a bad one fails only its row).
+        Rows are grouped per commodity so each model runs once; day-level
+        results are served from / stored in the prediction cache.
+        """
+        current_date = current_date or datetime.now()
+        labels = quantile_labels()
+        count = len(rows)
+        prices = np.full(count, np.nan)
+        intervals = np.full((count, len(labels)), np.nan)
+        errors = [None] * count
+        inputs = [None] * count
+
+        pending = {}
+        for i, row in enumerate(rows):
+            try:
+                resolved = self.resolve(row.get('commodity'), row.get('district'), row.get('market'))
+            except PredictionError as e:
+                errors[i] = e
+                continue
+            try:
+                day = row_date(row.get('date'), current_date)
+            except PredictionError as e:
+                errors[i] = e
+                continue
+            inputs[i] = resolved
+
+            # Features only depend on the day, so predictions are cached for the day
+            key = (resolved['commodity'], resolved['district_info']['district_name'],
+                   resolved['market_input'], day.date(),
+                   self.features.version if self.features is not None else 0)
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                prices[i], intervals[i] = cached
+                continue
+            pending.setdefault(resolved['commodity'], []).append((i, key, day))
+
+        for commodity, items in pending.items():
+            indices = [i for i, _, _ in items]
+            features = self.build_features([inputs[i] for i in indices], [day for _, _, day in items])
+            point, quantiles = self.predict_features(inputs[indices[0]]['model_data'], features)
+            prices[indices] = np.maximum(np.round(point, 2), 0)
+            if quantiles is not None:
+                intervals[indices] = np.maximum(np.round(quantiles, 2), 0)
+            if self.cache is not None:
+                for i, key, _ in items:
+                    self.cache.put(key, (prices[i], intervals[i].copy()))
+
+        return {
+            'predicted_price': prices,
+            'quantiles': intervals,
+            'errors': errors,
+            'inputs': inputs
+        }
+
+    def row_result(self, batch, index):
+        """One row of a batch as a dict (raises that row's PredictionError)"""
+        if batch['errors'][index] is not None:
+            raise batch['errors'][index]
+        resolved = batch['inputs'][index]
+        interval = batch['quantiles'][index]
+        return {
+            'predicted_price': float(batch['predicted_price'][index]),
+            'quantiles': None if np.isnan(interval).any() else dict(zip(quantile_labels(), interval.tolist())),
+            'config': resolved['config'],
+            'district_info': resolved['district_info'],
+            'market': resolved['market'],
+            'observed': self.features.describe(resolved['observed']) if self.features is not None else None
+        }
+
+    def predict_one(self, commodity, district, market, current_date=None):
+        """Single-row convenience wrapper around predict_rows"""
+        current_date = current_date or datetime.now()
+
+        def compute():
+            batch = self.predict_rows([{'commodity': commodity, 'district': district, 'market': market}], current_date)
+            return self.row_result(batch, 0)
+
+        if self.flights is None:
+            return compute()
+        # Normalized exactly as resolve() does, so only identical inputs share a result
+        key = ('predict', input_text(commodity, 'commodity'), input_text(district, 'district'),
+               input_text(market, 'market'), current_date.date(),
+               self.features.version if self.features is not None else 0)
+        return self.flights.do(key, compute, group='predict')
+
+    def predict_series(self, commodity, district, market, dates):
+        """Uncached point predictions for one input over many dates (lenient resolution)"""
+        resolved = self.resolve(commodity, district, market, strict=False)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        features = self.build_features([resolved] * len(dates), dates)
+        point, _ = self.predict_features(resolved['model_data'], features, quantiles=False)
+        return point
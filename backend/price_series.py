@@ -0,0 +1,124 @@
+"""
+Vectorized synthetic price series shared by the trend and analytics endpoints.
+
+Every series is generated in a single NumPy pass: dates, seasonal multipliers,
+festival boosts and noise come back as arrays. The random stream is seeded from
+(commodity, district, anchor date), so the same request on the same day always
+produces the same series and responses can be cached.
+"""
+import hashlib
+from datetime import date, datetime
+
+import numpy as np
+
+# Seasonal price multipliers
+SEASONAL_FACTORS = {
+    'winter': 1.0,
+    'summer': 0.95,
+    'monsoon': 1.1,
+    'post_monsoon': 1.05
+}
+
+FESTIVAL_MONTHS = (10, 11, 12)  # Festival months in India
+FESTIVAL_BOOST = 1.15
+
+# District-level price adjustments (major trading hubs trade higher)
+MARKET_FACTORS = {
+    'mumbai': 1.15,
+    'pune': 1.10,
+    'nashik': 1.05,
+    'nagpur': 1.02,
+    'kolhapur': 1.03,
+    'aurangabad': 1.01
+}
+
+_SEASON_BY_MONTH = {
+    12: 'winter', 1: 'winter', 2: 'winter',
+    3: 'summer', 4: 'summer', 5: 'summer',
+    6: 'monsoon', 7: 'monsoon', 8: 'monsoon', 9: 'monsoon',
+    10: 'post_monsoon', 11: 'post_monsoon'
+}
+
+# Month-indexed lookup tables (index 0 unused) so a whole series is one take()
+_SEASONAL_BY_MONTH = np.array(
+    [1.0] + [SEASONAL_FACTORS[_SEASON_BY_MONTH[m]] for m in range(1, 13)]
+)
+_FESTIVAL_BY_MONTH = np.array(
+    [1.0] + [FESTIVAL_BOOST if m in FESTIVAL_MONTHS else 1.0 for m in range(1, 13)]
+)
+
+
+def _as_day(value):
+    """Normalize a date/datetime/None to a datetime.date"""
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def series_seed(commodity, district, anchor_date=None, stream=''):
+    """Deterministic 64-bit seed for (commodity, district, anchor date, stream)"""
+    anchor = _as_day(anchor_date)
+    key = f"{stream}|{(commodity or '').lower()}|{(district or '').lower()}|{anchor.isoformat()}"
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def series_rng(commodity, district, anchor_date=None, stream=''):
+    """NumPy generator seeded for a (commodity, district, date) series"""
+    return np.random.default_rng(series_seed(commodity, district, anchor_date, stream))
+
+
+def market_factor(district):
+    """Price adjustment for a district (1.0 when unknown)"""
+    return MARKET_FACTORS.get((district or '').lower(), 1.0)
+
+
+def generate_series(commodity, district, periods, start_date, step_days=1,
+                    noise=0.05, jitter=0.0, noise_kind='uniform',
+                    anchor_date=None, stream='trend'):
+    """
+    Generate a full synthetic series in one vectorized call.
+
+    Points are spaced ``step_days`` apart starting at ``start_date``, oldest
+    first. ``noise`` is the half-width of a uniform noise band (or the standard
+    deviation when ``noise_kind='normal'``); ``jitter`` adds an independent
+    uniform daily fluctuation. Returns a dict of arrays:
+
+        dates     -- datetime64[D] dates
+        months    -- month number per point
+        seasonal  -- seasonal multiplier per point
+        festival  -- festival boost per point
+        noise     -- multiplicative noise factor per point
+    """
+    periods = max(0, int(periods))
+    rng = series_rng(commodity, district, anchor_date, stream)
+
+    start = np.datetime64(_as_day(start_date), 'D')
+    dates = start + np.arange(periods) * np.timedelta64(step_days, 'D')
+    months = dates.astype('datetime64[M]').astype(int) % 12 + 1
+
+    if noise_kind == 'normal':
+        noise_factor = 1.0 + rng.normal(0.0, noise, periods)
+    else:
+        noise_factor = 1.0 + rng.uniform(-noise, noise, periods)
+    if jitter:
+        noise_factor *= rng.uniform(1.0 - jitter, 1.0 + jitter, periods)
+
+    return {
+        'dates': dates,
+        'months': months,
+        'seasonal': _SEASONAL_BY_MONTH[months],
+        'festival': _FESTIVAL_BY_MONTH[months],
+        'noise': noise_factor
+    }
+
+
+def clip_prices(prices, config, low=0.8, high=1.2):
+    """Clip prices to a band around the commodity's default min/max"""
+    return np.clip(prices, config['default_p_min'] * low, config['default_p_max'] * high)
+
+
+def to_dates(dates):
+    """Convert a datetime64[D] array to a list of datetime.date for formatting"""
+    return dates.astype(object).tolist()
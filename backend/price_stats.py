@@ -0,0 +1,164 @@
+"""
+Vectorized price statistics for volatility and trend detection.
+
+Every function takes a 1-D series or a 2-D batch (one series per row, all the
+same length) and works along the last axis, so overview jobs can compute stats
+for every commodity-district series in one call. All of them are O(n).
+"""
+import numpy as np
+
+
+def _as_series(prices):
+    """Float array view of a series or batch of series"""
+    return np.asarray(prices, dtype=float)
+
+
+def rolling_mean(prices, window):
+    """Rolling mean over ``window`` points (valid windows only)"""
+    x = _as_series(prices)
+    if window < 1 or x.shape[-1] < window:
+        return x[..., :0]
+    csum = np.cumsum(x, axis=-1)
+    csum = np.concatenate([np.zeros(x.shape[:-1] + (1,)), csum], axis=-1)
+    return (csum[..., window:] - csum[..., :-window]) / window
+
+
+def rolling_std(prices, window, ddof=0):
+    """Rolling standard deviation over ``window`` points (valid windows only)"""
+    x = _as_series(prices)
+    if window < 1 or x.shape[-1] < window or window - ddof <= 0:
+        return x[..., :0]
+    # Shift by the first value to keep the sum-of-squares numerically stable
+    x = x - x[..., :1]
+    mean = rolling_mean(x, window)
+    sq_mean = rolling_mean(x * x, window)
+    var = (sq_mean - mean * mean) * window / (window - ddof)
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def ewma(prices, span=None, alpha=None):
+    """Exponentially weighted moving average (pandas ``adjust=False`` semantics)"""
+    x = _as_series(prices)
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0) if span else 0.5
+    if x.shape[-1] == 0:
+        return x
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded so that y[0] = x[0]
+    zi = (1.0 - alpha) * x[..., :1]
+    # scipy.signal takes over a second to import; only pay for it on first use
+    from scipy.signal import lfilter
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=-1, zi=zi)
+    return y
+
+
+def returns(prices, log=True):
+    """Period-over-period returns; non-positive or zero previous prices give NaN"""
+    x = _as_series(prices)
+    prev, curr = x[..., :-1], x[..., 1:]
+    valid = prev > 0
+    if log:
+        valid &= curr > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.log(np.where(valid, curr, 1.0) / np.where(valid, prev, 1.0))
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = (curr - prev) / np.where(valid, prev, 1.0)
+    return np.where(valid, out, np.nan)
+
+
+def volatility(prices, log=True):
+    """Standard deviation of returns as a percentage (0 when undefined)"""
+    r = returns(prices, log=log)
+    if r.shape[-1] == 0:
+        return np.zeros(r.shape[:-1]) if r.ndim > 1 else 0.0
+    counts = np.sum(~np.isnan(r), axis=-1)
+    with np.errstate(invalid='ignore'):
+        std = np.nanstd(np.where(counts[..., None] > 0, r, 0.0), axis=-1)
+    return np.where(counts > 0, std * 100, 0.0)
+
+
+def drawdown(prices):
+    """Drawdown from the running peak at each point (0 at new highs, negative below)"""
+    x = _as_series(prices)
+    peak = np.maximum.accumulate(x, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dd = np.where(peak > 0, x / peak - 1.0, 0.0)
+    return dd
+
+
+def max_drawdown(prices):
+    """Largest peak-to-trough decline as a (negative) percentage"""
+    dd = drawdown(prices)
+    if dd.shape[-1] == 0:
+        return np.zeros(dd.shape[:-1]) if dd.ndim > 1 else 0.0
+    return dd.min(axis=-1) * 100
+
+
+def trend_slope(prices):
+    """Least-squares slope per period of a linear fit through the series"""
+    x = _as_series(prices)
+    n = x.shape[-1]
+    if n < 2:
+        return np.zeros(x.shape[:-1]) if x.ndim > 1 else 0.0
+    t = np.arange(n) - (n - 1) / 2.0
+    centered = x - x.mean(axis=-1, keepdims=True)
+    return (centered @ t) / (t @ t)
+
+
+def pct_change(prices):
+    """Change from first to last point as a percentage (0 when undefined)"""
+    x = _as_series(prices)
+    if x.shape[-1] < 2:
+        return np.zeros(x.shape[:-1]) if x.ndim > 1 else 0.0
+    first, last = x[..., 0], x[..., -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(first != 0, (last - first) / first * 100, 0.0)
+    return change
+
+
+def summarize(prices, recent_window=7):
+    """
+    Summary statistics for a series or batch. Returns a dict of arrays (scalars
+    for a single series): current, min, max, mean, change, volatility, slope,
+    max_drawdown and the recent/earlier window means used for trend direction.
+    """
+    x = _as_series(prices)
+    n = x.shape[-1]
+    empty = n == 0
+    batch_shape = x.shape[:-1]
+
+    def _reduce(fn):
+        return np.zeros(batch_shape) if empty else fn(x, axis=-1)
+
+    recent = earlier = None
+    if n >= recent_window:
+        recent = x[..., -recent_window:].mean(axis=-1)
+        if n >= 2 * recent_window:
+            earlier = x[..., -2 * recent_window:-recent_window].mean(axis=-1)
+        else:
+            earlier = x[..., 0]
+
+    return {
+        'current': np.zeros(batch_shape) if empty else x[..., -1],
+        'min': _reduce(np.min),
+        'max': _reduce(np.max),
+        'mean': _reduce(np.mean),
+        'change': pct_change(x),
+        'volatility': volatility(x, log=False),
+        'log_volatility': volatility(x, log=True),
+        'slope': trend_slope(x),
+        'max_drawdown': max_drawdown(x),
+        'recent_mean': recent,
+        'earlier_mean': earlier
+    }
+
+
+def trend_direction(recent_mean, earlier_mean):
+    """'up' / 'down' / 'stable' from recent vs earlier window means"""
+    if recent_mean is None or earlier_mean is None:
+        return 'stable'
+    if recent_mean > earlier_mean:
+        return 'up'
+    if recent_mean < earlier_mean:
+        return 'down'
+    return 'stable'
@@ -0,0 +1,331 @@
+"""
+Server-Sent Events stream of live observed prices.
+
+    GET /api/stream/prices?commodity=onion[&district=pune]
+
+One producer thread per process watches the feature store. It is woken
+right away by PRICE_STORE ingestion in this process and otherwise polls
+every STREAM_POLL_INTERVAL seconds, which also picks up a features.npz
+written by another worker. When a (commodity, district) series gets a
+newer observation it builds one event and fans it out to every matching
+subscriber. Clients never trigger model or analytics work.
+
+A new subscriber first gets the latest point of each matching series.
+Each subscriber has a bounded buffer (STREAM_CLIENT_BUFFER events); a
+client too slow to drain it loses the oldest events, not the newest.
+Idle connections get a comment heartbeat every STREAM_HEARTBEAT seconds
+so proxies keep them open. The Flask view holds a thread per client;
+under ASGI, ``StreamApp`` (mounted in asgi.py) serves the same stream
+from the event loop.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+from collections import deque
+from urllib.parse import parse_qsl
+
+import numpy as np
+
+import cors
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'STREAM_POLL_INTERVAL': float(os.environ.get('STREAM_POLL_INTERVAL', '5')),
+    'STREAM_HEARTBEAT': float(os.environ.get('STREAM_HEARTBEAT', '15')),
+    'STREAM_CLIENT_BUFFER': int(os.environ.get('STREAM_CLIENT_BUFFER', '64')),
+    'STREAM_MAX_CLIENTS': int(os.environ.get('STREAM_MAX_CLIENTS', '1000'))
+}
+
+HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Don't let nginx buffer the stream
+    'X-Accel-Buffering': 'no'
+}
+
+
+class StreamFull(Exception):
+    """No room for another subscriber in this process"""
+
+
+class Subscription:
+    """One client's bounded event buffer; ``wake()`` is called after every push"""
+
+    def __init__(self, commodity, district, buffer, wake):
+        self.commodity = commodity
+        self.district = district
+        self.wake = wake
+        self.dropped = 0
+        self._events = deque(maxlen=buffer)
+        self._lock = threading.Lock()
+
+    def matches(self, commodity, district):
+        return commodity == self.commodity and (self.district is None or district == self.district)
+
+    def push(self, event):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+                metrics.STREAM_EVENTS.inc(kind='dropped')
+            self._events.append(event)
+        self.wake()
+
+    def drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+
+def format_event(event_id, payload):
+    return f"id: {event_id}\nevent: price\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+HEARTBEAT = ': heartbeat\n\n'
+
+
+class PriceStream:
+    """Single producer over FeatureStore, fanning out to many subscribers"""
+
+    def __init__(self, features, commodities, poll_interval=DEFAULT_CONFIG['STREAM_POLL_INTERVAL'],
+                 buffer=DEFAULT_CONFIG['STREAM_CLIENT_BUFFER'], max_clients=DEFAULT_CONFIG['STREAM_MAX_CLIENTS']):
+        self.features = features
+        self.commodities = commodities
+        self.poll_interval = poll_interval
+        self.buffer = buffer
+        self.max_clients = max_clients
+        self.heartbeat = DEFAULT_CONFIG['STREAM_HEARTBEAT']
+        self._subscribers = set()
+        self._last_days = None
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._producer = None
+        self._producer_pid = None
+
+    # ---------- producer ----------
+
+    def notify(self, commodity=None, rows=None):
+        """Ingestion listener: wake the producer now instead of at its next poll"""
+        self._wake.set()
+
+    def _series(self):
+        """{(commodity, district): row index} for district-level series, plus the values matrix"""
+        index, values = self.features.snapshot()
+        series = {(commodity, name): i for (commodity, level, name), i in index.items() if level == 'district'}
+        return series, values
+
+    def _event(self, commodity, district, row):
+        payload = {'commodity': commodity, 'district': district, **self.features.describe(row)}
+        return format_event(next(self._ids), payload)
+
+    def poll(self):
+        """Publish every district series whose latest observation is newer than last seen"""
+        series, values = self._series()
+        last_day = self.features.column('last_day')
+        current = {key: values[i, last_day] for key, i in series.items()}
+        previous, self._last_days = self._last_days, current
+        if previous is None:
+            return 0
+
+        published = 0
+        for key, day in current.items():
+            seen = previous.get(key)
+            if np.isnan(day) or (seen is not None and day <= seen):
+                continue
+            with self._lock:
+                subscribers = [sub for sub in self._subscribers if sub.matches(*key)]
+            if not subscribers:
+                continue
+            event = self._event(*key, values[series[key]])
+            for sub in subscribers:
+                sub.push(event)
+            published += 1
+            metrics.STREAM_EVENTS.inc(kind='price')
+        return published
+
+    def _produce(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"❌ Price stream poll failed: {str(e)}")
+
+    def ensure_producer(self):
+        """Start the producer thread in this process if it isn't running (threads don't survive fork)"""
+        if self._producer is not None and self._producer.is_alive() and self._producer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._producer is not None and self._producer.is_alive() and self._producer_pid == os.getpid():
+                return
+            self._last_days = None
+            self.poll()
+            self._producer = threading.Thread(target=self._produce, name='price-stream', daemon=True)
+            self._producer_pid = os.getpid()
+            self._producer.start()
+        logger.info(f"📡 Price stream producer started (poll every {self.poll_interval}s)")
+
+    # ---------- subscribers ----------
+
+    def validate(self, commodity):
+        """(status, error message) for a bad commodity parameter, or None"""
+        if not commodity:
+            return 400, 'Missing required parameter: commodity'
+        if commodity not in self.commodities:
+            return 404, f'Commodity {commodity} not found'
+        return None
+
+    def subscribe(self, commodity, district, wake):
+        """Register a client and queue the latest point of each matching series"""
+        self.ensure_producer()
+        district = district.strip().lower() if district else None
+        sub = Subscription(commodity, district, self.buffer, wake)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                raise StreamFull(f'{len(self._subscribers)} clients already connected')
+            self._subscribers.add(sub)
+            metrics.STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+        series, values = self._series()
+        for key, i in series.items():
+            if sub.matches(*key) and not np.isnan(values[i, self.features.column('last_day')]):
+                sub.push(self._event(*key, values[i]))
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+            metrics.STREAM_SUBSCRIBERS.set(len(self._subscribers))
+
+    def full(self):
+        with self._lock:
+            return len(self._subscribers) >= self.max_clients
+
+    def events(self, commodity, district):
+        """
+        Blocking SSE body generator for the Flask view (one thread per client).
+
+        The client is only subscribed once the body is iterated: a HEAD, or a
+        response dropped unread, never starts the generator and so could
+        never run its cleanup.
+        """
+        if self.full():
+            raise StreamFull(f'{self.max_clients} clients already connected')
+        ready = threading.Event()
+
+        def generate():
+            try:
+                sub = self.subscribe(commodity, district, ready.set)
+            except StreamFull:
+                # Filled up between the check above and the first read
+                return
+            try:
+                yield 'retry: 5000\n\n'
+                while True:
+                    if not ready.wait(self.heartbeat):
+                        metrics.STREAM_EVENTS.inc(kind='heartbeat')
+                        yield HEARTBEAT
+                        continue
+                    ready.clear()
+                    yield ''.join(sub.drain())
+            finally:
+                self.unsubscribe(sub)
+        return generate()
+
+    def init_app(self, app):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.poll_interval = app.config['STREAM_POLL_INTERVAL']
+        self.heartbeat = app.config['STREAM_HEARTBEAT']
+        self.buffer = app.config['STREAM_CLIENT_BUFFER']
+        self.max_clients = app.config['STREAM_MAX_CLIENTS']
+
+
+class StreamApp:
+    """
+    ASGI handler for GET /api/stream/prices; other requests go to
+    ``fallback``. Responses carry the CORS headers of ``flask_app``.
+    """
+
+    path = '/api/stream/prices'
+
+    def __init__(self, stream, fallback, flask_app=None):
+        self.stream = stream
+        self.fallback = fallback
+        self.flask_app = flask_app
+
+    def _headers(self, scope, headers):
+        """ASGI response headers: ``headers`` (str pairs) plus the app's CORS headers"""
+        if self.flask_app is not None:
+            request_headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+            headers = cors.apply(self.flask_app, request_headers, scope['method'], headers)
+        return [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    async def _reject(self, scope, send, status, message, retry_after=None):
+        body = json.dumps({'error': message}).encode()
+        headers = [('content-type', 'application/json'), ('content-length', str(len(body)))]
+        if retry_after:
+            headers.append(('retry-after', str(retry_after)))
+        await send({'type': 'http.response.start', 'status': status, 'headers': self._headers(scope, headers)})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET' or scope['path'] != self.path:
+            return await self.fallback(scope, receive, send)
+
+        args = {}
+        for name, value in parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True):
+            args.setdefault(name, value)
+        commodity, district = args.get('commodity'), args.get('district')
+        error = self.stream.validate(commodity)
+        if error:
+            return await self._reject(scope, send, *error)
+
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        try:
+            # subscribe() may start the producer and read the store; keep it off the loop
+            sub = await asyncio.to_thread(
+                self.stream.subscribe, commodity, district, lambda: loop.call_soon_threadsafe(ready.set)
+            )
+        except StreamFull:
+            return await self._reject(scope, send, 503, 'Too many stream clients, retry later', retry_after=30)
+
+        headers = [('content-type', 'text/event-stream; charset=utf-8')]
+        headers = self._headers(scope, headers + [(name.lower(), value) for name, value in HEADERS.items()])
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+            while not disconnected.done():
+                waiter = asyncio.ensure_future(ready.wait())
+                done, _ = await asyncio.wait({waiter, disconnected}, timeout=self.stream.heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if disconnected in done:
+                    break
+                if waiter in done:
+                    ready.clear()
+                    body = ''.join(sub.drain())
+                else:
+                    metrics.STREAM_EVENTS.inc(kind='heartbeat')
+                    body = HEARTBEAT
+                await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+        except OSError:
+            pass
+        finally:
+            disconnected.cancel()
+            self.stream.unsubscribe(sub)
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
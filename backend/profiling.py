@@ -0,0 +1,275 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries the ``X-Profile`` header or is picked by
+the PROFILE_SAMPLE_RATE sampling rate. Two profilers are available:
+
+    X-Profile: 1 / sample   stack sampler (low overhead), saved as collapsed
+                            stacks ready for flamegraph.pl / speedscope
+    X-Profile: cprofile     deterministic cProfile, saved as pstats
+
+Profiles are written to PROFILE_DIR together with the request id, endpoint
+and parameters, so every worker's profiles show up in /debug/profiles. When
+no request asks for profiling the cost is one header lookup per request.
+
+Header-triggered profiling and the debug endpoints need PROFILE_TOKEN: the
+X-Profile-Token header (or ?token= for the debug endpoints) must match it.
+Without a token they are off (profiles hold request parameters such as
+phone numbers, and cProfile is expensive); PROFILE_SAMPLE_RATE sampling
+still records profiles to PROFILE_DIR.
+"""
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import Blueprint, abort, current_app, g, jsonify, request, send_file
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_HEADER = 'X-Profile-Token'
+
+DEFAULT_CONFIG = {
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    'PROFILE_DIR': os.environ.get(
+        'PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'mandinetra-profiles')
+    ),
+    'PROFILE_MAX_STORED': int(os.environ.get('PROFILE_MAX_STORED', 200)),
+    'PROFILE_INTERVAL': float(os.environ.get('PROFILE_INTERVAL', 0.002)),
+    'PROFILE_TOKEN': os.environ.get('PROFILE_TOKEN')
+}
+
+FORMATS = {
+    'sample': ('collapsed', 'text/plain'),
+    'cprofile': ('pstats', 'application/octet-stream')
+}
+
+debug_profiles = Blueprint('debug_profiles', __name__)
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def _token_ok(supplied):
+    """Fails closed: no PROFILE_TOKEN configured means no access"""
+    token = current_app.config.get('PROFILE_TOKEN')
+    if not token or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _requested_mode():
+    """Profiler mode for this request, or None (the common, near-free path)"""
+    header = request.headers.get(PROFILE_HEADER)
+    if header is None:
+        rate = current_app.config['PROFILE_SAMPLE_RATE']
+        if rate <= 0 or random.random() >= rate:
+            return None
+        return 'sample'
+    if not _token_ok(request.headers.get(TOKEN_HEADER)):
+        return None
+    return 'cprofile' if header.lower() == 'cprofile' else 'sample'
+
+
+def _request_params():
+    params = {'args': request.args.to_dict(flat=True)}
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            params['json'] = body
+    return params
+
+
+def _before_request():
+    mode = _requested_mode()
+    if mode is None:
+        return
+
+    profile = {
+        'id': uuid.uuid4().hex,
+        'request_id': request.headers.get('X-Request-ID') or uuid.uuid4().hex,
+        'mode': mode,
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.url_rule.rule if request.url_rule else None,
+        'params': _request_params(),
+        'started_at': time.time(),
+        'pid': os.getpid()
+    }
+
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident(), current_app.config['PROFILE_INTERVAL'])
+        profiler.start()
+
+    g.profile = profile
+    g.profiler = profiler
+    g.profile_start = time.perf_counter()
+
+
+def _after_request(response):
+    profile = g.get('profile')
+    if profile is not None:
+        response.headers['X-Profile-Id'] = profile['id']
+        profile['status'] = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    profile = g.pop('profile')
+    profile['duration_ms'] = round((time.perf_counter() - g.pop('profile_start')) * 1000, 3)
+
+    if profile['mode'] == 'cprofile':
+        profiler.disable()
+    else:
+        profiler.stop()
+
+    try:
+        _save(profile, profiler)
+    except Exception as e:
+        logger.error(f"❌ Failed to save profile {profile['id']}: {str(e)}")
+
+
+def _save(profile, profiler):
+    directory = current_app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    extension, _ = FORMATS[profile['mode']]
+    data_path = os.path.join(directory, f"{profile['id']}.{extension}")
+
+    if profile['mode'] == 'cprofile':
+        profiler.dump_stats(data_path)
+    else:
+        with open(data_path, 'w') as f:
+            f.write(profiler.collapsed())
+        profile['samples'] = sum(profiler.stacks.values())
+
+    profile['format'] = extension
+    with open(os.path.join(directory, f"{profile['id']}.json"), 'w') as f:
+        json.dump(profile, f, default=str)
+
+    _prune(directory, current_app.config['PROFILE_MAX_STORED'])
+
+
+def _prune(directory, keep):
+    entries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in entries[:max(0, len(entries) - keep)]:
+        profile_id = entry.name[:-len('.json')]
+        for name in os.listdir(directory):
+            if name.startswith(profile_id + '.'):
+                os.remove(os.path.join(directory, name))
+
+
+def _load(directory, profile_id):
+    path = os.path.join(directory, f'{profile_id}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _check_token():
+    if not _token_ok(request.args.get('token') or request.headers.get(TOKEN_HEADER)):
+        abort(403)
+
+
+@debug_profiles.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    """List stored profiles, newest first"""
+    _check_token()
+    directory = current_app.config['PROFILE_DIR']
+    profiles = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                profile = _load(directory, name[:-len('.json')])
+                if profile:
+                    profile['download'] = f"/debug/profiles/{profile['id']}"
+                    profiles.append(profile)
+    profiles.sort(key=lambda p: p['started_at'], reverse=True)
+
+    endpoint = request.args.get('endpoint')
+    if endpoint:
+        profiles = [p for p in profiles if p.get('endpoint') == endpoint]
+
+    return jsonify({'profiles': profiles, 'count': len(profiles)})
+
+
+@debug_profiles.route('/debug/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """Download a profile as collapsed stacks (sampler) or pstats (cProfile)"""
+    _check_token()
+    directory = current_app.config['PROFILE_DIR']
+    profile = _load(directory, os.path.basename(profile_id))
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    requested = request.args.get('format', profile['format'])
+    if requested != profile['format']:
+        return jsonify({
+            'error': f"Profile was captured in {profile['mode']} mode; available format: {profile['format']}"
+        }), 400
+
+    extension, mimetype = FORMATS[profile['mode']]
+    return send_file(
+        os.path.join(directory, f"{profile['id']}.{extension}"),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f"{profile['id']}.{extension}"
+    )
+
+
+def init_app(app):
+    """Install the profiling hooks and the /debug/profiles endpoints"""
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(debug_profiles)
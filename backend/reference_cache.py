@@ -0,0 +1,182 @@
+"""
+Precomputed, versioned responses for slow-changing reference endpoints.
+
+Views decorated with ``@REFERENCE_CACHE.cached(...)`` are rendered once per
+(endpoint, path arguments, selected query arguments) and then served from
+memory with a strong content-hash ETag. ``If-None-Match`` /
+``If-Modified-Since`` hits return 304 without running the view, and
+compressed variants are cached next to the body. ``clear()`` is called
+whenever the data behind these endpoints is reloaded. Views over data that
+changes on its own (daily trends, the market overview) pass ``ttl`` and are
+re-rendered once their entry is that many seconds old.
+
+At most REFERENCE_MAX_ENTRIES bodies are kept; past that, expired entries
+and then the least recently used ones are evicted. Path and query values
+come from clients, so views pass ``cacheable`` to cache only requests
+whose values they recognise (others are rendered without being stored).
+
+Entries are also served straight from the event loop by the ASGI read tier
+(asgi.py); ``entry_for`` is the lookup both paths share.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+
+import compression
+
+DEFAULT_CONFIG = {
+    'REFERENCE_MAX_AGE': 60,
+    'REFERENCE_MAX_ENTRIES': 512
+}
+
+
+class CachedResponse:
+    __slots__ = ('body', 'mimetype', 'etag', 'variants', 'last_modified', 'expires')
+
+    def __init__(self, body, mimetype, ttl=None):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.variants = {}
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.expires = time.monotonic() + ttl if ttl else None
+
+    @property
+    def expired(self):
+        return self.expires is not None and time.monotonic() >= self.expires
+
+
+class ReferenceCache:
+    """Thread-safe store of rendered reference responses"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def clear(self):
+        """Drop every rendered body; the next request (or warm()) rebuilds them"""
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(endpoint, view_args, args, query_args):
+        """Cache key of a request; ``args`` is any mapping with ``get`` (request.args)"""
+        return (endpoint, tuple(sorted(view_args.items())), tuple(args.get(name) for name in query_args))
+
+    def get(self, key):
+        """Live entry for a key, or None (expired entries are dropped)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _evict(self, max_entries):
+        """Drop expired entries, then least recently used ones, down to ``max_entries`` (lock held)"""
+        if len(self._entries) <= max_entries:
+            return
+        for key in [key for key, entry in self._entries.items() if entry.expired]:
+            del self._entries[key]
+        while len(self._entries) > max_entries:
+            self._entries.popitem(last=False)
+
+    def entry_for(self, view, endpoint, view_args, args):
+        """Cached entry for a request to ``view``; None if not cached or not cacheable"""
+        query_args = getattr(view, 'reference_query_args', None)
+        if query_args is None:
+            return None
+        return self.get(self.key(endpoint, view_args, args, query_args))
+
+    def _render(self, key, view, args, kwargs, ttl):
+        version = self.version
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return None, response
+
+        entry = CachedResponse(response.get_data(), response.mimetype, ttl)
+        with self._lock:
+            # Skip storing if the data was reloaded while this body was rendered
+            if version == self.version:
+                current = self._entries.get(key)
+                if current is None or current.expired:
+                    self._entries[key] = current = entry
+                    self._entries.move_to_end(key)
+                    self._evict(current_app.config['REFERENCE_MAX_ENTRIES'])
+                entry = current
+        return entry, None
+
+    def _not_modified(self, entry, etags):
+        if request.if_none_match:
+            return any(request.if_none_match.contains(tag) for tag in etags)
+        if request.if_modified_since:
+            return request.if_modified_since >= entry.last_modified
+        return False
+
+    def cached(self, *query_args, ttl=None, cacheable=None):
+        """
+        Decorator for GET views whose output only depends on the given query
+        args (for at most ``ttl`` seconds, if given). ``cacheable(view_args,
+        args)`` returning False serves the request without caching it.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if cacheable is not None and not cacheable(kwargs, request.args):
+                    return view(*args, **kwargs)
+                key = self.key(request.endpoint, kwargs, request.args, query_args)
+                entry = self.get(key)
+                if entry is None:
+                    entry, uncached = self._render(key, view, args, kwargs, ttl)
+                    if entry is None:
+                        return uncached
+
+                encoding, body = compression.negotiate(entry.body, entry.mimetype, entry.variants)
+                etag = f'{entry.etag}-{encoding}' if encoding else entry.etag
+                not_modified = self._not_modified(entry, (entry.etag, etag))
+
+                response = current_app.response_class(
+                    None if not_modified else body,
+                    status=304 if not_modified else 200,
+                    mimetype=entry.mimetype
+                )
+                response.set_etag(etag)
+                response.last_modified = entry.last_modified
+                response.cache_control.public = True
+                response.cache_control.max_age = current_app.config['REFERENCE_MAX_AGE']
+                response.cache_control.must_revalidate = True
+                response.vary.add('Accept-Encoding')
+                if encoding and not not_modified:
+                    response.headers['Content-Encoding'] = encoding
+                return response
+            wrapper.reference_query_args = query_args
+            return wrapper
+        return decorator
+
+    def warm(self, app, urls):
+        """Render the given URLs up front so the first real request is a cache hit"""
+        for url in urls:
+            with app.test_request_context(url):
+                try:
+                    app.view_functions[request.url_rule.endpoint](**request.view_args)
+                except Exception as e:
+                    app.logger.warning(f"⚠️ Could not prebuild {url}: {str(e)}")
+
+
+def init_app(app):
+    """Register the reference cache configuration defaults"""
+    for key, value in DEFAULT_CONFIG.items():
+        app.config.setdefault(key, value)
@@ -0,0 +1,93 @@
+"""
+Request coalescing ("single flight") for expensive, deterministic calls.
+
+At market opening many clients ask for the same commodity/district within
+the same second. ``FLIGHTS.do(key, fn)`` runs ``fn`` once per key at a
+time: the first caller (the leader) computes, concurrent callers with the
+same key wait for it and share its result (or its exception). A follower
+that waits longer than the key's timeout stops waiting and computes the
+result itself, so a stuck leader never blocks anyone for long.
+
+    result = FLIGHTS.do(('predict', commodity, district, market, day), compute, group='predict')
+
+Results are shared, not copied: ``fn`` must return something callers
+treat as read-only. Counts by group and role (leader/coalesced/timeout)
+are exported to /metrics.
+"""
+import os
+import threading
+
+import metrics
+
+DEFAULT_CONFIG = {
+    # Seconds a coalesced request waits for the in-flight computation
+    'COALESCE_TIMEOUT': float(os.environ.get('COALESCE_TIMEOUT', '10')),
+    # Per-group overrides, e.g. {'analytics': 20}
+    'COALESCE_TIMEOUTS': {}
+}
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Per-key in-flight call table"""
+
+    def __init__(self, timeout=DEFAULT_CONFIG['COALESCE_TIMEOUT'], timeouts=None):
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.enabled = True
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        for key, value in DEFAULT_CONFIG.items():
+            app.config.setdefault(key, value)
+        self.timeout = app.config['COALESCE_TIMEOUT']
+        self.timeouts = dict(app.config['COALESCE_TIMEOUTS'])
+        # A timeout of 0 turns coalescing off
+        self.enabled = self.timeout > 0
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key, fn, group='default', timeout=None):
+        """Return fn(), sharing one call among concurrent callers with the same key"""
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            metrics.COALESCED_REQUESTS.inc(group=group, role='leader')
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        if timeout is None:
+            timeout = self.timeouts.get(group, self.timeout)
+        if not call.done.wait(timeout):
+            metrics.COALESCED_REQUESTS.inc(group=group, role='timeout')
+            return fn()
+        metrics.COALESCED_REQUESTS.inc(group=group, role='coalesced')
+        if call.error is not None:
+            raise call.error
+        return call.result
@@ -0,0 +1,38 @@
+"""
+Shared fixtures. Run from backend/:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Model and data paths in app.py are relative to backend/
+os.chdir(BACKEND_DIR)
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The Flask app without models, a seeded stand-in database and no ingest watcher"""
+    from app import create_app
+    from bench.standin import seed, sqlite_engine_options
+
+    database_uri = f"sqlite:///{tmp_path_factory.mktemp('db') / 'marketplace.db'}"
+    seed(database_uri, farmers=5, products_per_farmer=3)
+    return create_app({
+        'TESTING': True,
+        'LOAD_MODELS': False,
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': sqlite_engine_options(),
+        'UPLOAD_FOLDER': str(tmp_path_factory.mktemp('uploads')),
+        'INGEST_WATCH_INTERVAL': 0,
+        'STREAM_HEARTBEAT': 0.05
+    })
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
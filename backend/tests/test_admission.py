@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from admission import AdmissionController, PriorityClass, Rejected, parse_limits
+
+
+def hold(priority, release, acquired=None):
+    """Take a slot in another thread and keep it until ``release`` is set"""
+    def run():
+        priority.acquire()
+        if acquired is not None:
+            acquired.set()
+        release.wait(5)
+        priority.release(0.01)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_parse_limits():
+    assert parse_limits('heavy=2:4:5, standard=8:16:2.5') == {'heavy': (2, 4, 5.0), 'standard': (8, 16, 2.5)}
+    assert parse_limits('') == {}
+
+
+def test_queued_request_gets_released_slot():
+    priority = PriorityClass('heavy', 1, 1, 5.0)
+    release, acquired = threading.Event(), threading.Event()
+    holder = hold(priority, release, acquired)
+    acquired.wait(5)
+
+    threading.Timer(0.05, release.set).start()
+    waited = priority.acquire()
+    assert waited > 0
+    assert priority.active == 1 and priority.waiting == 0
+    priority.release(0.01)
+    holder.join(5)
+    assert priority.active == 0
+
+
+def test_full_queue_rejects_with_429():
+    priority = PriorityClass('heavy', 1, 1, 5.0)
+    release, acquired = threading.Event(), threading.Event()
+    hold(priority, release, acquired)
+    acquired.wait(5)
+    queued = threading.Thread(target=lambda: (priority.acquire(), priority.release(0.01)), daemon=True)
+    queued.start()
+    wait_for(lambda: priority.waiting == 1)
+
+    with pytest.raises(Rejected) as rejected:
+        priority.acquire()
+    assert rejected.value.status == 429
+    assert rejected.value.retry_after >= 1
+    release.set()
+    queued.join(5)
+
+
+def test_queue_deadline_rejects_with_503():
+    priority = PriorityClass('heavy', 1, 4, 0.05)
+    release, acquired = threading.Event(), threading.Event()
+    hold(priority, release, acquired)
+    acquired.wait(5)
+
+    start = time.monotonic()
+    with pytest.raises(Rejected) as rejected:
+        priority.acquire()
+    assert time.monotonic() - start >= 0.05
+    assert rejected.value.status == 503
+    assert rejected.value.reason == 'queue wait deadline exceeded'
+    assert rejected.value.retry_after >= 1
+    assert priority.waiting == 0
+    release.set()
+
+
+def test_expected_wait_over_deadline_rejects_at_once():
+    priority = PriorityClass('heavy', 1, 4, 0.5)
+    priority.service_time = 2.0
+    release, acquired = threading.Event(), threading.Event()
+    hold(priority, release, acquired)
+    acquired.wait(5)
+
+    start = time.monotonic()
+    with pytest.raises(Rejected) as rejected:
+        priority.acquire()
+    assert time.monotonic() - start < 0.5
+    assert rejected.value.status == 503
+    assert rejected.value.retry_after == 2
+    release.set()
+
+
+def test_degraded_halves_limit_and_stops_queueing():
+    priority = PriorityClass('standard', 4, 16, 5.0)
+    priority.acquire(degraded=True)
+    priority.acquire(degraded=True)
+    with pytest.raises(Rejected) as rejected:
+        priority.acquire(degraded=True)
+    assert rejected.value.status == 503
+    assert rejected.value.reason == 'shedding load'
+    # Not degraded: the full limit applies again
+    priority.acquire()
+    assert priority.active == 3
+
+
+def test_degraded_unlimited_class_stays_unlimited():
+    priority = PriorityClass('critical', 0, 0, 0.0)
+    for _ in range(10):
+        assert priority.acquire(degraded=True) == 0.0
+    assert priority.active == 10
+
+
+@pytest.fixture
+def admission_app():
+    app = Flask(__name__)
+    app.config['ADMISSION_LIMITS'] = {'critical': (0, 0, 0.0), 'standard': (8, 16, 2.0), 'heavy': (1, 0, 0.0)}
+    app.config['ADMISSION_ROUTES'] = {'/predict': 'critical', '/slow': 'heavy'}
+    release, entered = threading.Event(), threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        entered.set()
+        release.wait(5)
+        return jsonify({'ok': True})
+
+    @app.route('/predict', methods=['POST'])
+    def predict():
+        return jsonify({'ok': True})
+
+    controller = AdmissionController()
+    controller.init_app(app)
+    app.config.update(TESTING=True)
+    yield app, controller, release, entered
+    release.set()
+
+
+def test_rejection_response(admission_app):
+    app, controller, release, entered = admission_app
+    background = threading.Thread(target=lambda: app.test_client().get('/slow'), daemon=True)
+    background.start()
+    entered.wait(5)
+
+    response = app.test_client().get('/slow')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert 'retry_after' in response.get_json()
+
+    release.set()
+    background.join(5)
+    assert controller.classes['heavy'].active == 0
+    assert app.test_client().get('/slow').status_code == 200
+
+
+def test_batched_predictions_are_heavy(admission_app):
+    app, controller, release, entered = admission_app
+    with app.test_request_context('/predict', method='POST', json={'rows': []}):
+        assert controller.classify().name == 'heavy'
+    with app.test_request_context('/predict', method='POST', json={'commodity': 'rice'}):
+        assert controller.classify().name == 'critical'
+
+
+def test_degraded_when_critical_over_slo(admission_app):
+    app, controller, release, entered = admission_app
+    critical = controller.classes['critical']
+    assert not controller.degraded()
+    critical.active, critical.service_time = 1, controller.critical_slo * 2
+    assert controller.degraded()
+    critical.active = 0
+    assert not controller.degraded()
+
+
+def test_acquire_async_fast_path_and_queue():
+    priority = PriorityClass('heavy', 1, 1, 5.0)
+
+    async def run():
+        assert await priority.acquire_async() == 0.0
+        queued = asyncio.ensure_future(priority.acquire_async())
+        await asyncio.sleep(0.05)
+        assert priority.waiting == 1
+        priority.release(0.01)
+        assert await queued > 0
+        priority.release(0.01)
+
+    asyncio.run(run())
+    assert priority.active == 0
+
+
+def test_cancelled_async_waiter_returns_its_slot():
+    priority = PriorityClass('heavy', 1, 1, 5.0)
+
+    async def run():
+        await priority.acquire_async()
+        queued = asyncio.ensure_future(priority.acquire_async())
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        priority.release(0.01)
+        # The worker thread takes the freed slot and hands it straight back
+        while priority.waiting or priority.active:
+            await asyncio.sleep(0.005)
+
+    asyncio.run(run())
+    assert priority.active == 0
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+ORIGIN = 'http://localhost:3000'
+
+
+@pytest.fixture(scope='module')
+def asgi(app):
+    """asgi.py built around the test app instead of wsgi.py's production one"""
+    sys.modules['wsgi'] = types.SimpleNamespace(application=app)
+    try:
+        import asgi
+        yield asgi
+    finally:
+        sys.modules.pop('wsgi', None)
+
+
+async def call(app, method, path, headers=()):
+    """(status, headers) from one ASGI request; header names lower-case"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'root_path': '', 'query_string': b'',
+             'headers': [(name.encode(), value.encode()) for name, value in headers],
+             'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 80)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], {name.decode(): value.decode() for name, value in sent[0]['headers']}
+
+
+def cors_headers(headers):
+    headers = {name.lower(): value for name, value in headers.items()}
+    picked = {name: value for name, value in headers.items() if name.startswith('access-control-')}
+    picked['vary'] = {part.strip().lower() for part in headers.get('vary', '').split(',') if part.strip()}
+    return picked
+
+
+@pytest.mark.parametrize('origin', [ORIGIN, 'http://elsewhere.example', None])
+def test_read_tier_cors_matches_flask(app, client, asgi, origin):
+    request_headers = [('Origin', origin)] if origin else []
+    expected = client.get('/api/commodities', headers=request_headers)
+    assert expected.status_code == 200
+
+    read_tier = asgi.ReadTier(app, asgi.REFERENCE_CACHE, None)
+    assert read_tier.lookup({'path': '/api/commodities', 'query_string': b''}) is not None
+    status, headers = asyncio.run(call(read_tier, 'GET', '/api/commodities', request_headers))
+    assert status == 200
+    assert cors_headers(headers) == cors_headers(dict(expected.headers))
+    if origin == ORIGIN:
+        assert headers['access-control-allow-origin'] == ORIGIN
+        assert 'origin' in cors_headers(headers)['vary']
+    elif origin:
+        assert 'access-control-allow-origin' not in headers
+
+
+def test_preflight_is_answered_by_flask(asgi):
+    status, headers = asyncio.run(call(asgi.app, 'OPTIONS', '/api/commodities', [
+        ('Origin', ORIGIN), ('Access-Control-Request-Method', 'GET')
+    ]))
+    assert status == 200
+    assert headers['access-control-allow-origin'] == ORIGIN
+    assert 'GET' in headers['access-control-allow-methods']
@@ -0,0 +1,32 @@
+import pytest
+
+SAMPLE = [90, 42, 43, 20.8, 82.0, 6.5, 202.9]
+
+
+@pytest.fixture(scope='module')
+def crop_model(app):
+    from app import CROP_RECOMMENDER, load_crop_model
+
+    load_crop_model()
+    if not CROP_RECOMMENDER.available:
+        pytest.skip('crop recommendation model not available')
+    return CROP_RECOMMENDER
+
+
+def test_batch_top_k(client, crop_model):
+    response = client.post('/api/crop/recommend/batch', json={'samples': [SAMPLE, SAMPLE], 'top_k': 2})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 2
+
+
+@pytest.mark.parametrize('top_k', [0, -1, 10_000])
+def test_batch_rejects_out_of_range_top_k(client, crop_model, top_k):
+    response = client.post('/api/crop/recommend/batch', json={'samples': [SAMPLE], 'top_k': top_k})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'top_k must be between 1 and {len(crop_model.labels)}'
+
+
+def test_batch_accepts_every_class(client, crop_model):
+    top_k = len(crop_model.labels)
+    response = client.post('/api/crop/recommend/batch', json={'samples': [SAMPLE], 'top_k': top_k})
+    assert response.status_code == 200
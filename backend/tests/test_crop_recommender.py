@@ -0,0 +1,98 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from crop_recommender import FEATURE_NAMES, CropRecommender
+
+SAMPLE = [90, 42, 43, 20.8, 82.0, 6.5, 202.9]
+TEMPERATURE = FEATURE_NAMES.index('temperature')
+
+
+class CountingModel:
+    """Scores rice above maize when it is warm; records every row it scores"""
+
+    def __init__(self, bias=0.0):
+        self.classes_ = np.array([0, 1])
+        self.bias = bias
+        self.scored = []
+
+    def predict_proba(self, X):
+        self.scored.extend(map(tuple, X))
+        warm = (X[:, TEMPERATURE] > 25).astype(float)
+        rice = np.clip(0.3 + 0.4 * warm + self.bias, 0, 1)
+        return np.column_stack([1 - rice, rice])
+
+
+def write_artifact(path, model):
+    encoder = LabelEncoder().fit(['maize', 'rice'])
+    with open(path, 'wb') as f:
+        pickle.dump({'model': model, 'label_encoder': encoder, 'feature_names': FEATURE_NAMES}, f)
+
+
+def with_temperature(value):
+    sample = list(SAMPLE)
+    sample[TEMPERATURE] = value
+    return sample
+
+
+@pytest.fixture
+def recommender(tmp_path):
+    path = tmp_path / 'crop.pkl'
+    write_artifact(path, CountingModel())
+    recommender = CropRecommender(cache_size=16, check_interval=0)
+    assert recommender.load(str(path))
+    return recommender, path
+
+
+def test_quantize_buckets(recommender):
+    recommender, _ = recommender
+    X = np.array([[90.4, 41.6, 43, 20.84, 81.96, 6.504, 202.94]])
+    assert np.allclose(recommender.quantize(X), [[90, 42, 43, 20.8, 82.0, 6.5, 202.9]])
+    exact = CropRecommender(precision={}, cache_size=0)
+    exact._steps = np.zeros(len(FEATURE_NAMES))
+    assert np.array_equal(exact.quantize(X), X)
+
+
+def test_nearby_inputs_share_one_entry(recommender):
+    recommender, _ = recommender
+    first = recommender.recommend([with_temperature(20.81)])
+    second = recommender.recommend([with_temperature(20.84)])
+    assert len(recommender.model.scored) == 1
+    assert recommender.cache.stats()['size'] == 1
+    assert recommender.cache.stats()['hits'] == 1
+    assert np.array_equal(first['top_probabilities'], second['top_probabilities'])
+
+
+def test_inputs_in_different_buckets_do_not(recommender):
+    recommender, _ = recommender
+    recommender.recommend([with_temperature(20.84)])
+    recommender.recommend([with_temperature(20.86)])
+    assert len(recommender.model.scored) == 2
+    assert recommender.cache.stats()['size'] == 2
+
+
+def test_identical_rows_in_a_batch_are_scored_once(recommender):
+    recommender, _ = recommender
+    result = recommender.recommend([SAMPLE, with_temperature(30), SAMPLE], k=1)
+    assert len(recommender.model.scored) == 2
+    assert list(result['predicted']) == ['maize', 'rice', 'maize']
+
+
+def test_model_swap_clears_the_cache(recommender):
+    recommender, path = recommender
+    before = recommender.recommend([SAMPLE], k=1)
+    assert recommender.cache.stats()['size'] == 1
+
+    write_artifact(path, CountingModel(bias=0.5))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    recommender.check_interval = 1e-9
+
+    after = recommender.recommend([SAMPLE], k=1)
+    assert recommender.model.bias == 0.5
+    assert len(recommender.model.scored) == 1
+    assert recommender.cache.stats()['size'] == 1
+    assert before['predicted'][0] == 'maize' and after['predicted'][0] == 'rice'
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+import ensemble
+
+RNG = np.random.default_rng(3)
+X = RNG.uniform(0, 10, (200, 4))
+y = X[:, 0] * 100 + RNG.normal(0, 20, 200)
+
+
+@pytest.fixture(scope='module')
+def forest():
+    return RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+
+
+def test_supports_quantiles():
+    assert not ensemble.supports_quantiles(RandomForestRegressor())
+    assert not ensemble.supports_quantiles(GradientBoostingRegressor(n_estimators=5).fit(X, y))
+    assert not ensemble.supports_quantiles(LinearRegression().fit(X, y))
+
+
+def test_quantiles_match_per_tree_predictions(forest):
+    point, q = ensemble.predict_with_quantiles(forest, X[:10])
+    per_tree = np.stack([tree.predict(X[:10]) for tree in forest.estimators_], axis=1)
+    np.testing.assert_allclose(point, forest.predict(X[:10]))
+    np.testing.assert_allclose(q, np.quantile(per_tree, ensemble.DEFAULT_QUANTILES, axis=1).T)
+    assert ensemble.quantile_labels() == ['p10', 'p50', 'p90']
+
+
+def test_other_models_get_point_only():
+    model = GradientBoostingRegressor(n_estimators=5).fit(X, y)
+    point, q = ensemble.predict_with_quantiles(model, X[:3])
+    assert q is None
+    np.testing.assert_allclose(point, model.predict(X[:3]))
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import COLUMN, WINDOW, FeatureStore
+
+MARKETS = [('Pune', 'Pune'), ('Pimpri Chinchwad', 'Pune'), ('Nashik', 'Nashik')]
+
+
+def price_rows(days=45, seed=11):
+    """Several varieties per market and day, some days missing"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in pd.date_range('2024-01-01', periods=days):
+        for market, district in MARKETS:
+            if rng.random() < 0.2:
+                continue
+            for variety in range(rng.integers(1, 4)):
+                modal = rng.uniform(1500, 2500)
+                rows.append({'date': day, 'market_name': market, 'district_name': district, 'variety': variety,
+                             'p_min': modal - 100, 'p_max': modal + 100, 'p_modal': modal})
+    return pd.DataFrame(rows)
+
+
+def expected(rows, level):
+    """Reference features per series computed with pandas over the whole frame"""
+    name = 'market_name' if level == 'market' else 'district_name'
+    daily = rows.groupby([name, 'date'])[['p_min', 'p_max', 'p_modal']].mean().reset_index()
+    out = {}
+    for series, group in daily.groupby(name):
+        modal = group['p_modal'].to_numpy()[-WINDOW:]
+        last = group.iloc[-1]
+        out[series.lower().replace(' ', '_')] = {
+            'p_min': last['p_min'], 'p_max': last['p_max'], 'p_modal': modal[-1],
+            'lag_1': modal[-2], 'lag_2': modal[-3], 'lag_3': modal[-4],
+            'mean_7': modal[-7:].mean(), 'mean_30': modal.mean(),
+            'last_day': (last['date'] - pd.Timestamp('1970-01-01')).days
+        }
+    return out
+
+
+def assert_matches(store, rows):
+    for level in ('market', 'district'):
+        for name, features in expected(rows, level).items():
+            row = store.values[store.index[('onion', level, name)]]
+            for column, value in features.items():
+                assert row[COLUMN[column]] == pytest.approx(value), (level, name, column)
+
+
+def test_batch_matches_pandas():
+    rows = price_rows()
+    store = FeatureStore()
+    store._apply('onion', rows)
+    assert len(store.index) == len(MARKETS) + 2
+    assert_matches(store, rows)
+
+
+def test_incremental_matches_batch():
+    rows = price_rows()
+    store = FeatureStore()
+    # Day by day, as ingestion delivers them
+    for _, day in rows.groupby('date'):
+        store._apply('onion', day)
+    assert_matches(store, rows)
+
+
+def test_older_observations_are_ignored():
+    rows = price_rows()
+    store = FeatureStore()
+    store._apply('onion', rows)
+    before = store.values.copy()
+    stale = rows[rows['date'] < '2024-01-20'].assign(p_modal=1.0, p_min=1.0, p_max=1.0)
+    store._apply('onion', stale)
+    np.testing.assert_array_equal(store.values, before)
+
+
+def test_short_series_have_nan_lags():
+    rows = price_rows(days=2)
+    store = FeatureStore()
+    store._apply('onion', rows)
+    row = store.values[store.index[('onion', 'district', 'nashik')]]
+    assert np.isnan(row[COLUMN['lag_3']])
+    assert not np.isnan(row[COLUMN['mean_7']])
+
+
+def test_lookup_falls_back_to_district_and_persists(tmp_path):
+    rows = price_rows()
+    store = FeatureStore(path=str(tmp_path / 'features.npz'))
+    store.load()
+    store.update('onion', rows)
+
+    market = store.lookup('onion', 'Pimpri Chinchwad', 'Pune')
+    np.testing.assert_array_equal(market, store.values[store.index[('onion', 'market', 'pimpri_chinchwad')]])
+    district = store.lookup('onion', 'Unknown Market', ' Pune ')
+    np.testing.assert_array_equal(district, store.values[store.index[('onion', 'district', 'pune')]])
+    assert store.lookup('onion', 'Unknown Market', 'Nowhere') is None
+    assert np.isnan(store.features([('wheat', 'Pune', 'Pune')])).all()
+
+    reloaded = FeatureStore(path=store.path).load()
+    assert reloaded.index == store.index
+    np.testing.assert_array_equal(reloaded.values, store.values)
+    assert reloaded.describe(district)['observed_on'] == '2024-02-14'
+
+
+def test_max_age_hides_stale_series():
+    store = FeatureStore(max_age_days=10)
+    store._loaded = True
+    store._apply('onion', price_rows())
+    assert store.lookup('onion', 'Pune', 'Pune', today='2024-02-20') is not None
+    assert store.lookup('onion', 'Pune', 'Pune', today='2024-06-01') is None
@@ -0,0 +1,70 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import (ExtraTreesRegressor, GradientBoostingRegressor, RandomForestClassifier,
+                              RandomForestRegressor)
+
+import ensemble
+import forest_store
+
+RNG = np.random.default_rng(5)
+X = RNG.uniform(0, 10, (300, 5))
+y = X[:, 0] * 100 + X[:, 1] * 10 + RNG.normal(0, 5, 300)
+
+
+def pickled(tmp_path, model, name='model.pkl'):
+    path = tmp_path / name
+    path.write_bytes(pickle.dumps(model))
+    return str(path)
+
+
+@pytest.mark.parametrize('cls', [RandomForestRegressor, ExtraTreesRegressor])
+def test_flat_forest_matches_sklearn(tmp_path, cls):
+    model = cls(n_estimators=15, max_depth=8, random_state=0).fit(X, y)
+    flat = forest_store.load_model(pickled(tmp_path, model))
+    assert isinstance(flat, forest_store.FlatForest)
+    assert isinstance(flat.left, np.memmap)
+
+    queries = RNG.uniform(-1, 11, (50, 5))
+    np.testing.assert_allclose(flat.predict(queries), model.predict(queries))
+    np.testing.assert_allclose(
+        ensemble.predict_with_quantiles(flat, queries)[1], ensemble.predict_with_quantiles(model, queries)[1]
+    )
+    with pytest.raises(ValueError):
+        flat.predict(queries[:, :3])
+
+
+def test_is_exportable():
+    assert forest_store.is_exportable(RandomForestRegressor(n_estimators=3).fit(X, y))
+    assert not forest_store.is_exportable(RandomForestRegressor())
+    assert not forest_store.is_exportable(GradientBoostingRegressor(n_estimators=3).fit(X, y))
+    assert not forest_store.is_exportable(RandomForestClassifier(n_estimators=3).fit(X, y > 500))
+    assert not forest_store.is_exportable(RandomForestRegressor(n_estimators=3).fit(X, np.c_[y, y]))
+
+
+def test_other_models_are_unpickled(tmp_path):
+    model = GradientBoostingRegressor(n_estimators=3).fit(X, y)
+    path = pickled(tmp_path, model)
+    loaded = forest_store.load_model(path)
+    assert isinstance(loaded, GradientBoostingRegressor)
+    assert not os.path.exists(f'{path}.forest')
+
+
+def test_new_pickle_replaces_old_export(tmp_path):
+    path = pickled(tmp_path, RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y))
+    first = forest_store.load_model(path).meta['source_hash']
+    assert os.listdir(f'{path}.forest') == [first]
+
+    model = RandomForestRegressor(n_estimators=4, random_state=1).fit(X, y)
+    pickled(tmp_path, model)
+    reloaded = forest_store.load_model(path)
+    assert reloaded.n_estimators == 4
+    assert os.listdir(f'{path}.forest') == [reloaded.meta['source_hash']]
+    np.testing.assert_allclose(reloaded.predict(X[:5]), model.predict(X[:5]))
+
+
+def test_mmap_off_returns_the_pickle(tmp_path):
+    model = RandomForestRegressor(n_estimators=3).fit(X, y)
+    assert isinstance(forest_store.load_model(pickled(tmp_path, model), mmap=False), RandomForestRegressor)
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import PriceStore, ambiguous_dates, parse_dates
+
+HEADER = 't,cmdty,market_id,market_name,state_id,state_name,district_id,district_name,variety,p_min,p_max,p_modal\n'
+
+
+def row(t, market_id=1, variety='Other', modal=2000, cmdty='Rice'):
+    return f'{t},{cmdty},{market_id},Bhandara,27,Maharashtra,506,Bhandara,{variety},{modal - 100},{modal + 100},{modal}\n'
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A store over one tracked rice CSV (month-first dates, like foods_grains/)"""
+    source = tmp_path / 'foods_grains' / 'rice.csv'
+    source.parent.mkdir()
+    source.write_text(HEADER + row('12/30/2020') + row('12/31/2020'))
+    return PriceStore(data_dir=str(tmp_path), drop_dir=str(tmp_path / 'incoming'))
+
+
+def dump(tmp_path, name, *rows):
+    path = tmp_path / name
+    path.write_text(HEADER + ''.join(rows))
+    return str(path)
+
+
+def test_parse_dates_rejects_ambiguous_slash_dates():
+    values = pd.Series(['2025-04-03', '03-04-2025', '13/04/2025', '04/13/2025', '05/05/2025', '03/04/2025', 'junk'])
+    parsed = parse_dates(values)
+    assert list(parsed[:5].dt.strftime('%Y-%m-%d')) == [
+        '2025-04-03', '2025-04-03', '2025-04-13', '2025-04-13', '2025-05-05'
+    ]
+    assert parsed[5:].isna().all()
+    assert list(ambiguous_dates(values, parsed)) == [False] * 5 + [True, False]
+    assert parse_dates(pd.Series(['03/04/2025']), '%d/%m/%Y')[0] == pd.Timestamp('2025-04-03')
+
+
+def test_ingest_dedupes_into_partition(store, tmp_path):
+    source = tmp_path / 'foods_grains' / 'rice.csv'
+    before = source.read_bytes()
+    received = []
+    store.on_ingest(lambda commodity, rows: received.append((commodity, len(rows))))
+
+    path = dump(tmp_path, 'd1.csv',
+                row('2020-12-31'),                      # already in the history
+                row('2021-01-01'), row('2021-01-01'),   # repeated within the dump
+                row('2021-01-01', variety='Fine'),
+                row('2021-01-02', cmdty='Unobtainium'))
+    [stats] = store.ingest([path])
+
+    assert stats['added'] == {'rice': 2}
+    assert stats['duplicates'] == 2
+    assert stats['unknown_commodity'] == 1
+    assert received == [('rice', 2)]
+    assert source.read_bytes() == before
+    assert len(pd.read_csv(store.ingested_path('rice'))) == 2
+    assert sum(len(chunk) for chunk in store._read_history('rice')) == 4
+    assert store.summary('rice', 1)['count'] == 4
+
+    # Same content again: skipped by the ledger without reading it
+    assert store.ingest([path])[0]['skipped']
+    # New file overlapping the old one: only the new day is added
+    [stats] = store.ingest([dump(tmp_path, 'd2.csv', row('2021-01-01'), row('2021-01-03'))])
+    assert stats['added'] == {'rice': 1}
+
+
+def test_ambiguous_dates_need_explicit_format(store, tmp_path):
+    path = dump(tmp_path, 'slash.csv', row('13/01/2021'), row('03/01/2021'))
+    [stats] = store.ingest([path])
+    assert stats['added'] == {'rice': 1}
+    assert stats['ambiguous_date'] == 1
+
+    [stats] = store.ingest([path], date_format='%d/%m/%Y')
+    assert stats['added'] == {'rice': 1}
+    days = pd.read_csv(store.ingested_path('rice'))['t']
+    assert sorted(days) == ['2021-01-03', '2021-01-13']
+
+
+def test_uncommitted_tail_is_rolled_back(store, tmp_path):
+    store.ingest([dump(tmp_path, 'd1.csv', row('2021-01-01'))])
+    partition = store.ingested_path('rice')
+    keys_path = store._keys_path('rice')
+    committed = (os.path.getsize(partition), os.path.getsize(keys_path))
+
+    # A crash after appending rows, before the commit (and halfway through a line)
+    with open(partition, 'a') as f:
+        f.write(row('2021-01-02') + '2021-01-03,Rice,1,Bhan')
+    with open(keys_path, 'ab') as f:
+        np.array([1, 2], dtype='<u8').tofile(f)
+
+    fresh = PriceStore(data_dir=store.data_dir, drop_dir=store.drop_dir)
+    [stats] = fresh.ingest([dump(tmp_path, 'd2.csv', row('2021-01-02'))])
+    assert stats['added'] == {'rice': 1}
+    assert os.path.getsize(keys_path) == committed[1] + 8
+    assert list(pd.read_csv(partition)['t']) == ['2021-01-01', '2021-01-02']
+
+
+def test_keys_rebuilt_without_state(store, tmp_path):
+    store.ingest([dump(tmp_path, 'd1.csv', row('2021-01-01'))])
+    os.remove(os.path.join(store.index_dir, 'state.json'))
+
+    fresh = PriceStore(data_dir=store.data_dir, drop_dir=store.drop_dir)
+    [stats] = fresh.ingest([dump(tmp_path, 'd2.csv', row('2020-12-31'), row('2021-01-01'))])
+    assert stats['added'] == {}
+    assert stats['duplicates'] == 2
@@ -0,0 +1,223 @@
+import asyncio
+import json
+
+from flask import Flask
+
+from admission import AdmissionController
+from json_provider import FastJSONProvider
+from marketplace_async import MarketplaceApp
+
+
+async def call(app, method, path, query=b'', body=b'', headers=()):
+    """(status, headers, json) from one ASGI request"""
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': list(headers)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, response = sent
+    return start['status'], dict(start['headers']), json.loads(response['body'])
+
+
+class SlowDB:
+    """Product listings that block until ``release`` is set"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.entered = asyncio.Event()
+
+    async def products(self):
+        self.entered.set()
+        await self.release.wait()
+        return []
+
+    async def farmers(self, phone=None):
+        return []
+
+
+async def fallback(scope, receive, send):
+    raise AssertionError('should not fall back')
+
+
+def marketplace(db):
+    flask_app = Flask(__name__)
+    flask_app.json = FastJSONProvider(flask_app)
+    flask_app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        ADMISSION_LIMITS={'critical': (0, 0, 0.0), 'standard': (8, 16, 2.0), 'heavy': (1, 0, 0.0)}
+    )
+    admission = AdmissionController()
+    admission.init_app(flask_app)
+    return MarketplaceApp(flask_app, fallback, db=db, admission=admission), admission
+
+
+def test_product_listing_is_admitted_as_heavy():
+    db = SlowDB()
+    app, admission = marketplace(db)
+
+    async def run():
+        first = asyncio.ensure_future(call(app, 'GET', '/api/products'))
+        await db.entered.wait()
+        assert admission.classes['heavy'].active == 1
+
+        status, headers, payload = await call(app, 'GET', '/api/products')
+        assert status == 429
+        assert int(headers[b'retry-after']) >= 1
+        assert 'retry_after' in payload
+        # Farmer listings are standard and still get through
+        assert (await call(app, 'GET', '/api/farmers'))[0] == 200
+
+        db.release.set()
+        assert (await first)[0] == 200
+
+    asyncio.run(run())
+    assert admission.classes['heavy'].active == 0
+    assert admission.classes['standard'].active == 0
+
+
+def test_without_admission_nothing_is_limited():
+    db = SlowDB()
+    app, admission = marketplace(db)
+    app.admission = None
+    db.release.set()
+
+    async def run():
+        return await asyncio.gather(*(call(app, 'GET', '/api/products') for _ in range(3)))
+
+    assert [status for status, _, _ in asyncio.run(run())] == [200, 200, 200]
+
+
+def without_timestamp(payload):
+    return {key: value for key, value in payload.items() if key != 'timestamp'}
+
+
+def test_payloads_match_flask_views(app, client):
+    """Every read route answers the same JSON under Flask and under MarketplaceApp"""
+    async_app = MarketplaceApp(app, fallback)
+    phone = client.get('/api/farmers').get_json()['farmers'][0]['phone']
+    requests = [
+        ('/api/farmers', b''),
+        ('/api/farmers', f'phone={phone}'.encode()),
+        ('/api/farmers/1', b''),
+        ('/api/farmers/999', b''),
+        ('/api/farmers/1/products', b''),
+        ('/api/products', b'')
+    ]
+
+    async def run():
+        try:
+            return [await call(async_app, 'GET', path, query) for path, query in requests]
+        finally:
+            await async_app.db.dispose()
+
+    for (path, query), (status, _, payload) in zip(requests, asyncio.run(run())):
+        expected = client.get(path, query_string=query.decode())
+        assert status == expected.status_code, path
+        assert without_timestamp(payload) == without_timestamp(expected.get_json()), path
+
+
+def test_writes_match_flask_views(app, client):
+    async_app = MarketplaceApp(app, fallback)
+    farmer = {'name': 'Asha', 'district': 'Pune', 'taluka': 'Haveli'}
+    product = 'crop_name=Onion&quantity=12.5&expected_price=2100&district=Pune'
+
+    created = client.post('/api/farmers', json={**farmer, 'phone': '8000000001'})
+    assert created.status_code == 201
+    farmer_id = created.get_json()['farmer_id']
+    assert client.get(f'/api/farmers/{farmer_id}').get_json()['name'] == 'Asha'
+    duplicate = client.post('/api/farmers', json={**farmer, 'phone': '8000000001'}).get_json()
+    missing = client.post('/api/farmers', json={'name': 'Asha'})
+    added = client.post('/api/products', data=f'{product}&farmer_id={farmer_id}',
+                        content_type='application/x-www-form-urlencoded')
+    bad = client.post('/api/products', data=f'{product}&farmer_id=abc',
+                      content_type='application/x-www-form-urlencoded')
+
+    form = [(b'content-type', b'application/x-www-form-urlencoded')]
+
+    async def post(path, body, headers):
+        status, _, payload = await call(async_app, 'POST', path, body=body, headers=headers)
+        return status, payload
+
+    async def run():
+        try:
+            as_json = [(b'content-type', b'application/json')]
+            return [
+                await post('/api/farmers', json.dumps({**farmer, 'phone': '8000000002'}).encode(), as_json),
+                await post('/api/farmers', json.dumps({**farmer, 'phone': '8000000001'}).encode(), as_json),
+                await post('/api/farmers', b'{"name": "Asha"}', as_json),
+                await post('/api/products', f'{product}&farmer_id={farmer_id}'.encode(), form),
+                await post('/api/products', f'{product}&farmer_id=abc'.encode(), form)
+            ]
+        finally:
+            await async_app.db.dispose()
+
+    async_created, async_duplicate, async_missing, async_added, async_bad = asyncio.run(run())
+    assert async_created[0] == 201
+    assert async_created[1]['farmer_id'] == farmer_id + 1
+    assert {**async_created[1], 'farmer_id': farmer_id, 'phone': '8000000001'} == created.get_json()
+    assert async_duplicate == (400, duplicate)
+    assert async_missing == (missing.status_code, missing.get_json())
+    assert async_added[0] == added.status_code == 201
+    assert async_added[1]['product_id'] == added.get_json()['product_id'] + 1
+    assert async_bad == (bad.status_code, bad.get_json())
+
+
+def test_cors_headers_match_flask_views(app, client):
+    async_app = MarketplaceApp(app, fallback)
+    origins = ['http://localhost:3000', 'http://elsewhere.example']
+
+    async def run():
+        try:
+            return [await call(async_app, 'GET', '/api/products', headers=[(b'origin', origin.encode())])
+                    for origin in origins]
+        finally:
+            await async_app.db.dispose()
+
+    responses = asyncio.run(run())
+    for origin, (status, headers, _) in zip(origins, responses):
+        expected = client.get('/api/products', headers={'Origin': origin}).headers
+        assert headers.get(b'access-control-allow-origin') == (
+            expected['Access-Control-Allow-Origin'].encode() if 'Access-Control-Allow-Origin' in expected else None
+        )
+        assert (b'origin' in headers.get(b'vary', b'').lower()) == ('Origin' in expected.get('Vary', ''))
+    assert responses[0][1][b'access-control-allow-origin'] == b'http://localhost:3000'
+    assert b'access-control-allow-origin' not in responses[1][1]
+
+
+def test_body_over_max_content_length_is_rejected():
+    app, admission = marketplace(SlowDB())
+    app.flask_app.config['MAX_CONTENT_LENGTH'] = 100
+    received = []
+
+    async def chunks(scope, count):
+        """POST /api/products with ``count`` 40-byte chunks and no Content-Length"""
+        messages = [{'type': 'http.request', 'body': b'x' * 40, 'more_body': i < count - 1} for i in range(count)]
+        sent = []
+
+        async def receive():
+            received.append(1)
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        return sent[0]['status'], json.loads(sent[1]['body'])
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/products', 'query_string': b'', 'headers': []}
+    status, payload = asyncio.run(chunks(scope, 10))
+    assert status == 413
+    assert payload == {'error': 'Request body larger than 100 bytes'}
+    # Stops reading at the first chunk past the limit
+    assert len(received) == 3
+
+    received.clear()
+    declared = {**scope, 'headers': [(b'content-length', b'400')]}
+    assert asyncio.run(chunks(declared, 10))[0] == 413
+    assert received == []
+    assert admission.classes['heavy'].active == 0
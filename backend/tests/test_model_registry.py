@@ -0,0 +1,180 @@
+import json
+import os
+import pickle
+
+import pytest
+from sklearn.dummy import DummyRegressor
+from sklearn.preprocessing import LabelEncoder
+
+import forest_store
+import model_registry
+from checksums import file_hash
+from model_registry import ModelRegistry
+
+
+def write_model(path, price):
+    model = DummyRegressor(strategy='constant', constant=price).fit([[0]], [price])
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    files = {
+        'model': str(tmp_path / 'rice_model.pkl'),
+        'preprocessor': None,
+        'district_encoder': str(tmp_path / 'rice_district_encoder.pkl'),
+        'market_encoder': None
+    }
+    write_model(files['model'], 2000)
+    with open(files['district_encoder'], 'wb') as f:
+        pickle.dump(LabelEncoder().fit([' Pune', 'Nashik ']), f)
+    return tmp_path, files
+
+
+def registry_for(artifacts, validate=None, manifest=None):
+    _, files = artifacts
+    models, districts, available = {}, {}, []
+    registry = ModelRegistry({'rice': dict(files)}, models, districts, available,
+                             validate=validate, manifest=manifest)
+    swaps = []
+    registry.on_swap(swaps.append)
+    return registry, swaps
+
+
+def price(registry):
+    return registry.models['rice']['model'].predict([[0]])[0]
+
+
+def test_load_swaps_in_and_notifies(artifacts):
+    registry, swaps = registry_for(artifacts)
+    assert registry.load('rice')
+    assert price(registry) == 2000
+    assert registry.districts['rice'] == ['Pune', 'Nashik']
+    assert registry.available == ['rice']
+    assert swaps == ['rice']
+    assert registry.versions['rice']['previous_version'] is None
+
+    # Same content, even with a new mtime, is not a new version
+    bump_mtime(artifacts[1]['model'])
+    assert not registry.load('rice')
+    assert swaps == ['rice']
+
+
+def test_swap_replaces_the_table_entry(artifacts):
+    registry, swaps = registry_for(artifacts)
+    registry.load('rice')
+    old, old_version = registry.models['rice'], registry.versions['rice']['version']
+
+    write_model(artifacts[1]['model'], 2500)
+    assert registry.load('rice')
+    assert registry.models['rice'] is not old
+    # A request still holding the old model data keeps a consistent model
+    assert old['model'].predict([[0]])[0] == 2000
+    assert price(registry) == 2500
+    assert registry.versions['rice']['previous_version'] == old_version
+
+
+def test_check_waits_for_files_to_settle(artifacts):
+    registry, swaps = registry_for(artifacts)
+    registry.load('rice')
+    assert registry.check() == []
+
+    write_model(artifacts[1]['model'], 2500)
+    bump_mtime(artifacts[1]['model'])
+    assert registry.check() == []
+    assert price(registry) == 2000
+    assert registry.check() == ['rice']
+    assert price(registry) == 2500
+    assert swaps == ['rice', 'rice']
+
+
+def test_check_without_settle_reloads_at_once(artifacts):
+    registry, swaps = registry_for(artifacts)
+    registry.load('rice')
+    write_model(artifacts[1]['model'], 2500)
+    bump_mtime(artifacts[1]['model'])
+    assert registry.check(settle=False) == ['rice']
+
+
+def test_failed_smoke_test_keeps_current_model(artifacts):
+    def validate(commodity, model_data):
+        if model_data['model'].predict([[0]])[0] < 0:
+            raise ValueError('negative price')
+
+    registry, swaps = registry_for(artifacts, validate=validate)
+    registry.load('rice')
+    version = registry.versions['rice']['version']
+
+    write_model(artifacts[1]['model'], -5)
+    bump_mtime(artifacts[1]['model'])
+    assert registry.check(settle=False) == []
+    assert price(registry) == 2000
+    assert registry.versions['rice']['version'] == version
+    assert swaps == ['rice']
+    # Not retried until the files change again
+    assert registry.check(settle=False) == []
+
+
+def write_manifest(tmp_path, hashes):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({'commodities': {'rice': {
+        'files': {'model': 'rice_model.pkl', 'district_encoder': 'rice_district_encoder.pkl'},
+        'hashes': hashes,
+        'trained_at': '2026-01-01T00:00:00'
+    }}}))
+    return str(manifest)
+
+
+def test_manifest_hash_mismatch_is_rejected(artifacts):
+    tmp_path, files = artifacts
+    manifest = write_manifest(tmp_path, {
+        'model': 'not-the-hash', 'district_encoder': file_hash(files['district_encoder'])
+    })
+    registry, swaps = registry_for(artifacts, manifest=manifest)
+    assert registry.refresh_manifest() == ['rice']
+    with pytest.raises(ValueError, match='model'):
+        registry.load('rice')
+    assert 'rice' not in registry.models
+    assert swaps == []
+
+
+def test_manifest_match_loads(artifacts):
+    tmp_path, files = artifacts
+    manifest = write_manifest(tmp_path, {name: file_hash(files[name]) for name in ('model', 'district_encoder')})
+    registry, swaps = registry_for(artifacts, manifest=manifest)
+    assert registry.load_all() == ['rice']
+    assert registry.versions['rice']['trained_at'] == '2026-01-01T00:00:00'
+
+
+def test_each_artifact_is_hashed_once(artifacts, monkeypatch):
+    tmp_path, files = artifacts
+    manifest = write_manifest(tmp_path, {name: file_hash(files[name]) for name in ('model', 'district_encoder')})
+    registry, swaps = registry_for(artifacts, manifest=manifest)
+    registry.refresh_manifest()
+
+    hashed = []
+
+    def counting_hash(path):
+        hashed.append(path)
+        return file_hash(path)
+    monkeypatch.setattr(model_registry, 'file_hash', counting_hash)
+    monkeypatch.setattr(forest_store, 'file_hash', counting_hash)
+    assert registry.load('rice')
+    assert sorted(hashed) == sorted([files['model'], files['district_encoder']])
+
+
+def test_failing_listener_does_not_undo_the_swap(artifacts):
+    registry, swaps = registry_for(artifacts)
+
+    def broken(commodity):
+        raise RuntimeError('listener failed')
+    registry._listeners.insert(0, broken)
+    assert registry.load('rice')
+    assert price(registry) == 2000
+    assert swaps == ['rice']
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+import pytest
+
+from predictor import PredictionError, row_date
+
+ROW = {'commodity': 'rice', 'district': 'bhandara', 'market': 'bhandara'}
+NOW = datetime(2025, 1, 15, 10, 30)
+
+
+def test_row_date():
+    assert row_date(None, NOW) is NOW
+    assert row_date('', NOW) is NOW
+    assert row_date('2025-03-04', NOW) == datetime(2025, 3, 4)
+    assert row_date('2025-03-04T08:00:00+05:30', NOW) == datetime(2025, 3, 4, 8)
+    assert row_date(date(2025, 3, 4), NOW) == datetime(2025, 3, 4)
+    for bad in ('04/03/2025', 'tomorrow', 20250304, ['2025-03-04']):
+        with pytest.raises(PredictionError) as error:
+            row_date(bad, NOW)
+        assert error.value.code == 'invalidDate'
+
+
+@pytest.fixture(scope='module')
+def rice_model(app):
+    from app import COMMODITY_MODELS, load_commodity_models
+
+    load_commodity_models()
+    if 'rice' not in COMMODITY_MODELS:
+        pytest.skip('rice model not available')
+
+
+def test_bad_date_fails_only_its_row(client, rice_model):
+    response = client.post('/api/predict', json={'rows': [
+        dict(ROW, date='2025-03-04'),
+        dict(ROW, date='not a date'),
+        dict(ROW),
+        dict(ROW, date=12)
+    ]})
+    assert response.status_code == 200
+    predictions = response.get_json()['predictions']
+    assert predictions[0]['predicted_price'] > 0 and predictions[2]['predicted_price'] > 0
+    assert predictions[1]['status'] == 'error' and 'not a date' in predictions[1]['error']
+    assert predictions[3]['status'] == 'error'
+
+
+def test_non_text_inputs_fail_only_their_row(client, rice_model):
+    response = client.post('/api/predict', json={'rows': [
+        dict(ROW, commodity=3),
+        dict(ROW, district=['bhandara']),
+        dict(ROW, market={'name': 'bhandara'}),
+        dict(ROW)
+    ]})
+    assert response.status_code == 200
+    predictions = response.get_json()['predictions']
+    assert [p['status'] for p in predictions] == ['error', 'error', 'error', 'success']
+    assert predictions[0]['error'] == "'commodity' must be text, got int"
+
+
+def test_non_text_single_input_is_400(client):
+    response = client.post('/api/predict', json={'commodity': 3, 'district': 'bhandara', 'market': 'bhandara'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "'commodity' must be text, got int"
+
+
+class RecordingFlights:
+    def __init__(self):
+        self.keys = []
+
+    def do(self, key, fn, group=None):
+        self.keys.append(key)
+        return key
+
+
+def test_single_flight_key_follows_resolve():
+    from predictor import PricePredictor
+
+    flights = RecordingFlights()
+    predictor = PricePredictor({}, {}, {}, flights=flights)
+    for commodity in ('rice', 'Rice', ' rice', None, 'none', ''):
+        predictor.predict_one(commodity, 'bhandara', 'bhandara', NOW)
+    rice, upper, padded, missing, none, empty = flights.keys
+    assert rice == upper
+    assert padded != rice
+    assert missing == empty != none
+    with pytest.raises(PredictionError):
+        predictor.predict_one(3, 'bhandara', 'bhandara', NOW)
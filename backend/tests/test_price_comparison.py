@@ -0,0 +1,32 @@
+def test_batch_reports_bad_rows_individually(client):
+    response = client.post('/api/price-comparison', json={'rows': [
+        [1, 2],
+        'rice',
+        {'commodity': 'rice'},
+        {'commodity': 'rice', 'district': 'bhandara', 'predicted_price': 'abc'},
+        {'commodity': 'rice', 'district': 'bhandara', 'predicted_price': 2500}
+    ]})
+    assert response.status_code == 200
+    comparisons = response.get_json()['comparisons']
+    assert [c['index'] for c in comparisons] == [0, 1, 2, 3, 4]
+    assert comparisons[0]['error'] == comparisons[1]['error'] == 'Each row must be an object'
+    assert comparisons[2]['error'] == 'Commodity and predicted_price are required'
+    assert comparisons[3]['error'] == 'Invalid predicted_price'
+    assert 'error' not in comparisons[4]
+
+
+def test_rows_must_be_a_list(client):
+    assert client.post('/api/price-comparison', json={'rows': {'commodity': 'rice'}}).status_code == 400
+
+
+def test_single_row_invalid_price_is_400(client):
+    for price in ('abc', [2500], {'value': 2500}):
+        response = client.post('/api/price-comparison', json={
+            'commodity': 'rice', 'district': 'bhandara', 'predicted_price': price
+        })
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid predicted_price'
+    response = client.post('/api/price-comparison', json={
+        'commodity': 'rice', 'district': 'bhandara', 'predicted_price': '2500'
+    })
+    assert response.status_code == 200
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_stats
+
+RNG = np.random.default_rng(7)
+SERIES = 2000 + np.cumsum(RNG.normal(0, 40, 60))
+BATCH = 2000 + np.cumsum(RNG.normal(0, 40, (5, 60)), axis=1)
+
+
+@pytest.mark.parametrize('window', [1, 7, 30])
+def test_rolling_matches_pandas(window):
+    series = pd.Series(SERIES)
+    np.testing.assert_allclose(price_stats.rolling_mean(SERIES, window), series.rolling(window).mean().dropna())
+    np.testing.assert_allclose(
+        price_stats.rolling_std(SERIES, window, ddof=0), series.rolling(window).std(ddof=0).dropna(), atol=1e-3
+    )
+    if window > 1:
+        np.testing.assert_allclose(
+            price_stats.rolling_std(SERIES, window, ddof=1), series.rolling(window).std().dropna(), atol=1e-3
+        )
+
+
+def test_rolling_short_series_is_empty():
+    assert price_stats.rolling_mean(SERIES[:3], 7).shape == (0,)
+    assert price_stats.rolling_std(BATCH[:, :3], 7).shape == (5, 0)
+
+
+@pytest.mark.parametrize('span', [3, 10])
+def test_ewma_matches_pandas(span):
+    expected = pd.Series(SERIES).ewm(span=span, adjust=False).mean()
+    np.testing.assert_allclose(price_stats.ewma(SERIES, span=span), expected)
+    np.testing.assert_allclose(price_stats.ewma(BATCH, span=span)[2], pd.Series(BATCH[2]).ewm(span=span, adjust=False).mean())
+
+
+def test_returns_and_volatility_match_pandas():
+    series = pd.Series(SERIES)
+    np.testing.assert_allclose(price_stats.returns(SERIES, log=False), series.pct_change().dropna())
+    np.testing.assert_allclose(price_stats.returns(SERIES), np.log(series).diff().dropna())
+    assert price_stats.volatility(SERIES, log=False) == pytest.approx(series.pct_change().std(ddof=0) * 100)
+
+
+def test_returns_skip_non_positive_prices():
+    r = price_stats.returns([100, 0, 50, 55], log=False)
+    assert r[0] == -1.0 and np.isnan(r[1]) and r[2] == pytest.approx(0.1)
+    assert price_stats.volatility([100]) == 0.0
+    assert price_stats.volatility([0, 0, 0]) == 0.0
+
+
+def test_drawdown_and_slope():
+    assert price_stats.max_drawdown([100, 120, 90, 130, 117]) == pytest.approx(-25.0)
+    np.testing.assert_allclose(price_stats.drawdown([100, 120, 90]), [0, 0, -0.25])
+    assert price_stats.trend_slope(SERIES) == pytest.approx(np.polyfit(np.arange(len(SERIES)), SERIES, 1)[0])
+    assert price_stats.pct_change([200, 250]) == pytest.approx(25.0)
+    assert price_stats.pct_change([0, 250]) == 0.0
+
+
+def test_batch_matches_single_series():
+    batch = price_stats.summarize(BATCH)
+    for i, row in enumerate(BATCH):
+        single = price_stats.summarize(row)
+        for name, value in single.items():
+            assert batch[name][i] == pytest.approx(value), name
+
+
+def test_summarize_and_trend_direction():
+    stats = price_stats.summarize(np.arange(1, 15, dtype=float))
+    assert stats['current'] == 14 and stats['min'] == 1 and stats['mean'] == 7.5
+    assert stats['recent_mean'] == 11 and stats['earlier_mean'] == 4
+    assert price_stats.trend_direction(stats['recent_mean'], stats['earlier_mean']) == 'up'
+    assert price_stats.trend_direction(3, 4) == 'down'
+    assert price_stats.trend_direction(None, 4) == 'stable'
+    # Shorter than one window: no trend
+    assert price_stats.summarize([1.0, 2.0])['recent_mean'] is None
+    assert price_stats.summarize([])['current'] == 0
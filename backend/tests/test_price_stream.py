@@ -0,0 +1,157 @@
+import pytest
+
+from price_stream import PriceStream, StreamFull
+
+# Long enough that the producer thread never polls during a test
+POLL = 3600
+
+
+def subscribers():
+    from app import PRICE_STREAM
+    return len(PRICE_STREAM._subscribers)
+
+
+def test_rejects_bad_commodity(client):
+    assert client.get('/api/stream/prices').status_code == 400
+    assert client.get('/api/stream/prices?commodity=nosuchcrop').status_code == 404
+
+
+def test_head_does_not_subscribe(client):
+    for _ in range(3):
+        response = client.head('/api/stream/prices?commodity=rice')
+        assert response.status_code == 200
+        response.close()
+    assert subscribers() == 0
+
+
+def test_unread_get_does_not_subscribe(client):
+    response = client.get('/api/stream/prices?commodity=rice', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    response.close()
+    assert subscribers() == 0
+
+
+def test_get_unsubscribes_on_close(client):
+    response = client.get('/api/stream/prices?commodity=rice', buffered=False)
+    body = iter(response.response)
+    assert next(body) == b'retry: 5000\n\n'
+    assert subscribers() == 1
+    # No new prices: the next chunk is a heartbeat (or the snapshot, then a heartbeat)
+    chunks = [next(body), next(body)]
+    assert b': heartbeat\n\n' in chunks
+    response.close()
+    assert subscribers() == 0
+
+
+class FakeFeatures:
+    """Two district series and one market series of a feature store"""
+
+    def __init__(self):
+        import numpy as np
+
+        self.index = {
+            ('rice', 'district', 'pune'): 0,
+            ('rice', 'district', 'nashik'): 1,
+            ('rice', 'market', 'pune'): 2
+        }
+        self.values = np.array([[100.0, 10.0], [200.0, 10.0], [300.0, 10.0]])
+
+    def snapshot(self):
+        return self.index, self.values
+
+    @staticmethod
+    def column(name):
+        return {'p_modal': 0, 'last_day': 1}[name]
+
+    def describe(self, row):
+        return {'p_modal': float(row[0]), 'last_day': float(row[1])}
+
+
+def test_poll_fans_out_new_observations():
+    features = FakeFeatures()
+    stream = PriceStream(features, {'rice': {}}, poll_interval=POLL)
+    stream.poll()
+    pune = stream.subscribe('rice', 'Pune', lambda: None)
+    everyone = stream.subscribe('rice', None, lambda: None)
+    # Snapshot of the matching district series on subscribe
+    assert len(pune.drain()) == 1
+    assert len(everyone.drain()) == 2
+
+    assert stream.poll() == 0
+    features.values[0, 1] = 11.0
+    assert stream.poll() == 1
+    [event] = pune.drain()
+    assert '"district":"pune"' in event and '"p_modal":100.0' in event
+    assert len(everyone.drain()) == 1
+
+    stream.unsubscribe(pune)
+    stream.unsubscribe(everyone)
+
+
+def test_slow_client_keeps_newest_events():
+    stream = PriceStream(FakeFeatures(), {'rice': {}}, poll_interval=POLL, buffer=2)
+    sub = stream.subscribe('rice', None, lambda: None)
+    for event in ('a', 'b', 'c'):
+        sub.push(event)
+    assert sub.drain() == ['b', 'c']
+    assert sub.dropped >= 1
+    stream.unsubscribe(sub)
+
+
+def test_max_clients():
+    stream = PriceStream(FakeFeatures(), {'rice': {}}, poll_interval=POLL, max_clients=1)
+    sub = stream.subscribe('rice', None, lambda: None)
+    with pytest.raises(StreamFull):
+        stream.subscribe('rice', None, lambda: None)
+    with pytest.raises(StreamFull):
+        stream.events('rice', None)
+    stream.unsubscribe(sub)
+    assert not stream.full()
+
+
+def stream_call(app, query, origin='http://localhost:3000'):
+    """Status and headers of an ASGI stream request; the client disconnects after the first chunk"""
+    import asyncio
+
+    from app import PRICE_STREAM
+    from price_stream import StreamApp
+
+    async def fallback(scope, receive, send):
+        raise AssertionError('should not fall back')
+
+    async def run():
+        started = asyncio.Event()
+        sent = []
+
+        async def receive():
+            await started.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body':
+                started.set()
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/stream/prices', 'query_string': query,
+                 'headers': [(b'origin', origin.encode())]}
+        await StreamApp(PRICE_STREAM, fallback, app)(scope, receive, send)
+        return sent[0]['status'], dict(sent[0]['headers'])
+
+    return asyncio.run(run())
+
+
+def test_asgi_stream_sends_cors_headers(app, client):
+    expected = client.get('/api/stream/prices', headers={'Origin': 'http://localhost:3000'})
+    status, headers = stream_call(app, b'')
+    assert status == expected.status_code == 400
+    assert headers[b'access-control-allow-origin'] == expected.headers['Access-Control-Allow-Origin'].encode()
+
+    status, headers = stream_call(app, b'commodity=rice')
+    assert status == 200
+    assert headers[b'content-type'].startswith(b'text/event-stream')
+    assert headers[b'access-control-allow-origin'] == b'http://localhost:3000'
+    assert b'Origin' in headers[b'vary']
+    assert subscribers() == 0
+
+    status, headers = stream_call(app, b'commodity=rice', origin='http://elsewhere.example')
+    assert b'access-control-allow-origin' not in headers
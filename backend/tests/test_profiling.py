@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from flask import Flask, jsonify
+
+import profiling
+
+
+def profiled_app(tmp_path, token):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, PROFILE_DIR=str(tmp_path), PROFILE_TOKEN=token, PROFILE_SAMPLE_RATE=0)
+
+    @app.route('/work')
+    def work():
+        return jsonify({'ok': True})
+
+    profiling.init_app(app)
+    return app.test_client()
+
+
+def stored(tmp_path):
+    return [name for name in os.listdir(tmp_path) if name.endswith('.json')]
+
+
+@pytest.mark.parametrize('mode', ['cprofile', '1'])
+def test_without_token_header_profiling_is_refused(tmp_path, mode):
+    client = profiled_app(tmp_path, None)
+    response = client.get('/work', headers={'X-Profile': mode, 'X-Profile-Token': ''})
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+    assert stored(tmp_path) == []
+
+
+def test_without_token_debug_endpoints_are_refused(tmp_path):
+    client = profiled_app(tmp_path, None)
+    assert client.get('/debug/profiles').status_code == 403
+    assert client.get('/debug/profiles?token=').status_code == 403
+    assert client.get('/debug/profiles/abc').status_code == 403
+
+
+def test_with_token(tmp_path):
+    client = profiled_app(tmp_path, 's3cret')
+
+    refused = client.get('/work', headers={'X-Profile': 'cprofile', 'X-Profile-Token': 'wrong'})
+    assert 'X-Profile-Id' not in refused.headers
+    assert client.get('/debug/profiles?token=wrong').status_code == 403
+
+    response = client.get('/work', headers={'X-Profile': 'cprofile', 'X-Profile-Token': 's3cret'})
+    profile_id = response.headers['X-Profile-Id']
+    assert stored(tmp_path) == [f'{profile_id}.json']
+
+    listing = client.get('/debug/profiles', headers={'X-Profile-Token': 's3cret'}).get_json()
+    assert [profile['id'] for profile in listing['profiles']] == [profile_id]
+    download = client.get(f'/debug/profiles/{profile_id}?token=s3cret')
+    assert download.status_code == 200
+    assert download.mimetype == 'application/octet-stream'
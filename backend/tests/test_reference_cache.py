@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+import compression
+import reference_cache
+from reference_cache import ReferenceCache
+
+
+@pytest.fixture
+def cache_app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, REFERENCE_MAX_ENTRIES=2)
+    reference_cache.init_app(app)
+    compression.init_app(app)
+    cache = ReferenceCache()
+    renders = []
+
+    @app.route('/item/<name>')
+    @cache.cached(cacheable=lambda view_args, args: view_args['name'] != 'junk')
+    def item(name):
+        renders.append(name)
+        return jsonify({'name': name})
+
+    @app.route('/short/<name>')
+    @cache.cached(ttl=0.05)
+    def short(name):
+        renders.append(name)
+        return jsonify({'name': name})
+
+    return app.test_client(), cache, renders
+
+
+def cached_names(cache):
+    return [dict(key[1])['name'] for key in cache._entries]
+
+
+def test_least_recently_used_entry_is_evicted(cache_app):
+    client, cache, renders = cache_app
+    for name in ('a', 'b', 'a', 'c'):
+        assert client.get(f'/item/{name}').status_code == 200
+    assert cached_names(cache) == ['a', 'c']
+    client.get('/item/a')
+    client.get('/item/b')
+    assert renders == ['a', 'b', 'c', 'b']
+
+
+def test_expired_entries_are_evicted_first(cache_app):
+    client, cache, renders = cache_app
+    client.get('/short/old')
+    client.get('/item/a')
+    time.sleep(0.06)
+    client.get('/item/b')
+    assert cached_names(cache) == ['a', 'b']
+
+
+def test_uncacheable_requests_are_served_but_not_stored(cache_app):
+    client, cache, renders = cache_app
+    client.get('/item/a')
+    for _ in range(3):
+        assert client.get('/item/junk').get_json() == {'name': 'junk'}
+    assert cached_names(cache) == ['a']
+    assert renders == ['a', 'junk', 'junk', 'junk']
+
+
+def test_app_caches_only_known_values(client):
+    from app import DISTRICT_TO_MARKETS, REFERENCE_CACHE
+
+    district = next(iter(DISTRICT_TO_MARKETS))
+    before = len(REFERENCE_CACHE)
+    # Partial district names and unknown languages still answer, uncached
+    assert client.get(f'/api/markets/{district[:3]}').status_code == 200
+    assert client.get(f'/api/markets/{district}?language=xx').status_code == 200
+    assert client.get('/api/price-trend/rice?days=99999').status_code != 500
+    assert len(REFERENCE_CACHE) == before
+    assert client.get(f'/api/markets/{district}?language=hi').status_code == 200
+    assert len(REFERENCE_CACHE) <= before + 1
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from flask import Flask
+
+from single_flight import SingleFlight
+
+
+def run_followers(flights, key, fn, count, **kwargs):
+    """Start ``count`` callers of the same key; returns (threads, results, errors)"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flights.do(key, fn, **kwargs))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls, gate = [], threading.Event()
+
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return {'price': 42}
+
+    threads, results, errors = run_followers(flights, ('predict', 'rice'), compute, 8)
+    deadline = time.monotonic() + 5
+    while flights.in_flight() != 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert errors == []
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert flights.in_flight() == 0
+
+
+def test_followers_get_the_leaders_exception():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def fail():
+        gate.wait(5)
+        raise ValueError('model missing')
+
+    threads, results, errors = run_followers(flights, 'key', fail, 4)
+    time.sleep(0.05)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == []
+    assert len(errors) == 4 and all(isinstance(e, ValueError) for e in errors)
+    # The failed call is not cached
+    assert flights.do('key', lambda: 'ok') == 'ok'
+
+
+def test_follower_timeout_computes_itself():
+    flights = SingleFlight(timeout=0.05)
+    gate = threading.Event()
+    leader = threading.Thread(target=lambda: flights.do('key', lambda: gate.wait(5) and 'leader'), daemon=True)
+    leader.start()
+    while flights.in_flight() != 1:
+        time.sleep(0.005)
+
+    start = time.monotonic()
+    assert flights.do('key', lambda: 'follower') == 'follower'
+    assert 0.05 <= time.monotonic() - start < 1
+    gate.set()
+    leader.join(5)
+
+
+def test_group_timeouts_and_disabling():
+    app = Flask(__name__)
+    app.config.update(COALESCE_TIMEOUT=3, COALESCE_TIMEOUTS={'analytics': 20})
+    flights = SingleFlight()
+    flights.init_app(app)
+    assert flights.enabled and flights.timeouts == {'analytics': 20}
+
+    app.config['COALESCE_TIMEOUT'] = 0
+    flights.init_app(app)
+    assert not flights.enabled
+    calls = []
+    for _ in range(3):
+        flights.do('key', lambda: calls.append(1))
+    assert len(calls) == 3
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    gate, calls = threading.Event(), []
+
+    def compute(name):
+        calls.append(name)
+        gate.wait(5)
+        return name
+
+    threads = [
+        threading.Thread(target=lambda name=name: flights.do(name, lambda: compute(name)), daemon=True)
+        for name in ('rice', 'wheat')
+    ]
+    for thread in threads:
+        thread.start()
+    while flights.in_flight() != 2:
+        time.sleep(0.005)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(calls) == ['rice', 'wheat']
+
@@ -0,0 +1,375 @@
+"""
+Reproducible training pipeline for the commodity price models.
+
+Replaces the per-commodity ``*priceprediction.ipynb`` notebooks with one
+code path (load -> parse dates -> encode -> clean -> impute/scale ->
+RandomForest) and trains every commodity in parallel, one process per
+commodity. Artifacts are written atomically as
+``<commodity>_{model,preprocessor,district_encoder,market_encoder}.pkl``
+and described in ``manifest.json`` (file hashes, input data hash, feature
+schema, hyperparameters and hold-out metrics). The server's model registry
+reads the manifest, so retrained models are hot-reloaded without touching
+COMMODITY_FILES.
+
+Rows added by ``python -m ingest`` are kept out of the tracked CSVs, in
+data/ingested/<commodity>.csv; training reads both. A commodity is skipped
+when its input CSVs and the training configuration hash to the same value
+as in the manifest and its artifacts are intact.
+
+    python -m train                          # every commodity with data
+    python -m train rice papaya --force      # retrain selected commodities
+    python -m train --jobs 4 --forest-jobs 2
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from checksums import file_hash, new_digest
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+MODELS_DIR = os.path.join(BACKEND_DIR, 'models')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 1
+
+# Input CSV per commodity (relative to the data directory) and its date format;
+# None parses day-first dates the way the fruit/vegetable notebooks did
+COMMODITY_SOURCES = {
+    'bajra': ('foods_grains/Bajra.csv', '%m/%d/%Y'),
+    'brinjal': ('vegetables/bringal.csv', None),
+    'cabbage': ('vegetables/cabbage.csv', None),
+    'chikoo': ('fruits/chikoo.csv', None),
+    'cotton': ('foods_grains/Cotton.csv', '%m/%d/%Y'),
+    'grapes': ('fruits/grapes.csv', None),
+    'greenchilli': ('vegetables/greenchilli.csv', None),
+    'jowar': ('foods_grains/jowar.csv', '%m/%d/%Y'),
+    'mangos': ('fruits/mangos.csv', None),
+    'onion': ('vegetables/onion.csv', None),
+    'orange': ('fruits/orange.csv', None),
+    'papaya': ('fruits/papaya.csv', None),
+    'rice': ('foods_grains/rice.csv', '%m/%d/%Y'),
+    'tomato': ('vegetables/tomato.csv', None),
+    'wheat': ('foods_grains/Wheat.csv', '%m/%d/%Y')
+}
+
+# Ingested rows per commodity (relative to the data directory), always ISO dates
+INGESTED_DIR = 'ingested'
+INGESTED_DATE_FORMAT = '%Y-%m-%d'
+
+# Feature schema the notebooks trained on (same order as predictor.FEATURE_COLUMNS)
+FEATURES = (
+    'market_id', 'state_id', 'district_id', 'p_min', 'p_max',
+    'Year', 'Month', 'Day', 'district_encoded'
+)
+TARGET = 'p_modal'
+
+# Rows outside these bounds are treated as data entry errors
+PRICE_BOUNDS = {'p_modal': (500, 10000), 'p_min': (0, 10000), 'p_max': (0, 10000)}
+
+FOREST_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'random_state': 42
+}
+TEST_FRACTION = 0.2
+
+ARTIFACTS = ('model', 'preprocessor', 'district_encoder', 'market_encoder')
+
+logger = logging.getLogger('train')
+
+
+def training_config(date_format):
+    """Everything besides the data that determines the trained model"""
+    return {
+        'features': list(FEATURES),
+        'target': TARGET,
+        'price_bounds': {column: list(bounds) for column, bounds in PRICE_BOUNDS.items()},
+        'forest_params': FOREST_PARAMS,
+        'test_fraction': TEST_FRACTION,
+        'date_format': date_format
+    }
+
+
+def ingested_path(data_dir, commodity):
+    return os.path.join(data_dir, INGESTED_DIR, f'{commodity}.csv')
+
+
+def input_hash(paths, config):
+    digest = new_digest()
+    for path in paths:
+        digest.update(file_hash(path).encode())
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def artifact_paths(commodity, out_dir):
+    return {name: os.path.join(out_dir, f'{commodity}_{name}.pkl') for name in ARTIFACTS}
+
+
+def atomic_write(path, write):
+    """Write via a temp file in the same directory so readers never see partial files"""
+    fd, tmp = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ---------- manifest ----------
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'format': MANIFEST_FORMAT, 'commodities': {}}
+    manifest.setdefault('commodities', {})
+    return manifest
+
+
+def write_manifest(out_dir, manifest):
+    manifest['format'] = MANIFEST_FORMAT
+    manifest['generated_at'] = datetime.now().replace(microsecond=0).isoformat()
+    data = json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    atomic_write(os.path.join(out_dir, MANIFEST_NAME), lambda f: f.write(data))
+
+
+def is_current(entry, digest, out_dir):
+    """True if the manifest entry was trained from this input and its artifacts are untouched"""
+    if not entry or entry.get('input', {}).get('hash') != digest:
+        return False
+    for name, filename in entry.get('files', {}).items():
+        path = os.path.join(out_dir, filename)
+        if not os.path.exists(path) or file_hash(path) != entry['hashes'].get(name):
+            return False
+    return True
+
+
+# ---------- training ----------
+
+def load_frame(path, date_format, ingested=None):
+    import pandas as pd
+
+    parts = []
+    for part_path, part_format in [(path, date_format)] + ([(ingested, INGESTED_DATE_FORMAT)] if ingested else []):
+        part = pd.read_csv(part_path).rename(columns={'t': 'date'})
+        if part_format:
+            part['date'] = pd.to_datetime(part['date'], format=part_format, errors='coerce')
+        else:
+            part['date'] = pd.to_datetime(part['date'], errors='coerce', dayfirst=True)
+        parts.append(part)
+    df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+    df = df.dropna(subset=['date']).sort_values('date', kind='stable')
+
+    df['Year'] = df['date'].dt.year
+    df['Month'] = df['date'].dt.month
+    df['Day'] = df['date'].dt.day
+    return df
+
+
+def clean(df):
+    for column, (low, high) in PRICE_BOUNDS.items():
+        df = df[(df[column] > low) & (df[column] < high)]
+    df = df.copy()
+    df['p_min'] = df['p_min'].fillna(df[TARGET] * 0.9)
+    df['p_max'] = df['p_max'].fillna(df[TARGET] * 1.1)
+    return df
+
+
+def regression_metrics(y_true, y_pred):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    if len(y_true) == 0:
+        return None
+    return {
+        'rmse': round(float(np.sqrt(mean_squared_error(y_true, y_pred))), 4),
+        'mae': round(float(mean_absolute_error(y_true, y_pred)), 4),
+        'r2': round(float(r2_score(y_true, y_pred)), 6) if len(y_true) > 1 else None,
+        'rows': int(len(y_true))
+    }
+
+
+def train_commodity(commodity, data_path, date_format, out_dir, forest_jobs=1, ingested=None):
+    """Train one commodity (plus its ingested rows, if any) and write its artifacts; returns its manifest entry"""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    warnings.filterwarnings('ignore')
+    start = time.perf_counter()
+    config = training_config(date_format)
+    digest = input_hash([data_path] + ([ingested] if ingested else []), config)
+
+    df = load_frame(data_path, date_format, ingested)
+    district_encoder = LabelEncoder()
+    market_encoder = LabelEncoder()
+    df['district_encoded'] = district_encoder.fit_transform(df['district_name'])
+    df['market_encoded'] = market_encoder.fit_transform(df['market_name'])
+    df = clean(df)
+    if df.empty:
+        raise ValueError('no rows left after cleaning')
+
+    # Time-based hold-out: the most recent TEST_FRACTION of days
+    split_date = df['date'].quantile(1 - TEST_FRACTION)
+    train_mask = (df['date'] < split_date).to_numpy()
+    if not train_mask.any():
+        train_mask[:] = True
+    X = df[list(FEATURES)].to_numpy(dtype=float)
+    y = df[TARGET].to_numpy(dtype=float)
+    X_train, y_train = X[train_mask], y[train_mask]
+    X_test, y_test = X[~train_mask], y[~train_mask]
+
+    preprocessor = Pipeline([
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler()),
+    ])
+    X_train_prepared = preprocessor.fit_transform(X_train)
+    model = RandomForestRegressor(n_jobs=forest_jobs, **FOREST_PARAMS)
+    model.fit(X_train_prepared, y_train)
+    model.n_jobs = None  # Serving predicts one small batch at a time
+
+    metrics = {
+        'train': regression_metrics(y_train, model.predict(X_train_prepared)),
+        'test': regression_metrics(y_test, model.predict(preprocessor.transform(X_test))) if len(y_test) else None
+    }
+
+    paths = artifact_paths(commodity, out_dir)
+    objects = {
+        'model': model,
+        'preprocessor': preprocessor,
+        'district_encoder': district_encoder,
+        'market_encoder': market_encoder
+    }
+    # Model last: the registry only sees a complete set once the model changes
+    for name in ('preprocessor', 'district_encoder', 'market_encoder', 'model'):
+        atomic_write(paths[name], lambda f, obj=objects[name]: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    try:
+        import forest_store
+        forest_store.export(model, paths['model'])
+    except Exception as e:
+        logger.warning(f"⚠️ {commodity}: memory-mapped export skipped: {str(e)}")
+
+    return {
+        'files': {name: os.path.basename(path) for name, path in paths.items()},
+        'hashes': {name: file_hash(path) for name, path in paths.items()},
+        'input': {
+            'path': os.path.relpath(data_path, BACKEND_DIR),
+            'ingested': os.path.relpath(ingested, BACKEND_DIR) if ingested else None,
+            'hash': digest,
+            'rows': int(len(df)),
+            'period': [df['date'].min().date().isoformat(), df['date'].max().date().isoformat()]
+        },
+        'features': list(FEATURES),
+        'target': TARGET,
+        'params': dict(FOREST_PARAMS),
+        'districts': [str(d).strip() for d in district_encoder.classes_],
+        'markets': int(len(market_encoder.classes_)),
+        'metrics': metrics,
+        'trained_at': datetime.now().replace(microsecond=0).isoformat(),
+        'duration_s': round(time.perf_counter() - start, 3)
+    }
+
+
+def plan(commodities, data_dir, out_dir, manifest, force=False):
+    """Split the requested commodities into (to_train, skipped, missing)"""
+    to_train, skipped, missing = {}, [], []
+    for commodity in commodities:
+        relative, date_format = COMMODITY_SOURCES[commodity]
+        data_path = os.path.join(data_dir, relative)
+        if not os.path.exists(data_path):
+            missing.append(commodity)
+            continue
+        ingested = ingested_path(data_dir, commodity)
+        if not os.path.exists(ingested):
+            ingested = None
+        digest = input_hash([data_path] + ([ingested] if ingested else []), training_config(date_format))
+        if not force and is_current(manifest['commodities'].get(commodity), digest, out_dir):
+            skipped.append(commodity)
+            continue
+        to_train[commodity] = (data_path, date_format, ingested)
+    return to_train, skipped, missing
+
+
+def run(commodities=None, data_dir=DATA_DIR, out_dir=MODELS_DIR, jobs=None, forest_jobs=1, force=False):
+    """Train in a process pool; returns {'trained': [...], 'skipped': [...], 'missing': [...], 'failed': {...}}"""
+    commodities = list(commodities or COMMODITY_SOURCES)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    to_train, skipped, missing = plan(commodities, data_dir, out_dir, manifest, force)
+
+    for commodity in skipped:
+        logger.info(f"⏭️ {commodity}: input unchanged, skipped")
+    for commodity in missing:
+        logger.warning(f"⚠️ {commodity}: no data at {os.path.join(data_dir, COMMODITY_SOURCES[commodity][0])}")
+
+    trained, failed = [], {}
+    if to_train:
+        jobs = jobs or max(1, (os.cpu_count() or 1) // max(1, forest_jobs))
+        jobs = min(jobs, len(to_train))
+        logger.info(f"🚀 Training {len(to_train)} commodities with {jobs} processes x {forest_jobs} forest jobs")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(train_commodity, commodity, data_path, date_format, out_dir, forest_jobs, ingested): commodity
+                for commodity, (data_path, date_format, ingested) in to_train.items()
+            }
+            for future in as_completed(futures):
+                commodity = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    failed[commodity] = str(e)
+                    logger.error(f"❌ {commodity}: training failed: {str(e)}")
+                    continue
+                manifest['commodities'][commodity] = entry
+                trained.append(commodity)
+                test = entry['metrics']['test'] or {}
+                logger.info(
+                    f"✅ {commodity}: {entry['input']['rows']} rows, test RMSE {test.get('rmse')}, "
+                    f"R² {test.get('r2')} in {entry['duration_s']}s"
+                )
+        if trained:
+            write_manifest(out_dir, manifest)
+
+    return {'trained': sorted(trained), 'skipped': skipped, 'missing': missing, 'failed': failed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('commodities', nargs='*', help=f"default: all ({', '.join(COMMODITY_SOURCES)})")
+    parser.add_argument('--data-dir', default=DATA_DIR, help='directory with the mandi price CSVs')
+    parser.add_argument('--out', default=MODELS_DIR, help='artifact and manifest directory')
+    parser.add_argument('--jobs', type=int, default=None, help='training processes (default: cores / forest jobs)')
+    parser.add_argument('--forest-jobs', type=int, default=1, help='n_jobs for each RandomForest')
+    parser.add_argument('--force', action='store_true', help='retrain even if the input is unchanged')
+    args = parser.parse_args(argv)
+
+    unknown = [c for c in args.commodities if c not in COMMODITY_SOURCES]
+    if unknown:
+        parser.error(f"unknown commodities: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    result = run(args.commodities, args.data_dir, args.out, args.jobs, args.forest_jobs, args.force)
+    print(json.dumps(result, indent=2))
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
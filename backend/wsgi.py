@@ -0,0 +1,12 @@
+"""
+Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The application is built once here; with preload_app enabled in
+gunicorn.conf.py that happens in the master process, so every worker shares
+the loaded models copy-on-write.
+"""
+from app import create_app
+
+app = application = create_app()
@@ -20,24 +20,32 @@ import enAnalytics from './locales/en/analytics.json';
 import hiAnalytics from './locales/hi/analytics.json';
 import mrAnalytics from './locales/mr/analytics.json';
 
+// Shared with the backend message catalogue (backend/catalogue.py)
+import enApi from './locales/en/api.json';
+import hiApi from './locales/hi/api.json';
+import mrApi from './locales/mr/api.json';
+
 const resources = {
   en: {
     common: enCommon,
     farmers: enFarmers,
     buyers: enBuyers,
-    analytics: enAnalytics
+    analytics: enAnalytics,
+    api: enApi
   },
   hi: {
     common: hiCommon,
     farmers: hiFarmers,
     buyers: hiBuyers,
-    analytics: hiAnalytics
+    analytics: hiAnalytics,
+    api: hiApi
   },
   mr: {
     common: mrCommon,
     farmers: mrFarmers,
     buyers: mrBuyers,
-    analytics: mrAnalytics
+    analytics: mrAnalytics,
+    api: mrApi
   }
 };
 
@@ -53,7 +61,7 @@ i18n
       escapeValue: false,
     },
     defaultNS: 'common',
-    ns: ['common', 'farmers', 'buyers', 'analytics'],
+    ns: ['common', 'farmers', 'buyers', 'analytics', 'api'],
     detection: {
       order: ['localStorage', 'navigator', 'htmlTag'],
       caches: ['localStorage']